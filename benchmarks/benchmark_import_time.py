@@ -0,0 +1,88 @@
+"""
+Import-time benchmark for the project's Python modules.
+
+Each module is imported in a fresh interpreter several times and the median
+wall time is reported, together with the heavy third-party libraries the
+import pulled in. Run from the repository root:
+
+    python benchmarks/benchmark_import_time.py --repeat 7 --output import_times.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "scripts.utils",
+    "scripts.create_nyc_parking_violations_report",
+]
+
+# Libraries that should only be loaded once data is converted or a chart drawn
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "matplotlib", "seaborn"]
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "heavy_modules_loaded": [name for name in {heavy_modules!r} if name in sys.modules],
+}}))
+"""
+
+
+def time_import(module: str, repeat: int = 5) -> dict:
+    """
+    Imports a module in `repeat` fresh interpreters and returns its median and
+    best import time in seconds plus the heavy libraries it loaded.
+
+    Parameters:
+        module (str): Dotted module name, e.g. "scripts.utils".
+        repeat (int, optional): Number of fresh interpreters to time.
+
+    Returns:
+        dict: Timing summary for the module.
+    """
+    snippet = IMPORT_SNIPPET.format(module=module, heavy_modules=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", snippet],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    seconds = [run["seconds"] for run in runs]
+    return {
+        "module": module,
+        "median_seconds": round(statistics.median(seconds), 4),
+        "min_seconds": round(min(seconds), 4),
+        "heavy_modules_loaded": runs[-1]["heavy_modules_loaded"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the import of the project's modules.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    results = [time_import(module, args.repeat) for module in MODULES]
+    for result in results:
+        print(
+            f"{result['module']:<50} median {result['median_seconds'] * 1000:8.1f} ms"
+            f"  min {result['min_seconds'] * 1000:8.1f} ms"
+            f"  loaded: {', '.join(result['heavy_modules_loaded']) or '-'}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,271 @@
+"""
+Deterministic generator of synthetic NYC parking violation files.
+
+Writes a violations CSV with the same headers and value formats as the NYC
+Open Data extract (mm/dd/yyyy issue dates, 0752A violation times) next to a
+copy of dof_parking_violation_codes.csv, so the directory can be loaded with
+DuckdbUtils.load_csv_file_to_db(). Rows are generated in vectorized chunks
+and streamed to disk, so 100M rows never need to fit in memory. The same
+seed, row count and chunk size always produce byte-identical files.
+
+    python -m benchmarks.generate_violations --scale 10m --output-dir data/benchmark/10m
+"""
+import argparse
+import os
+import shutil
+from datetime import date, timedelta
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CODES_CSV = os.path.join(REPO_ROOT, "data", "clean_data", "dof_parking_violation_codes.csv")
+VIOLATIONS_CSV_NAME = "parking_violations_issued_fiscal_year_2023_sample.csv"
+
+SCALES = {
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+    "100m": 100_000_000,
+}
+
+# Fiscal year 2023 plus the months the gold models report on
+FIRST_ISSUE_DATE = date(2022, 7, 1)
+LAST_ISSUE_DATE = date(2023, 8, 31)
+
+# Weekday weights, Monday first; weekends see far fewer tickets
+DAY_OF_WEEK_WEIGHTS = [1.0, 1.05, 1.05, 1.0, 0.95, 0.55, 0.3]
+
+# Camera violations (school zone speed, red light, bus lane) are issued by DOT
+# under precinct 0, which is why precinct 0 is one of the largest precincts
+CAMERA_VIOLATION_CODES = {36: 0.24, 7: 0.05, 5: 0.02}
+CAMERA_ISSUING_AGENCY = "V"
+
+STREET_VIOLATION_CODES = {
+    21: 0.13, 38: 0.07, 14: 0.06, 20: 0.04, 46: 0.04, 40: 0.03, 71: 0.03,
+    70: 0.03, 19: 0.02, 31: 0.02, 16: 0.02, 37: 0.015, 69: 0.015, 74: 0.01,
+    84: 0.01, 48: 0.01, 17: 0.01, 50: 0.01, 24: 0.005, 42: 0.005,
+}
+
+STREET_ISSUING_AGENCIES = {"T": 0.86, "P": 0.08, "S": 0.03, "K": 0.01, "X": 0.01, "C": 0.005, "D": 0.005}
+
+# Includes the spelling variants that silver_valid_violation_tickets standardizes
+VIOLATION_COUNTIES = {
+    "NY": 0.30, "K": 0.22, "Q": 0.20, "BX": 0.13, "R": 0.02, "Kings": 0.04,
+    "Qns": 0.04, "MN": 0.02, "Bronx": 0.01, "KINGS": 0.005, "QNS": 0.005,
+    "Queens": 0.003, "King's": 0.002, "Rich": 0.005,
+}
+
+PRECINCTS = [
+    1, 5, 6, 7, 9, 10, 13, 14, 17, 18, 19, 20, 22, 23, 24, 25, 26, 28, 30, 32,
+    33, 34, 40, 41, 42, 43, 44, 45, 46, 47, 48, 49, 50, 52, 60, 61, 62, 63, 66,
+    67, 68, 69, 70, 71, 72, 73, 75, 76, 77, 78, 79, 81, 83, 84, 88, 90, 94,
+    100, 101, 102, 103, 104, 105, 106, 107, 108, 109, 110, 111, 112, 113, 114,
+    115, 120, 121, 122, 123,
+]
+
+REGISTRATION_STATES = {"NY": 0.84, "NJ": 0.08, "PA": 0.03, "CT": 0.015, "FL": 0.015, "MA": 0.01, "99": 0.01}
+PLATE_TYPES = {"PAS": 0.74, "COM": 0.16, "OMT": 0.06, "SRF": 0.02, "999": 0.02}
+VEHICLE_BODY_TYPES = {"SUBN": 0.46, "4DSD": 0.32, "VAN": 0.08, "PICK": 0.05, "DELV": 0.04, "2DSD": 0.03, "SDN": 0.02}
+VEHICLE_MAKES = {
+    "TOYOT": 0.16, "HONDA": 0.13, "NISSA": 0.10, "FORD": 0.10, "CHEVR": 0.06,
+    "ME/BE": 0.06, "BMW": 0.06, "JEEP": 0.06, "HYUND": 0.05, "SUBAR": 0.04,
+    "LEXUS": 0.04, "DODGE": 0.04, "INFIN": 0.03, "ACURA": 0.03, "AUDI": 0.04,
+}
+VEHICLE_COLORS = {"BK": 0.22, "WH": 0.20, "GY": 0.18, "BL": 0.10, "SILVE": 0.08, "RD": 0.07, "WHITE": 0.06, "BLACK": 0.05, "GREY": 0.04}
+ISSUER_SQUADS = {"A": 0.2, "B": 0.15, "C": 0.15, "D": 0.1, "E": 0.1, "F": 0.1, "0": 0.2}
+
+COLUMNS = [
+    "Summons Number", "Plate ID", "Registration State", "Plate Type", "Issue Date",
+    "Violation Code", "Vehicle Body Type", "Vehicle Make", "Issuing Agency",
+    "Vehicle Expiration Date", "Violation Location", "Violation Precinct",
+    "Issuer Precinct", "Issuer Code", "Issuer Command", "Issuer Squad",
+    "Violation Time", "Violation County", "Violation Legal Code", "Vehicle Color",
+    "Vehicle Year",
+]
+
+
+def _normalized(weights: dict) -> tuple:
+    values = list(weights)
+    probabilities = np.array([weights[value] for value in values], dtype=float)
+    return values, probabilities / probabilities.sum()
+
+
+def _choose_strings(rng: np.random.Generator, weights: dict, size: int) -> pa.Array:
+    # Draws dictionary indices with NumPy and decodes them in Arrow, which is
+    # far cheaper than building millions of Python strings
+    values, probabilities = _normalized(weights)
+    indices = rng.choice(len(values), size=size, p=probabilities)
+    return pc.take(pa.array(values, type=pa.string()), pa.array(indices))
+
+
+def _issue_dates() -> tuple:
+    days = [
+        FIRST_ISSUE_DATE + timedelta(days=offset)
+        for offset in range((LAST_ISSUE_DATE - FIRST_ISSUE_DATE).days + 1)
+    ]
+    weights = np.array([DAY_OF_WEEK_WEIGHTS[day.weekday()] for day in days])
+    labels = pa.array([day.strftime("%m/%d/%Y") for day in days], type=pa.string())
+    return labels, weights / weights.sum()
+
+
+def _violation_times() -> pa.Array:
+    return pa.array(
+        [f"{hour:02d}{minute:02d}{meridiem}" for meridiem in "AP" for hour in range(1, 13) for minute in range(60)],
+        type=pa.string()
+    )
+
+
+def generate_chunk(seed: int, chunk_index: int, first_summons_number: int, size: int) -> pa.Table:
+    """
+    Returns one chunk of synthetic violations as an Arrow table.
+
+    Each chunk has its own random stream derived from (seed, chunk_index), so
+    chunks can be generated independently and in any order.
+
+    Parameters:
+        seed (int): Seed of the whole data set.
+        chunk_index (int): Position of the chunk in the file.
+        first_summons_number (int): Summons number of the chunk's first row.
+        size (int): Number of rows in the chunk.
+
+    Returns:
+        pyarrow.Table: The chunk, with the NYC Open Data column names.
+    """
+    rng = np.random.default_rng([seed, chunk_index])
+
+    camera_share = sum(CAMERA_VIOLATION_CODES.values())
+    is_camera = rng.random(size) < camera_share
+    camera_codes, camera_probabilities = _normalized(CAMERA_VIOLATION_CODES)
+    street_codes, street_probabilities = _normalized(STREET_VIOLATION_CODES)
+    violation_code = np.where(
+        is_camera,
+        rng.choice(camera_codes, size=size, p=camera_probabilities),
+        rng.choice(street_codes, size=size, p=street_probabilities),
+    )
+
+    precinct_weights = rng.dirichlet(np.full(len(PRECINCTS), 4.0))
+    street_precinct = rng.choice(PRECINCTS, size=size, p=precinct_weights)
+    violation_precinct = np.where(is_camera, 0, street_precinct)
+    # Most tickets are written by an officer from the precinct they occur in
+    issuer_precinct = np.where(
+        is_camera | (rng.random(size) < 0.85),
+        violation_precinct,
+        rng.choice(PRECINCTS, size=size),
+    )
+
+    issuing_agency = pc.if_else(
+        pa.array(is_camera),
+        pa.scalar(CAMERA_ISSUING_AGENCY),
+        _choose_strings(rng, STREET_ISSUING_AGENCIES, size),
+    )
+
+    date_labels, date_probabilities = _issue_dates()
+    issue_date = pc.take(date_labels, pa.array(rng.choice(len(date_labels), size=size, p=date_probabilities)))
+
+    # Daytime-heavy distribution of minutes past midnight, stored as 0752A
+    minute_of_day = np.clip(rng.normal(13 * 60, 4 * 60, size), 0, 24 * 60 - 1).astype(np.int64)
+    hour_of_day, minute = np.divmod(minute_of_day, 60)
+    time_index = np.where(hour_of_day >= 12, 720, 0) + ((hour_of_day + 11) % 12) * 60 + minute
+    violation_time = pc.take(_violation_times(), pa.array(time_index))
+
+    expiration_year = rng.integers(2023, 2026, size)
+    expiration_month = rng.integers(1, 13, size)
+    expiration_day = rng.integers(1, 29, size)
+
+    plate_numbers = rng.integers(0, 10_000_000, size)
+    plate_id = pc.binary_join_element_wise(
+        pa.scalar("P"), pc.cast(pa.array(plate_numbers), pa.string()), ""
+    )
+
+    columns = {
+        "Summons Number": pa.array(np.arange(first_summons_number, first_summons_number + size, dtype=np.int64)),
+        "Plate ID": plate_id,
+        "Registration State": _choose_strings(rng, REGISTRATION_STATES, size),
+        "Plate Type": _choose_strings(rng, PLATE_TYPES, size),
+        "Issue Date": issue_date,
+        "Violation Code": pa.array(violation_code.astype(np.int64)),
+        "Vehicle Body Type": _choose_strings(rng, VEHICLE_BODY_TYPES, size),
+        "Vehicle Make": _choose_strings(rng, VEHICLE_MAKES, size),
+        "Issuing Agency": issuing_agency,
+        "Vehicle Expiration Date": pa.array(expiration_year * 10_000 + expiration_month * 100 + expiration_day),
+        "Violation Location": pa.array(violation_precinct.astype(np.int64)),
+        "Violation Precinct": pa.array(violation_precinct.astype(np.int64)),
+        "Issuer Precinct": pa.array(issuer_precinct.astype(np.int64)),
+        "Issuer Code": pa.array(np.where(is_camera, 0, rng.integers(100_000, 999_999, size))),
+        "Issuer Command": pc.if_else(
+            pa.array(is_camera),
+            pa.scalar("0000"),
+            pc.binary_join_element_wise(pa.scalar("T"), pc.cast(pa.array(rng.integers(100, 800, size)), pa.string()), ""),
+        ),
+        "Issuer Squad": _choose_strings(rng, ISSUER_SQUADS, size),
+        "Violation Time": violation_time,
+        "Violation County": _choose_strings(rng, VIOLATION_COUNTIES, size),
+        "Violation Legal Code": pc.if_else(pa.array(is_camera), pa.scalar("T"), pa.nulls(size, pa.string())),
+        "Vehicle Color": _choose_strings(rng, VEHICLE_COLORS, size),
+        "Vehicle Year": pa.array(rng.integers(2005, 2025, size)),
+    }
+    return pa.table([columns[name] for name in COLUMNS], names=COLUMNS)
+
+
+def generate_violation_files(
+        output_dir: str,
+        total_rows: int,
+        seed: int = 2023,
+        chunk_rows: int = 1_000_000,
+        ) -> str:
+    """
+    Writes `total_rows` synthetic violations and the violation codes file to
+    `output_dir` and returns the path of the violations CSV.
+
+    Parameters:
+        output_dir (str): Directory to write the files to.
+        total_rows (int): Number of violation rows to generate.
+        seed (int, optional): Seed of the data set.
+        chunk_rows (int, optional): Rows generated and written per chunk.
+
+    Returns:
+        str: Path of the violations CSV.
+
+    Example:
+        >>> generate_violation_files("data/benchmark/1m", SCALES["1m"])
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    # The codes file is shared input, so it is only copied when missing; this
+    # also covers --output-dir data/clean_data, where it is the same file
+    codes_path = os.path.join(output_dir, os.path.basename(CODES_CSV))
+    if not os.path.exists(codes_path):
+        shutil.copy(CODES_CSV, codes_path)
+
+    csv_path = os.path.join(output_dir, VIOLATIONS_CSV_NAME)
+    # Written under a temporary name so an interrupted run never leaves a
+    # truncated file that looks complete
+    temporary_path = f"{csv_path}.tmp"
+    writer = None
+    try:
+        for chunk_index, first_row in enumerate(range(0, total_rows, chunk_rows)):
+            size = min(chunk_rows, total_rows - first_row)
+            chunk = generate_chunk(seed, chunk_index, 1_000_000_000 + first_row, size)
+            if writer is None:
+                writer = pa_csv.CSVWriter(temporary_path, chunk.schema)
+            writer.write_table(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(temporary_path, csv_path)
+    return csv_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic NYC parking violation files.")
+    size_group = parser.add_mutually_exclusive_group(required=True)
+    size_group.add_argument("--scale", choices=sorted(SCALES))
+    size_group.add_argument("--rows", type=int)
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--seed", type=int, default=2023)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    total_rows = SCALES[args.scale] if args.scale else args.rows
+    print(generate_violation_files(args.output_dir, total_rows, seed=args.seed, chunk_rows=args.chunk_rows))
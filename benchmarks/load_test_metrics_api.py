@@ -0,0 +1,175 @@
+"""
+Load test for the metrics HTTP API (scripts/metrics_api.py).
+
+Opens `--concurrency` keep-alive connections to a running instance and sends
+GET requests round-robin over a list of paths until `--requests` have been
+sent or `--duration` seconds have passed, then reports latency percentiles,
+requests per second and status counts. With `--revalidate`, requests carry
+the ETag of the previous response for the same path, measuring the 304 path.
+Start the API, then run from the repository root:
+
+    python benchmarks/load_test_metrics_api.py --url http://127.0.0.1:8000 --concurrency 16 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = [
+    "/metrics/gold_tickets_by_county_90_days",
+    "/metrics/gold_tickets_by_violation_90_days?order_by=-ticket_count&limit=10",
+    "/metrics/gold_tickets_by_agency_90_days.csv",
+    "/metrics/gold_2023_ticket_counts_year_month.arrow",
+    "/metrics/gold_tickets_by_vehicle_90_days?order_by=-ticket_count&limit=10",
+    "/metrics/gold_precinct_ticket_fee_sum_90_days?total_ticket_fees_usd__gte=1000&order_by=-total_ticket_fees_usd",
+    "/metrics/gold_latest_tickets_90_days?limit=100",
+]
+
+
+async def _send_request(reader, writer, host: str, path: str, etag: str = None) -> tuple:
+    request = [f"GET {path} HTTP/1.1", f"Host: {host}", "Connection: keep-alive"]
+    if etag:
+        request.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(request) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers, len(body)
+
+
+async def _client(url, paths, deadline, counter, results, revalidate):
+    split_url = urlsplit(url)
+    reader, writer = await asyncio.open_connection(split_url.hostname, split_url.port or 80)
+    etags = {}
+    try:
+        while time.perf_counter() < deadline:
+            index = next(counter, None)
+            if index is None:
+                break
+            path = paths[index % len(paths)]
+            start = time.perf_counter()
+            try:
+                status, headers, size = await _send_request(
+                    reader, writer, split_url.netloc, path, etags.get(path) if revalidate else None
+                )
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+                results.append((time.perf_counter() - start, "error", 0))
+                print(f"Request to {path} failed: {str(e)}")
+                writer.close()
+                reader, writer = await asyncio.open_connection(split_url.hostname, split_url.port or 80)
+                continue
+            results.append((time.perf_counter() - start, status, size))
+            if "etag" in headers:
+                etags[path] = headers["etag"]
+    finally:
+        writer.close()
+
+
+def _percentile(sorted_values: list, percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(percentile / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_load_test(
+        url: str = "http://127.0.0.1:8000",
+        paths: list = None,
+        concurrency: int = 8,
+        requests: int = 1000,
+        duration: float = None,
+        revalidate: bool = False
+        ) -> dict:
+    """
+    Sends requests to a running metrics API and summarizes their latency.
+
+    Parameters:
+        url (str, optional): Base URL of the API.
+        paths (list, optional): Paths requested round-robin. Defaults to
+            DEFAULT_PATHS.
+        concurrency (int, optional): Connections sending requests at once.
+        requests (int, optional): Total requests to send.
+        duration (float, optional): Stop after this many seconds even if
+            fewer requests were sent.
+        revalidate (bool, optional): Send If-None-Match with the last ETag
+            seen for each path.
+
+    Returns:
+        dict: Request count, requests per second, latency percentiles in
+            milliseconds, status counts and bytes received.
+    """
+    paths = paths or DEFAULT_PATHS
+    results = []
+    counter = iter(range(requests))
+
+    async def main():
+        deadline = time.perf_counter() + (duration if duration is not None else float("inf"))
+        await asyncio.gather(*(
+            _client(url, paths, deadline, counter, results, revalidate) for _ in range(concurrency)
+        ))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(seconds * 1000 for seconds, _, _ in results)
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "revalidate": revalidate,
+        "requests": len(results),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 50), 3),
+            "p90": round(_percentile(latencies, 90), 3),
+            "p99": round(_percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "status_counts": {str(status): count for status, count in Counter(status for _, status, _ in results).items()},
+        "bytes_received": sum(size for _, _, size in results),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test a running metrics API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", action="append", dest="paths", default=None,
+                        help="Path to request; repeat for several. Defaults to a mix of gold models.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=None)
+    parser.add_argument("--revalidate", action="store_true", help="Send If-None-Match with the last ETag.")
+    parser.add_argument("--output", default=None, help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    summary = run_load_test(
+        url=args.url,
+        paths=args.paths,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        duration=args.duration,
+        revalidate=args.revalidate
+    )
+    latency = summary["latency_ms"]
+    print(
+        f"{summary['requests']:,} requests in {summary['seconds']} s "
+        f"({summary['requests_per_second']:,} req/s), "
+        f"p50 {latency['p50']} ms, p90 {latency['p90']} ms, p99 {latency['p99']} ms, "
+        f"statuses {summary['status_counts']}"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
@@ -0,0 +1,239 @@
+"""
+End-to-end benchmark of the NYC parking violations pipeline.
+
+For a synthetic data set of the requested size this times:
+    - DuckdbUtils.load_csv_file_to_db()
+    - dbt seed and each dbt layer (bronze, silver, gold), plus every model's
+      own time
+    - each report metric query
+    - each report chart render
+    - the import time of the project's modules
+
+Everything runs offline against a separate DuckDB file (the `benchmark` dbt
+target), and the results are written as JSON so runs can be compared:
+
+    python -m benchmarks.run_benchmarks --scale 1m
+    python -m benchmarks.run_benchmarks --scale 10m --work-dir /mnt/scratch/bench --repeat 5
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import duckdb
+
+from benchmarks.benchmark_import_time import MODULES, time_import
+from benchmarks.generate_violations import SCALES, VIOLATIONS_CSV_NAME, generate_violation_files
+from scripts.utils import DuckdbUtils
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DBT_PROJECT_DIR = os.path.join(REPO_ROOT, "nyc_parking_violations")
+DBT_LAYERS = ["bronze", "silver", "gold"]
+
+
+def _timed(function, *args, **kwargs) -> tuple:
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _summarize(seconds: list) -> dict:
+    return {
+        "seconds_median": round(statistics.median(seconds), 4),
+        "seconds_min": round(min(seconds), 4),
+        "runs": len(seconds),
+    }
+
+
+def benchmark_load(data_dir: str, database_path: str, total_rows: int) -> list:
+    """
+    Times loading the generated files into a fresh database.
+    """
+    for path in (database_path, f"{database_path}.wal"):
+        if os.path.exists(path):
+            os.remove(path)
+    # The pinned schema is sniffed on the first load; remove it so every run
+    # pays the same cost
+    schema_path = os.path.join(data_dir, "parking_violations_schema.json")
+    if os.path.exists(schema_path):
+        os.remove(schema_path)
+
+    duckdb_utils = DuckdbUtils(database_path=database_path)
+    seconds, _ = _timed(duckdb_utils.load_csv_file_to_db, data_dir)
+    return [{
+        "stage": "load",
+        "name": "load_csv_file_to_db",
+        "seconds": round(seconds, 4),
+        "rows": total_rows,
+        "rows_per_second": round(total_rows / seconds),
+    }]
+
+
+def benchmark_dbt_layers(database_path: str, work_dir: str) -> list:
+    """
+    Times `dbt seed` and `dbt run --full-refresh` of each layer in dependency
+    order and collects the per-model execution times from dbt's
+    run_results.json.
+    """
+    target_path = os.path.join(work_dir, "dbt_target")
+    environment = dict(os.environ, NYC_PARKING_BENCHMARK_DB_PATH=database_path)
+    records = []
+    for layer in ["seed"] + DBT_LAYERS:
+        if layer == "seed":
+            command = ["dbt", "seed", "--full-refresh"]
+        else:
+            command = ["dbt", "run", "--full-refresh", "--select", f"path:models/{layer}"]
+        command += [
+            "--target", "benchmark",
+            "--target-path", target_path,
+            "--log-path", os.path.join(work_dir, "dbt_logs"),
+        ]
+        seconds, _ = _timed(
+            subprocess.run, command, cwd=DBT_PROJECT_DIR, env=environment,
+            check=True, capture_output=True, text=True
+        )
+        with open(os.path.join(target_path, "run_results.json")) as f:
+            run_results = json.load(f)
+        records.append({
+            "stage": "dbt",
+            "name": layer,
+            "seconds": round(seconds, 4),
+            "models": {
+                result["unique_id"].split(".")[-1]: round(result["execution_time"], 4)
+                for result in run_results["results"]
+            },
+        })
+    return records
+
+
+def benchmark_report(database_path: str, work_dir: str, repeat: int = 3) -> list:
+    """
+    Times every metric query and every chart render of the report, rendering
+    headless to PNG the same way export_report() does.
+    """
+    from scripts import create_nyc_parking_violations_report as report_module
+
+    report_module.plt.switch_backend("Agg")
+    # A DuckdbUtils of its own, so the report module's shared one keeps
+    # pointing at the dev warehouse
+    report = report_module.NYC_Parking_Violations_Report(
+        headless=True, duckdb_utils=DuckdbUtils(database_path=database_path)
+    )
+    render_dir = os.path.join(work_dir, "renders")
+    os.makedirs(render_dir, exist_ok=True)
+
+    records = []
+    for metric_name in report.METRIC_NAMES:
+        query_seconds = []
+        for _ in range(repeat):
+            seconds, data = _timed(report.run_metric_query, metric_name)
+            query_seconds.append(seconds)
+        records.append({"stage": "query", "name": metric_name, **_summarize(query_seconds)})
+
+        render_seconds = []
+        for _ in range(repeat):
+            seconds, _ = _timed(
+                report_module.render_metric_to_files,
+                metric_name, data, render_dir, ("png",), 150
+            )
+            render_seconds.append(seconds)
+        records.append({"stage": "render", "name": metric_name, **_summarize(render_seconds)})
+    return records
+
+
+def run_benchmarks(
+        total_rows: int,
+        work_dir: str,
+        repeat: int = 3,
+        seed: int = 2023,
+        regenerate: bool = False,
+        ) -> dict:
+    """
+    Runs the whole benchmark for one data size and returns the results.
+
+    Generated data is kept in `work_dir` and reused by later runs of the same
+    size and seed unless `regenerate` is True.
+
+    Parameters:
+        total_rows (int): Number of violation rows to benchmark with.
+        work_dir (str): Directory for the data, the database and dbt output.
+        repeat (int, optional): Runs per query, render and import timing.
+        seed (int, optional): Seed of the generated data.
+        regenerate (bool, optional): Whether to regenerate existing data.
+
+    Returns:
+        dict: Run metadata and a flat list of timing records.
+    """
+    work_dir = os.path.abspath(work_dir)
+    data_dir = os.path.join(work_dir, f"data_{total_rows}_{seed}")
+    database_path = os.path.join(work_dir, "nyc_parking_violations.db")
+    os.makedirs(work_dir, exist_ok=True)
+
+    timings = []
+    csv_path = os.path.join(data_dir, VIOLATIONS_CSV_NAME)
+    if regenerate or not os.path.exists(csv_path):
+        if os.path.exists(data_dir):
+            shutil.rmtree(data_dir)
+        seconds, _ = _timed(generate_violation_files, data_dir, total_rows, seed=seed)
+        timings.append({"stage": "generate", "name": "generate_violation_files", "seconds": round(seconds, 4)})
+
+    timings += benchmark_load(data_dir, database_path, total_rows)
+    timings += benchmark_dbt_layers(database_path, work_dir)
+    timings += benchmark_report(database_path, work_dir, repeat)
+    for module in MODULES:
+        result = time_import(module, repeat)
+        timings.append({
+            "stage": "import",
+            "name": module,
+            "seconds_median": result["median_seconds"],
+            "seconds_min": result["min_seconds"],
+            "runs": repeat,
+        })
+
+    return {
+        "run": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": total_rows,
+            "seed": seed,
+            "repeat": repeat,
+            "csv_bytes": os.path.getsize(csv_path),
+            "database_bytes": os.path.getsize(database_path),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "duckdb": duckdb.__version__,
+            "cpu_count": os.cpu_count(),
+        },
+        "timings": timings,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic data.")
+    size_group = parser.add_mutually_exclusive_group(required=True)
+    size_group.add_argument("--scale", choices=sorted(SCALES))
+    size_group.add_argument("--rows", type=int)
+    parser.add_argument("--work-dir", default=os.path.join(REPO_ROOT, "data", "benchmark"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=2023)
+    parser.add_argument("--regenerate", action="store_true")
+    parser.add_argument("--output", default=None, help="Defaults to <work-dir>/results_<rows>_<timestamp>.json.")
+    args = parser.parse_args()
+
+    total_rows = SCALES[args.scale] if args.scale else args.rows
+    results = run_benchmarks(total_rows, args.work_dir, args.repeat, args.seed, args.regenerate)
+
+    for record in results["timings"]:
+        seconds = record.get("seconds", record.get("seconds_median"))
+        print(f"{record['stage']:<10} {record['name']:<50} {seconds:10.4f} s")
+
+    output_path = args.output or os.path.join(
+        args.work_dir, f"results_{total_rows}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(output_path)
@@ -0,0 +1,76 @@
+{#
+    One-scan evaluation of declarative data quality rules, used by the
+    `data_quality_rules` generic test. Returns one row per rule with its status,
+    failing row count and a JSON sample of failing rows. scripts/data_quality.py
+    renders this macro with `dbt compile --inline` to run the same query
+    outside dbt.
+#}
+{% macro data_quality_literal(value) -%}
+    {%- if value is string -%}
+        '{{ value | replace("'", "''") }}'
+    {%- else -%}
+        {{ value }}
+    {%- endif -%}
+{%- endmacro %}
+
+{% macro data_quality_failure_predicate(rule) -%}
+    {%- set column = rule['column'] -%}
+    {%- if rule['type'] == 'accepted_values' -%}
+        {{ column }} IS NOT NULL AND {{ column }} NOT IN ({% for value in rule['values'] %}{{ data_quality_literal(value) }}{% if not loop.last %}, {% endif %}{% endfor %})
+    {%- elif rule['type'] == 'rejected_values' -%}
+        {{ column }} IN ({% for value in rule['values'] %}{{ data_quality_literal(value) }}{% if not loop.last %}, {% endif %}{% endfor %})
+    {%- elif rule['type'] == 'must_exist' -%}
+        {{ column }} = {{ data_quality_literal(rule['value']) }}
+    {%- elif rule['type'] == 'range' -%}
+        {%- set bounds = [] -%}
+        {%- if 'min' in rule -%}{%- do bounds.append(column ~ ' < ' ~ data_quality_literal(rule['min'])) -%}{%- endif -%}
+        {%- if 'max' in rule -%}{%- do bounds.append(column ~ ' > ' ~ data_quality_literal(rule['max'])) -%}{%- endif -%}
+        {{ bounds | join(' OR ') }}
+    {%- elif rule['type'] == 'null_rate' -%}
+        {{ column }} IS NULL
+    {%- else -%}
+        {{ exceptions.raise_compiler_error("Unknown data quality rule type '" ~ rule['type'] ~ "'") }}
+    {%- endif -%}
+{%- endmacro %}
+
+{% macro data_quality_scan(model, rules, sample_size=100) %}
+    WITH scan AS (
+        SELECT
+            COUNT(*) AS row_count
+            {%- for rule in rules %},
+            COUNT(*) FILTER (WHERE {{ data_quality_failure_predicate(rule) }}) AS matches_{{ loop.index0 }}
+            {%- if rule['type'] != 'must_exist' %},
+            min_by(struct_pack({{ rule['column'] }} := {{ rule['column'] }}), hash(t), {{ sample_size | int }}) FILTER (WHERE {{ data_quality_failure_predicate(rule) }}) AS samples_{{ loop.index0 }}
+            {%- endif %}
+            {%- endfor %}
+        FROM
+            {{ model }} AS t
+    )
+    {% for rule in rules %}
+    {%- set index = loop.index0 -%}
+    {%- if rule['type'] == 'must_exist' -%}
+        {%- set failed = 'matches_' ~ index ~ ' = 0' -%}
+        {%- set failing_rows = 'CASE WHEN matches_' ~ index ~ ' = 0 THEN 1 ELSE 0 END' -%}
+        {%- set samples = "CASE WHEN matches_" ~ index ~ " = 0 THEN to_json([{'" ~ rule['column'] ~ "': " ~ data_quality_literal(rule['value']) ~ "}]) ELSE '[]' END" -%}
+    {%- else -%}
+        {%- if rule['type'] == 'null_rate' -%}
+            {%- set failed = 'matches_' ~ index ~ ' > ' ~ (rule['max_null_rate'] | float) ~ ' * row_count' -%}
+        {%- else -%}
+            {%- set failed = 'matches_' ~ index ~ ' > 0' -%}
+        {%- endif -%}
+        {%- set failing_rows = 'matches_' ~ index -%}
+        {%- set samples = "COALESCE(to_json(samples_" ~ index ~ "), '[]')" -%}
+    {%- endif %}
+    SELECT
+        {{ data_quality_literal(rule['name']) }} AS rule_name,
+        {{ data_quality_literal(rule['type']) }} AS rule_type,
+        {{ data_quality_literal(rule['column']) }} AS column_name,
+        CASE WHEN {{ failed }} THEN 'fail' ELSE 'pass' END AS status,
+        {{ failing_rows }} AS failing_rows,
+        row_count,
+        {{ samples }} AS sample_failing_rows
+    FROM
+        scan
+    {% if not loop.last %}UNION ALL{% endif %}
+    {% endfor %}
+{% endmacro %}
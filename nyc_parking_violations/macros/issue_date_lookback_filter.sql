@@ -0,0 +1,47 @@
+{#
+    First issue_date reprocessed by an incremental run of a silver model: the
+    newest issue_date already in `relation` minus `silver_lookback_days`.
+#}
+{% macro issue_date_lookback_start(relation) %}
+    (
+        SELECT
+            COALESCE(MAX(issue_date), DATE '0001-01-01') - INTERVAL '{{ var("silver_lookback_days") }} days'
+        FROM
+            {{ relation }}
+    )
+{% endmacro %}
+
+{#
+    Predicate used by the incremental silver models: only reprocess rows whose
+    issue_date falls within `silver_lookback_days` of the newest issue_date
+    already in the model. Rows outside the window (late arrivals, deletes) are
+    only picked up by `dbt run --full-refresh`.
+#}
+{% macro issue_date_lookback_filter(date_column='issue_date') %}
+    {{ date_column }} >= {{ issue_date_lookback_start(this) }}
+{% endmacro %}
+
+{#
+    The `lookback_window` incremental strategy used with the filter above.
+    delete+insert only deletes the keys of the new batch, so a row that drops
+    out of a model inside the window (e.g. its county became invalid) would
+    stay in the target forever. This strategy deletes every row of the
+    window, plus any row whose `unique_key` is in the batch, then inserts the
+    batch, so the window always matches what a full refresh would build.
+
+    The DELETE computes the window start from the target before it changes,
+    i.e. from the same state the model's filter saw when the batch was built.
+#}
+{% macro get_incremental_lookback_window_sql(arg_dict) %}
+    {%- set target = arg_dict['target_relation'] -%}
+    {%- set source = arg_dict['temp_relation'] -%}
+    {%- set unique_key = arg_dict['unique_key'] -%}
+    {%- set columns = get_quoted_csv(arg_dict['dest_columns'] | map(attribute='name')) -%}
+    DELETE FROM {{ target }}
+    WHERE
+        issue_date >= {{ issue_date_lookback_start(target) }}
+        OR {{ unique_key }} IN (SELECT {{ unique_key }} FROM {{ source }});
+
+    INSERT INTO {{ target }} ({{ columns }})
+    SELECT {{ columns }} FROM {{ source }}
+{% endmacro %}
@@ -0,0 +1,11 @@
+{#
+    Helpers for the hive-partitioned Parquet copies of the silver layer, laid
+    out as <partition_root>/<model>/issue_year=<year>/issue_month=<month>/.
+
+    `partition_root` must exist and defaults to the directory of the target's
+    database file, so each target (dev, prod, benchmark) keeps its own files.
+#}
+{% macro issue_date_partition_location(model_name) %}
+    {%- set default_root = target.path.rsplit('/', 1)[0] -%}
+    {{- var('partition_root', default_root) ~ '/' ~ model_name -}}
+{% endmacro %}
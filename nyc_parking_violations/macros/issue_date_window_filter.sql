@@ -0,0 +1,37 @@
+{#
+    Keeps the rows of a partitioned relation whose issue_date falls within
+    `days` days before the reference date in gold_issue_date_watermark (the
+    newest issue_date, or the `reference_date` var for as-of reruns), up to
+    and including the reference date.
+
+    The window itself is computed in SQL from the watermark, so the result is
+    correct however the model is compiled: on a fresh warehouse, in
+    `dbt compile` or `dbt docs generate`, or in a `--select` run that does not
+    rebuild the watermark.
+
+    DuckDB only skips partitions for filters on constants, not on a subquery,
+    so when the watermark already exists the months of the window are also
+    looked up at compile time and added as a literal
+    `issue_year * 100 + issue_month` predicate. It is read from the same table
+    as the subqueries, so it never drops rows inside the window.
+#}
+{% macro issue_date_window_filter(days, date_column='issue_date') %}
+    {%- set watermark = ref('gold_issue_date_watermark') -%}
+    {%- set prefix = date_column.rsplit('.', 1)[0] ~ '.' if '.' in date_column else '' -%}
+    {%- set window_start = "(SELECT CAST(reference_date - INTERVAL '" ~ days ~ " days' AS DATE) FROM " ~ watermark ~ ")" -%}
+    {%- set window_end = "(SELECT reference_date FROM " ~ watermark ~ ")" -%}
+    {%- set month_bounds = none -%}
+    {%- if execute and load_relation(watermark) is not none -%}
+        {%- set bounds = run_query(
+            "SELECT " ~ window_start ~ ", " ~ window_end
+        ) -%}
+        {%- if bounds.rows | length > 0 and bounds.columns[0].values()[0] is not none -%}
+            {%- set month_bounds = [bounds.columns[0].values()[0], bounds.columns[1].values()[0]] -%}
+        {%- endif -%}
+    {%- endif -%}
+    {%- if month_bounds is not none -%}
+        {{ prefix }}issue_year * 100 + {{ prefix }}issue_month BETWEEN
+            {{ month_bounds[0].year * 100 + month_bounds[0].month }} AND {{ month_bounds[1].year * 100 + month_bounds[1].month }} AND
+    {% endif -%}
+    {{ date_column }} BETWEEN {{ window_start }} AND {{ window_end }}
+{% endmacro %}
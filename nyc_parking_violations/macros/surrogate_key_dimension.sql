@@ -0,0 +1,36 @@
+{#
+    Body of a dimension model: one row per distinct non-null value of `column`
+    in `relation`, with an INTEGER surrogate key `<column>_key`. Facts store
+    the key and gold models group on it, joining the dimension back only for
+    the few rows they output.
+
+    Incremental runs only append values that are new, numbered after the
+    current maximum key, so existing keys never change. A full refresh
+    renumbers every value, so it must rebuild the facts that reference the
+    dimension too (which `dbt run --full-refresh` does).
+#}
+{% macro surrogate_key_dimension(relation, column) %}
+WITH new_values AS (
+    SELECT DISTINCT
+        {{ column }}
+    FROM
+        {{ relation }}
+    WHERE
+        {{ column }} IS NOT NULL
+        {% if is_incremental() %}
+        AND {{ column }} NOT IN (SELECT {{ column }} FROM {{ this }})
+        {% endif %}
+)
+
+SELECT
+    CAST(
+        ROW_NUMBER() OVER (ORDER BY {{ column }})
+        {% if is_incremental() %}
+        + (SELECT COALESCE(MAX({{ column }}_key), 0) FROM {{ this }})
+        {% endif %}
+        AS INTEGER
+    ) AS {{ column }}_key,
+    {{ column }}
+FROM
+    new_values
+{% endmacro %}
@@ -1,25 +1,11 @@
-WITH recent_agency_fees AS (
-    SELECT
-        silver_valid_violation_tickets.issuing_agency,
-        silver_parking_violation_codes.fee_usd
-    FROM
-        {{ref('silver_valid_violation_tickets')}}
-    LEFT JOIN
-        {{ref('silver_parking_violation_codes')}} AS silver_parking_violation_codes ON
-            silver_valid_violation_tickets.violation_code = silver_parking_violation_codes.violation_code AND
-            silver_valid_violation_tickets.is_manhattan_96th_st_below = silver_parking_violation_codes.is_manhattan_96th_st_below
-    WHERE
-        silver_valid_violation_tickets.issue_date >= (SELECT MAX(issue_date) - INTERVAL '90 days' FROM {{ref('silver_valid_violation_tickets')}})
-)
-
 SELECT
     issuing_agency,
-    SUM(fee_usd) AS total_ticket_fees_usd,
-    AVG(fee_usd) AS average_fee_usd,
-    COUNT(*) AS ticket_count
+    total_ticket_fees_usd,
+    average_fee_usd,
+    ticket_count
 FROM
-    recent_agency_fees
-GROUP BY
-    issuing_agency
+    {{ref('gold_ticket_cube_90_days')}}
+WHERE
+    grouping_set = 'issuing_agency'
 ORDER BY
-    ticket_count DESC
\ No newline at end of file
+    ticket_count DESC
@@ -1,17 +1,17 @@
 WITH tickets_by_county AS (
     SELECT
         violation_county,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 0 THEN 1 ELSE 0 END) AS INTEGER) AS sunday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 1 THEN 1 ELSE 0 END) AS INTEGER) AS monday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 2 THEN 1 ELSE 0 END) AS INTEGER) AS tuesday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 3 THEN 1 ELSE 0 END) AS INTEGER) AS wednesday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 4 THEN 1 ELSE 0 END) AS INTEGER) AS thursday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 5 THEN 1 ELSE 0 END) AS INTEGER) AS friday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 6 THEN 1 ELSE 0 END) AS INTEGER) AS saturday
+        CAST(SUM(CASE WHEN day_of_week = 0 THEN ticket_count ELSE 0 END) AS INTEGER) AS sunday,
+        CAST(SUM(CASE WHEN day_of_week = 1 THEN ticket_count ELSE 0 END) AS INTEGER) AS monday,
+        CAST(SUM(CASE WHEN day_of_week = 2 THEN ticket_count ELSE 0 END) AS INTEGER) AS tuesday,
+        CAST(SUM(CASE WHEN day_of_week = 3 THEN ticket_count ELSE 0 END) AS INTEGER) AS wednesday,
+        CAST(SUM(CASE WHEN day_of_week = 4 THEN ticket_count ELSE 0 END) AS INTEGER) AS thursday,
+        CAST(SUM(CASE WHEN day_of_week = 5 THEN ticket_count ELSE 0 END) AS INTEGER) AS friday,
+        CAST(SUM(CASE WHEN day_of_week = 6 THEN ticket_count ELSE 0 END) AS INTEGER) AS saturday
     FROM
-        {{ref('silver_valid_violation_tickets')}}
+        {{ref('gold_2023_day_of_week_fact')}}
     WHERE
-        issue_date >= (SELECT MAX(issue_date) - INTERVAL '365 days' FROM {{ref('silver_valid_violation_tickets')}})
+        dimension = 'violation_county'
     GROUP BY
         violation_county
 )
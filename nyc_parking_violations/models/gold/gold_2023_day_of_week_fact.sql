@@ -0,0 +1,72 @@
+-- Shared day-of-week fact for the heatmap models: ticket counts per
+-- dimension value and day of week over the past 365 days, built from a single
+-- grouped scan of the months in the window of
+-- silver_valid_violation_ticket_facts_partitioned. The heatmap models pivot it
+-- by filtering on `dimension`; a new heatmap dimension only needs another
+-- grouping set here. Counties and agencies are grouped on their INTEGER keys
+-- and their text values joined onto the aggregated rows.
+WITH window_tickets AS (
+    SELECT
+        CAST(EXTRACT(year FROM ticket_facts.issue_date) AS VARCHAR) || '-W' || LPAD(CAST(EXTRACT(week FROM ticket_facts.issue_date) AS VARCHAR), 2, '0') AS year_week,
+        ticket_facts.violation_county_key,
+        ticket_facts.violation_code,
+        silver_parking_violation_codes.definition AS violation_definition,
+        ticket_facts.violation_precinct,
+        ticket_facts.issuing_agency_key,
+        EXTRACT(dow FROM ticket_facts.issue_date) AS day_of_week
+    FROM
+        {{ref('silver_valid_violation_ticket_facts_partitioned')}} AS ticket_facts
+    LEFT JOIN
+        {{ref('silver_parking_violation_codes')}} AS silver_parking_violation_codes ON
+            ticket_facts.violation_code = silver_parking_violation_codes.violation_code AND
+            ticket_facts.is_manhattan_96th_st_below = silver_parking_violation_codes.is_manhattan_96th_st_below
+    WHERE
+        {{ issue_date_window_filter(365, 'ticket_facts.issue_date') }}
+),
+
+day_of_week_counts AS (
+    SELECT
+        CASE
+            WHEN GROUPING(year_week) = 0 THEN 'year_week'
+            WHEN GROUPING(violation_county_key) = 0 THEN 'violation_county'
+            WHEN GROUPING(violation_code) = 0 THEN 'violation_code'
+            WHEN GROUPING(violation_precinct) = 0 THEN 'violation_precinct'
+            WHEN GROUPING(issuing_agency_key) = 0 THEN 'issuing_agency'
+        END AS dimension,
+        year_week,
+        violation_county_key,
+        violation_code,
+        violation_definition,
+        violation_precinct,
+        issuing_agency_key,
+        day_of_week,
+        COUNT(*) AS ticket_count
+    FROM
+        window_tickets
+    GROUP BY GROUPING SETS (
+        (year_week, day_of_week),
+        (violation_county_key, day_of_week),
+        (violation_code, violation_definition, day_of_week),
+        (violation_precinct, day_of_week),
+        (issuing_agency_key, day_of_week)
+    )
+)
+
+SELECT
+    day_of_week_counts.dimension,
+    day_of_week_counts.year_week,
+    violation_counties.violation_county,
+    day_of_week_counts.violation_code,
+    day_of_week_counts.violation_definition,
+    day_of_week_counts.violation_precinct,
+    issuing_agencies.issuing_agency,
+    day_of_week_counts.day_of_week,
+    day_of_week_counts.ticket_count
+FROM
+    day_of_week_counts
+LEFT JOIN
+    {{ref('silver_dim_violation_county')}} AS violation_counties ON
+    day_of_week_counts.violation_county_key = violation_counties.violation_county_key
+LEFT JOIN
+    {{ref('silver_dim_issuing_agency')}} AS issuing_agencies ON
+    day_of_week_counts.issuing_agency_key = issuing_agencies.issuing_agency_key
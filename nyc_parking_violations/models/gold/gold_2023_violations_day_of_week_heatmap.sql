@@ -1,24 +1,20 @@
 WITH tickets_by_violation AS (
     SELECT
-        silver_valid_violation_tickets.violation_code,
-        silver_parking_violation_codes.definition AS violation_definition,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 0 THEN 1 ELSE 0 END) AS INTEGER) AS sunday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 1 THEN 1 ELSE 0 END) AS INTEGER) AS monday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 2 THEN 1 ELSE 0 END) AS INTEGER) AS tuesday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 3 THEN 1 ELSE 0 END) AS INTEGER) AS wednesday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 4 THEN 1 ELSE 0 END) AS INTEGER) AS thursday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 5 THEN 1 ELSE 0 END) AS INTEGER) AS friday,
-        CAST(SUM(CASE WHEN EXTRACT(dow FROM issue_date) = 6 THEN 1 ELSE 0 END) AS INTEGER) AS saturday
+        violation_code,
+        violation_definition,
+        CAST(SUM(CASE WHEN day_of_week = 0 THEN ticket_count ELSE 0 END) AS INTEGER) AS sunday,
+        CAST(SUM(CASE WHEN day_of_week = 1 THEN ticket_count ELSE 0 END) AS INTEGER) AS monday,
+        CAST(SUM(CASE WHEN day_of_week = 2 THEN ticket_count ELSE 0 END) AS INTEGER) AS tuesday,
+        CAST(SUM(CASE WHEN day_of_week = 3 THEN ticket_count ELSE 0 END) AS INTEGER) AS wednesday,
+        CAST(SUM(CASE WHEN day_of_week = 4 THEN ticket_count ELSE 0 END) AS INTEGER) AS thursday,
+        CAST(SUM(CASE WHEN day_of_week = 5 THEN ticket_count ELSE 0 END) AS INTEGER) AS friday,
+        CAST(SUM(CASE WHEN day_of_week = 6 THEN ticket_count ELSE 0 END) AS INTEGER) AS saturday
     FROM
-        {{ref('silver_valid_violation_tickets')}}
-    LEFT JOIN
-        {{ref('silver_parking_violation_codes')}} AS silver_parking_violation_codes ON
-            silver_valid_violation_tickets.violation_code = silver_parking_violation_codes.violation_code AND
-            silver_valid_violation_tickets.is_manhattan_96th_st_below = silver_parking_violation_codes.is_manhattan_96th_st_below
+        {{ref('gold_2023_day_of_week_fact')}}
     WHERE
-        issue_date >= (SELECT MAX(issue_date) - INTERVAL '365 days' FROM silver_valid_violation_tickets)
+        dimension = 'violation_code'
     GROUP BY
-        silver_valid_violation_tickets.violation_code,
+        violation_code,
         violation_definition
 )
 
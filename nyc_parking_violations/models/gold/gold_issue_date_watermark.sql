@@ -0,0 +1,17 @@
+-- The date the 90-day and 365-day windows end on, computed once per run. It is
+-- the newest issue_date in silver_valid_violation_tickets unless the
+-- `reference_date` var is set, e.g. to rebuild the gold layer as of an earlier
+-- date:
+--   dbt run --select gold --vars '{reference_date: 2023-06-30}'
+-- issue_date_window_filter() bounds the gold windows with it, and
+-- report queries can read it to label the window they show.
+SELECT
+    {% if var('reference_date', none) is not none -%}
+    CAST('{{ var("reference_date") }}' AS DATE) AS reference_date,
+    {%- else -%}
+    MAX(issue_date) AS reference_date,
+    {%- endif %}
+    MAX(issue_date) AS latest_issue_date,
+    {{ 'TRUE' if var('reference_date', none) is not none else 'FALSE' }} AS is_as_of_rerun
+FROM
+    {{ref('silver_valid_violation_tickets')}}
@@ -14,8 +14,8 @@ SELECT
     violation_county,
     fee_usd
 FROM
-    {{ref('silver_valid_violation_tickets')}}
+    {{ref('silver_valid_violation_tickets_partitioned')}}
 WHERE
-    issue_date >= (SELECT MAX(issue_date) - INTERVAL '90 days' FROM {{ref('silver_valid_violation_tickets')}})
+    {{ issue_date_window_filter(90) }}
 ORDER BY
     issue_date DESC
\ No newline at end of file
@@ -0,0 +1,109 @@
+-- Shared aggregate cube for the 90-day gold models. The 90-day window, the join
+-- to the violation codes and the scan of silver_valid_violation_ticket_facts
+-- (its month-partitioned copy, so only the months in the window are read)
+-- happen once here; the gold_*_90_days models and gold_2023_agency_fee_metrics
+-- are thin projections filtered on `grouping_set`. Tickets are grouped on the
+-- INTEGER dimension keys, and the text values are joined back onto the
+-- aggregated rows only.
+WITH window_tickets AS MATERIALIZED (
+    SELECT
+        ticket_facts.violation_county_key,
+        ticket_facts.issuing_agency_key,
+        ticket_facts.violation_code,
+        silver_parking_violation_codes.definition AS violation_definition,
+        ticket_facts.issuer_precinct,
+        ticket_facts.vehicle_make_key,
+        ticket_facts.plate_type_key,
+        ticket_facts.registration_state_key,
+        silver_parking_violation_codes.fee_usd
+    FROM
+        {{ref('silver_valid_violation_ticket_facts_partitioned')}} AS ticket_facts
+    LEFT JOIN
+        {{ref('silver_parking_violation_codes')}} AS silver_parking_violation_codes ON
+            ticket_facts.violation_code = silver_parking_violation_codes.violation_code AND
+            ticket_facts.is_manhattan_96th_st_below = silver_parking_violation_codes.is_manhattan_96th_st_below
+    WHERE
+        {{ issue_date_window_filter(90, 'ticket_facts.issue_date') }}
+),
+
+ticket_cube AS (
+    SELECT
+        CASE
+            WHEN GROUPING(violation_county_key) = 0 THEN 'violation_county'
+            WHEN GROUPING(issuing_agency_key) = 0 THEN 'issuing_agency'
+            WHEN GROUPING(violation_code) = 0 THEN 'violation_code'
+            WHEN GROUPING(issuer_precinct) = 0 THEN 'issuer_precinct'
+        END AS grouping_set,
+        violation_county_key,
+        issuing_agency_key,
+        violation_code,
+        violation_definition,
+        issuer_precinct,
+        COUNT(*) AS ticket_count,
+        SUM(fee_usd) AS total_ticket_fees_usd,
+        AVG(fee_usd) AS average_fee_usd
+    FROM
+        window_tickets
+    GROUP BY GROUPING SETS (
+        (violation_county_key),
+        (issuing_agency_key),
+        (violation_code, violation_definition),
+        (issuer_precinct)
+    )
+),
+
+-- Vehicle attributes come from silver_violation_vehicles through the fact's
+-- vehicle keys, aggregated in their own branch.
+vehicle_cube AS (
+    SELECT
+        'vehicle' AS grouping_set,
+        vehicle_make_key,
+        plate_type_key,
+        registration_state_key,
+        COUNT(*) AS ticket_count,
+        SUM(fee_usd) AS total_ticket_fees_usd,
+        AVG(fee_usd) AS average_fee_usd
+    FROM
+        window_tickets
+    GROUP BY
+        vehicle_make_key,
+        plate_type_key,
+        registration_state_key
+),
+
+cube AS (
+    SELECT * FROM ticket_cube
+    UNION ALL BY NAME
+    SELECT * FROM vehicle_cube
+)
+
+SELECT
+    cube.grouping_set,
+    violation_counties.violation_county,
+    issuing_agencies.issuing_agency,
+    cube.violation_code,
+    cube.violation_definition,
+    cube.issuer_precinct,
+    cube.ticket_count,
+    cube.total_ticket_fees_usd,
+    cube.average_fee_usd,
+    vehicle_makes.vehicle_make,
+    plate_types.plate_type,
+    registration_states.registration_state
+FROM
+    cube
+LEFT JOIN
+    {{ref('silver_dim_violation_county')}} AS violation_counties ON
+    cube.violation_county_key = violation_counties.violation_county_key
+LEFT JOIN
+    {{ref('silver_dim_issuing_agency')}} AS issuing_agencies ON
+    cube.issuing_agency_key = issuing_agencies.issuing_agency_key
+LEFT JOIN
+    {{ref('silver_dim_vehicle_make')}} AS vehicle_makes ON
+    cube.vehicle_make_key = vehicle_makes.vehicle_make_key
+LEFT JOIN
+    {{ref('silver_dim_plate_type')}} AS plate_types ON
+    cube.plate_type_key = plate_types.plate_type_key
+LEFT JOIN
+    {{ref('silver_dim_registration_state')}} AS registration_states ON
+    cube.registration_state_key = registration_states.registration_state_key
@@ -1,11 +1,9 @@
 SELECT
     violation_county,
-    COUNT(*) AS ticket_count
+    ticket_count
 FROM
-    {{ref('silver_valid_violation_tickets')}}
+    {{ref('gold_ticket_cube_90_days')}}
 WHERE
-    issue_date >= (SELECT MAX(issue_date) - INTERVAL '90 days' FROM {{ref('silver_valid_violation_tickets')}})
-GROUP BY
-    violation_county
+    grouping_set = 'violation_county'
 ORDER BY
-    ticket_count DESC
\ No newline at end of file
+    ticket_count DESC
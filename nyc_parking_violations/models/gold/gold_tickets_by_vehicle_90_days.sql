@@ -1,28 +1,11 @@
-WITH valid_vehicle_tickets AS (
-    SELECT
-        silver_valid_violation_tickets.summons_number,
-        silver_violation_vehicles.vehicle_make,
-        silver_violation_vehicles.plate_type,
-        silver_violation_vehicles.registration_state
-    FROM
-        {{ref('silver_valid_violation_tickets')}}
-    INNER JOIN
-        {{ref('silver_violation_vehicles')}}
-        ON silver_valid_violation_tickets.summons_number = silver_violation_vehicles.summons_number
-    WHERE
-        silver_valid_violation_tickets.issue_date >= (SELECT MAX(issue_date) - INTERVAL '90 days' FROM {{ref('silver_valid_violation_tickets')}})
-)
-
 SELECT
     vehicle_make,
     plate_type,
     registration_state,
-    COUNT(*) AS ticket_count
+    ticket_count
 FROM
-    valid_vehicle_tickets
-GROUP BY
-    vehicle_make,
-    plate_type,
-    registration_state
+    {{ref('gold_ticket_cube_90_days')}}
+WHERE
+    grouping_set = 'vehicle'
 ORDER BY
-    ticket_count DESC
\ No newline at end of file
+    ticket_count DESC
@@ -1,17 +1,10 @@
 SELECT
-    silver_valid_violation_tickets.violation_code,
-    silver_parking_violation_codes.definition AS violation_definition,
-    COUNT(*) AS ticket_count
+    violation_code,
+    violation_definition,
+    ticket_count
 FROM
-    {{ref('silver_valid_violation_tickets')}}
-LEFT JOIN
-    {{ref('silver_parking_violation_codes')}} AS silver_parking_violation_codes ON
-        silver_valid_violation_tickets.violation_code = silver_parking_violation_codes.violation_code AND
-        silver_valid_violation_tickets.is_manhattan_96th_st_below = silver_parking_violation_codes.is_manhattan_96th_st_below
+    {{ref('gold_ticket_cube_90_days')}}
 WHERE
-    silver_valid_violation_tickets.issue_date >= (SELECT MAX(issue_date) - INTERVAL '90 days' FROM {{ref('silver_valid_violation_tickets')}})
-GROUP BY
-    silver_valid_violation_tickets.violation_code,
-    silver_parking_violation_codes.definition
+    grouping_set = 'violation_code'
 ORDER BY
-    ticket_count DESC
\ No newline at end of file
+    ticket_count DESC
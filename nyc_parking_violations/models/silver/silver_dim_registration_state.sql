@@ -0,0 +1,8 @@
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='append'
+    )
+}}
+
+{{ surrogate_key_dimension(ref('silver_violation_vehicles'), 'registration_state') }}
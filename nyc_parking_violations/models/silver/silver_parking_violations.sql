@@ -1,3 +1,11 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key='summons_number',
+        incremental_strategy='lookback_window'
+    )
+}}
+
 SELECT
     summons_number,
     registration_state,
@@ -25,4 +33,8 @@ SELECT
         ELSE FALSE
         END AS is_manhattan_96th_st_below
 FROM
-    {{ref('bronze_parking_violations')}}
\ No newline at end of file
+    {{ref('bronze_parking_violations')}}
+{% if is_incremental() %}
+WHERE
+    {{ issue_date_lookback_filter() }}
+{% endif %}
\ No newline at end of file
@@ -0,0 +1,69 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key='summons_number',
+        incremental_strategy='lookback_window'
+    )
+}}
+
+-- Compact copy of silver_valid_violation_tickets for the gold aggregations:
+-- the low-cardinality text dimensions, including the vehicle attributes from
+-- silver_violation_vehicles, are replaced by INTEGER keys into the
+-- silver_dim_* tables, so gold models scan fewer bytes and group on integers.
+-- silver_violation_vehicles is not unique on summons_number (duplicated
+-- summons numbers in the raw files), so it is reduced to one row per summons
+-- number before the join; otherwise a duplicate would multiply the ticket and
+-- inflate every gold count built on this table.
+WITH vehicles AS (
+    SELECT
+        summons_number,
+        registration_state,
+        plate_type,
+        vehicle_make
+    FROM
+        {{ref('silver_violation_vehicles')}}
+    QUALIFY ROW_NUMBER() OVER (
+        PARTITION BY summons_number
+        ORDER BY issue_date DESC, registration_state, plate_type, vehicle_make
+    ) = 1
+)
+
+SELECT
+    tickets.summons_number,
+    tickets.issue_date,
+    tickets.violation_code,
+    tickets.is_manhattan_96th_st_below,
+    tickets.violation_precinct,
+    tickets.issuer_precinct,
+    violation_counties.violation_county_key,
+    issuing_agencies.issuing_agency_key,
+    registration_states.registration_state_key,
+    plate_types.plate_type_key,
+    vehicle_makes.vehicle_make_key,
+    tickets.fee_usd
+FROM
+    {{ref('silver_valid_violation_tickets')}} AS tickets
+LEFT JOIN
+    vehicles ON
+    tickets.summons_number = vehicles.summons_number
+LEFT JOIN
+    {{ref('silver_dim_violation_county')}} AS violation_counties ON
+    tickets.violation_county = violation_counties.violation_county
+LEFT JOIN
+    {{ref('silver_dim_issuing_agency')}} AS issuing_agencies ON
+    tickets.issuing_agency = issuing_agencies.issuing_agency
+LEFT JOIN
+    {{ref('silver_dim_registration_state')}} AS registration_states ON
+    vehicles.registration_state = registration_states.registration_state
+LEFT JOIN
+    {{ref('silver_dim_plate_type')}} AS plate_types ON
+    vehicles.plate_type = plate_types.plate_type
+LEFT JOIN
+    {{ref('silver_dim_vehicle_make')}} AS vehicle_makes ON
+    vehicles.vehicle_make = vehicle_makes.vehicle_make
+{% if is_incremental() %}
+WHERE
+    {{ issue_date_lookback_filter('tickets.issue_date') }}
+{% endif %}
+ORDER BY
+    tickets.issue_date
@@ -1,28 +1,33 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key='summons_number',
+        incremental_strategy='lookback_window'
+    )
+}}
+
 SELECT
-    summons_number,
-    issue_date,
-    violation_code,
-    is_manhattan_96th_st_below,
-    issuing_agency,
-    violation_location,
-    violation_precinct,
-    issuer_precinct,
-    issuer_code,
-    issuer_command,
-    issuer_squad,
-    violation_time,
-    -- Add this CASE WHEN to standardize county values for now until we are
-    -- able to implement a long-term solution and then remove.
-    CASE 
-        WHEN violation_county = 'King''s' THEN 'Kings'
-        WHEN violation_county = 'KINGS' THEN 'Kings'
-        WHEN violation_county = 'Queens' THEN 'Qns'
-        WHEN violation_county = 'QNS' THEN 'Qns'
-        ELSE violation_county
-    END AS violation_county,
-    fee_usd
+    tickets.summons_number,
+    tickets.issue_date,
+    tickets.violation_code,
+    tickets.is_manhattan_96th_st_below,
+    tickets.issuing_agency,
+    tickets.violation_location,
+    tickets.violation_precinct,
+    tickets.issuer_precinct,
+    tickets.issuer_code,
+    tickets.issuer_command,
+    tickets.issuer_squad,
+    tickets.violation_time,
+    -- Spellings of a county are standardized through the
+    -- violation_county_mapping seed; add new spellings there.
+    COALESCE(county_mapping.violation_county, tickets.violation_county) AS violation_county,
+    tickets.fee_usd
 FROM
-    {{ref('silver_violation_tickets')}}
+    {{ref('silver_violation_tickets')}} AS tickets
+LEFT JOIN
+    {{ref('violation_county_mapping')}} AS county_mapping ON
+    tickets.violation_county = county_mapping.raw_violation_county
 WHERE
     -- Meeting on August 27th, 2023 noted that we will try removing "precinct 0"
     -- until we can get a better data label for this value.
@@ -36,5 +41,14 @@ WHERE
     -- able to implement a long-term solution and then remove.
     --
     -- violation_precinct != 0 AND
-    EXTRACT(year FROM issue_date) == 2023 AND
-    EXTRACT(month FROM issue_date) <= 8
\ No newline at end of file
+    EXTRACT(year FROM tickets.issue_date) == 2023 AND
+    EXTRACT(month FROM tickets.issue_date) <= 8
+    {% if is_incremental() %}
+    AND {{ issue_date_lookback_filter('tickets.issue_date') }}
+    {% endif %}
+-- Rows are written in issue_date order (as are the tables built from this
+-- one), so the min/max statistics of each row group let issue_date filters
+-- skip the row groups outside their range. Incremental runs append their
+-- batch in order; `dbt run --full-refresh` restores a fully sorted table.
+ORDER BY
+    tickets.issue_date
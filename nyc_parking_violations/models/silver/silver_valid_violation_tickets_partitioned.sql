@@ -0,0 +1,21 @@
+{{
+    config(
+        materialized='external',
+        location=issue_date_partition_location('silver_valid_violation_tickets_partitioned'),
+        options={'partition_by': 'issue_year, issue_month', 'overwrite': 1},
+        parquet_read_options={'hive_partitioning': 1}
+    )
+}}
+
+-- silver_valid_violation_tickets as hive-partitioned Parquet by year and
+-- month of issue_date. Models filtering on an issue_date window read this
+-- copy through issue_date_window_filter() so only the matching months are
+-- scanned, and other tools can read the files without the DuckDB file lock.
+SELECT
+    *,
+    EXTRACT(year FROM issue_date) AS issue_year,
+    EXTRACT(month FROM issue_date) AS issue_month
+FROM
+    {{ref('silver_valid_violation_tickets')}}
+ORDER BY
+    issue_date
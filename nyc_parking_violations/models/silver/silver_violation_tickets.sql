@@ -1,3 +1,11 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key='summons_number',
+        incremental_strategy='lookback_window'
+    )
+}}
+
 SELECT
     violations.summons_number,
     violations.issue_date,
@@ -19,4 +27,10 @@ FROM
 LEFT JOIN
     {{ref('silver_parking_violation_codes')}} AS codes ON
     violations.violation_code = codes.violation_code AND
-    violations.is_manhattan_96th_st_below = codes.is_manhattan_96th_st_below
\ No newline at end of file
+    violations.is_manhattan_96th_st_below = codes.is_manhattan_96th_st_below
+{% if is_incremental() %}
+WHERE
+    {{ issue_date_lookback_filter('violations.issue_date') }}
+{% endif %}
+ORDER BY
+    violations.issue_date
@@ -1,5 +1,14 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key='summons_number',
+        incremental_strategy='lookback_window'
+    )
+}}
+
 SELECT
     summons_number,
+    issue_date,
     registration_state,
     plate_type,
     vehicle_body_type,
@@ -8,4 +17,8 @@ SELECT
     vehicle_color,
     vehicle_year
 FROM
-    {{ref('silver_parking_violations')}}
\ No newline at end of file
+    {{ref('silver_parking_violations')}}
+{% if is_incremental() %}
+WHERE
+    {{ issue_date_lookback_filter() }}
+{% endif %}
\ No newline at end of file
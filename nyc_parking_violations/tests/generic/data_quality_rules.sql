@@ -0,0 +1,16 @@
+{#
+    Evaluates every rule declared for a model in one scan (see the
+    `data_quality_scan` macro) and returns one row per failing rule, so the
+    stored failures hold the per-rule counts and failing row samples.
+#}
+{% test data_quality_rules(model, rules, sample_size=100) %}
+
+SELECT
+    *
+FROM (
+    {{ data_quality_scan(model, rules, sample_size) }}
+)
+WHERE
+    status = 'fail'
+
+{% endtest %}
@@ -0,0 +1,26 @@
+-- gold_tickets_by_vehicle_90_days counts each valid ticket once, like the other
+-- 90-day gold models, so its counts add up to the tickets in the window.
+WITH vehicle_tickets AS (
+    SELECT
+        SUM(ticket_count) AS ticket_count
+    FROM
+        {{ref('gold_tickets_by_vehicle_90_days')}}
+),
+
+window_tickets AS (
+    SELECT
+        COUNT(*) AS ticket_count
+    FROM
+        {{ref('silver_valid_violation_tickets_partitioned')}} AS tickets
+    WHERE
+        {{ issue_date_window_filter(90, 'tickets.issue_date') }}
+)
+
+SELECT
+    vehicle_tickets.ticket_count AS vehicle_ticket_count,
+    window_tickets.ticket_count AS window_ticket_count
+FROM
+    vehicle_tickets,
+    window_tickets
+WHERE
+    vehicle_tickets.ticket_count IS DISTINCT FROM window_tickets.ticket_count
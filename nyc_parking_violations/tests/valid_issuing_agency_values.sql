@@ -1,8 +0,0 @@
-{{ config(severity = 'warn') }}
-
-SELECT 
-    issuing_agency
-FROM 
-    {{ ref('silver_valid_violation_tickets') }}
-WHERE 
-    issuing_agency IN ('XYZ')
\ No newline at end of file
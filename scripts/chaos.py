@@ -0,0 +1,289 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+# The fault rows and manifest are written to this subdirectory of the dirty
+# copy's directory, where loader globs such as "parking_violations*.csv" do not
+# pick them up as violation files
+SIDECAR_DIR = 'chaos_faults'
+
+FAULT_TYPES = ('county_variants', 'invalid_agency', 'precinct_zero', 'nulls', 'duplicate_summons')
+
+# Reproduces the issues in data/dirty_data: new spellings of Kings and Queens,
+# agency V replaced by the placeholder XYZ, plus a few faults the report has
+# not seen yet. Column names are the raw CSV headers.
+DEFAULT_FAULTS = [
+    {
+        'type': 'county_variants',
+        'column': 'Violation County',
+        'rate': 0.1,
+        'variants': {
+            'K': ["King's", 'KINGS'],
+            'Kings': ["King's", 'KINGS'],
+            'Q': ['Queens', 'QNS'],
+            'Qns': ['Queens', 'QNS'],
+        },
+    },
+    {'type': 'invalid_agency', 'column': 'Issuing Agency', 'rate': 1.0, 'only_values': ['V'], 'value': 'XYZ'},
+    {'type': 'precinct_zero', 'column': 'Violation Precinct', 'rate': 0.01},
+    {'type': 'nulls', 'columns': ['Vehicle Make', 'Violation Time'], 'rate': 0.005},
+    {'type': 'duplicate_summons', 'column': 'Summons Number', 'rate': 0.001},
+]
+
+FAULT_ROW_SCHEMA = pa.schema([
+    ('fault_index', pa.int32()),
+    ('fault_type', pa.string()),
+    ('row_number', pa.int64()),
+    ('summons_number', pa.string()),
+    ('column_name', pa.string()),
+    ('original_value', pa.string()),
+    ('new_value', pa.string()),
+])
+
+
+def _read_header(csv_path):
+    with open(csv_path, newline='') as f:
+        return next(csv.reader(f))
+
+
+def _eligible(column, only_values):
+    if not only_values:
+        return pc.is_valid(column).to_numpy(zero_copy_only=False)
+    return pc.fill_null(pc.is_in(column, value_set=pa.array(only_values, type=pa.string())), False) \
+        .to_numpy(zero_copy_only=False)
+
+
+def _fault_rows(fault_index, fault, row_numbers, summons_numbers, column_name, original_values, new_values):
+    size = len(row_numbers)
+    return pa.table([
+        pa.array(np.full(size, fault_index, dtype=np.int32)),
+        pa.repeat(pa.scalar(fault['type'], pa.string()), size),
+        pa.array(row_numbers, type=pa.int64()),
+        summons_numbers,
+        pa.repeat(pa.scalar(column_name, pa.string()), size),
+        original_values,
+        new_values,
+    ], schema=FAULT_ROW_SCHEMA)
+
+
+def _replace_values(table, column_name, mask, new_values):
+    column_index = table.schema.get_field_index(column_name)
+    column = table.column(column_index).combine_chunks()
+    replaced = pc.if_else(pa.array(mask), new_values, column)
+    return table.set_column(column_index, column_name, replaced), column
+
+
+def apply_faults(table, faults, seed, chunk_index, first_row_number, summons_column='Summons Number'):
+    """
+    Applies the faults to one chunk of rows read as strings.
+
+    Every fault draws from its own random stream seeded with (seed,
+    chunk_index, fault index), so the output only depends on the seed, the
+    fault list and the chunking, and faults can be added to the list without
+    changing where the earlier ones land.
+
+    Parameters:
+        table (pyarrow.Table): The chunk, all columns as strings.
+        faults (list): Fault dicts, see DEFAULT_FAULTS.
+        seed (int): Seed of the run.
+        chunk_index (int): Position of the chunk in the input.
+        first_row_number (int): Input row number of the chunk's first row.
+        summons_column (str, optional): Column recorded in the fault rows.
+
+    Returns:
+        tuple: The dirty chunk and a table of the injected faults, one row
+            per changed value or duplicated row.
+    """
+    row_numbers = np.arange(first_row_number, first_row_number + table.num_rows)
+    fault_rows = []
+
+    for fault_index, fault in enumerate(faults):
+        # Duplicates grow the chunk, so later faults see the copies too
+        size = table.num_rows
+        rng = np.random.default_rng([seed, chunk_index, fault_index])
+        fault_type = fault['type']
+        selected = rng.random(size) < fault['rate']
+
+        if fault_type == 'duplicate_summons':
+            # Applied to the chunk as faulted so far, so duplicates can carry
+            # earlier faults too; the copies are appended after the chunk
+            indices = np.flatnonzero(selected & _eligible(table.column(fault['column']), None))
+            duplicates = table.take(pa.array(indices))
+            summons_numbers = duplicates.column(summons_column).combine_chunks()
+            fault_rows.append(_fault_rows(
+                fault_index, fault, row_numbers[indices], summons_numbers,
+                fault['column'], summons_numbers, summons_numbers
+            ))
+            table = pa.concat_tables([table, duplicates])
+            row_numbers = np.concatenate([row_numbers, row_numbers[indices]])
+            continue
+
+        if fault_type == 'nulls':
+            for column_name in fault['columns']:
+                column = table.column(column_name)
+                mask = selected & _eligible(column, None)
+                table, original = _replace_values(table, column_name, mask, pa.nulls(table.num_rows, pa.string()))
+                indices = pa.array(np.flatnonzero(mask))
+                fault_rows.append(_fault_rows(
+                    fault_index, fault, row_numbers[mask], pc.take(table.column(summons_column), indices),
+                    column_name, pc.take(original, indices), pa.nulls(len(indices), pa.string())
+                ))
+                # Each column gets its own draw so nulls do not line up
+                selected = rng.random(size) < fault['rate']
+            continue
+
+        column_name = fault['column']
+        column = table.column(column_name)
+        if fault_type == 'county_variants':
+            mask = selected & _eligible(column, list(fault['variants']))
+            new_values = column.combine_chunks()
+            for value, variants in fault['variants'].items():
+                picks = pc.take(pa.array(variants, type=pa.string()), pa.array(rng.integers(len(variants), size=size)))
+                is_value = pc.fill_null(pc.equal(column, value), False).to_numpy(zero_copy_only=False)
+                new_values = pc.if_else(pa.array(is_value), picks, new_values)
+        elif fault_type == 'invalid_agency':
+            mask = selected & _eligible(column, fault.get('only_values'))
+            new_values = pa.repeat(pa.scalar(fault.get('value', 'XYZ'), pa.string()), size)
+        elif fault_type == 'precinct_zero':
+            mask = selected & _eligible(column, fault.get('only_values'))
+            new_values = pa.repeat(pa.scalar('0', pa.string()), size)
+        else:
+            raise ValueError(f"Unknown fault type '{fault_type}', expected one of {FAULT_TYPES}")
+
+        table, original = _replace_values(table, column_name, mask, new_values)
+        indices = pa.array(np.flatnonzero(mask))
+        fault_rows.append(_fault_rows(
+            fault_index, fault, row_numbers[mask], pc.take(table.column(summons_column), indices),
+            column_name, pc.take(original, indices), pc.take(new_values, indices)
+        ))
+
+    faults_table = pa.concat_tables(fault_rows) if fault_rows else FAULT_ROW_SCHEMA.empty_table()
+    return table, faults_table
+
+
+def make_dirty_copy(
+        input_csv,
+        output_csv,
+        faults=DEFAULT_FAULTS,
+        seed=2023,
+        block_size=64 * 1024 * 1024,
+        summons_column='Summons Number'
+        ):
+    """
+    Streams a violations CSV through the fault injectors and writes the dirty
+    copy, a CSV of every injected fault and a JSON manifest summarizing them.
+
+    The input is read in blocks of `block_size` bytes with every column as
+    text, so values the faults do not touch are written back as they were
+    read, and memory use does not grow with the file size. All randomness is
+    vectorized NumPy seeded per block (see `apply_faults`).
+
+    Parameters:
+        input_csv (str): Clean violations CSV with the raw NYC headers.
+        output_csv (str): Where to write the dirty copy.
+        faults (list, optional): Fault dicts. Defaults to DEFAULT_FAULTS.
+        seed (int, optional): Seed of the run.
+        block_size (int, optional): Bytes read per chunk.
+        summons_column (str, optional): Column identifying a ticket.
+
+    Returns:
+        dict: The manifest, also written to
+            chaos_faults/<output file name>.manifest.json next to the dirty
+            copy. Fault rows are written to
+            chaos_faults/<output file name>.faults.csv.
+
+    Example:
+        >>> make_dirty_copy(
+        ...     "../data/clean_data/parking_violations_issued_fiscal_year_2023_sample.csv",
+        ...     "../data/dirty_data/parking_violations_issued_fiscal_year_2023_sample.csv"
+        ... )
+    """
+    for fault in faults:
+        if fault['type'] not in FAULT_TYPES:
+            raise ValueError(f"Unknown fault type '{fault['type']}', expected one of {FAULT_TYPES}")
+
+    header = _read_header(input_csv)
+    reader = pa_csv.open_csv(
+        input_csv,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            strings_can_be_null=True,
+        ),
+    )
+    write_options = pa_csv.WriteOptions(quoting_style='needed')
+    sidecar_prefix = os.path.join(
+        os.path.dirname(os.path.abspath(output_csv)), SIDECAR_DIR, os.path.basename(output_csv)
+    )
+    faults_csv = f'{sidecar_prefix}.faults.csv'
+
+    os.makedirs(os.path.dirname(sidecar_prefix), exist_ok=True)
+    input_rows = 0
+    output_rows = 0
+    fault_counts = [0] * len(faults)
+    with pa_csv.CSVWriter(output_csv, reader.schema, write_options=write_options) as writer, \
+            pa_csv.CSVWriter(faults_csv, FAULT_ROW_SCHEMA, write_options=write_options) as faults_writer:
+        for chunk_index, batch in enumerate(reader):
+            table, faults_table = apply_faults(
+                pa.Table.from_batches([batch]), faults, seed, chunk_index, input_rows, summons_column
+            )
+            writer.write_table(table)
+            faults_writer.write_table(faults_table)
+            for fault_index, count in zip(*np.unique(
+                    faults_table.column('fault_index').to_numpy(), return_counts=True)):
+                fault_counts[fault_index] += int(count)
+            input_rows += batch.num_rows
+            output_rows += table.num_rows
+
+    manifest = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'input_csv': os.path.abspath(input_csv),
+        'output_csv': os.path.abspath(output_csv),
+        'faults_csv': os.path.abspath(faults_csv),
+        'seed': seed,
+        'block_size': block_size,
+        'input_rows': input_rows,
+        'output_rows': output_rows,
+        'faults': [dict(fault, injected=count) for fault, count in zip(faults, fault_counts)],
+    }
+    with open(f'{sidecar_prefix}.manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write a dirty copy of a violations CSV with known faults.')
+    parser.add_argument('input_csv')
+    parser.add_argument('output_dir')
+    parser.add_argument('--faults', default=None, help='JSON file with a list of faults.')
+    parser.add_argument('--seed', type=int, default=2023)
+    parser.add_argument('--block-size-mb', type=int, default=64)
+    args = parser.parse_args()
+
+    faults = DEFAULT_FAULTS
+    if args.faults:
+        with open(args.faults) as f:
+            faults = json.load(f)
+
+    output_csv = os.path.join(args.output_dir, os.path.basename(args.input_csv))
+    manifest = make_dirty_copy(
+        args.input_csv, output_csv, faults, seed=args.seed, block_size=args.block_size_mb * 1024 * 1024
+    )
+
+    # Keep the violation codes next to the dirty copy so the directory can be
+    # loaded with DuckdbUtils.load_csv_file_to_db()
+    codes_csv = os.path.join(os.path.dirname(args.input_csv), 'dof_parking_violation_codes.csv')
+    if os.path.exists(codes_csv):
+        shutil.copy(codes_csv, args.output_dir)
+
+    for fault in manifest['faults']:
+        print(f"{fault['type']}: {fault['injected']:,} injected")
+    print(f"{manifest['input_rows']:,} rows in, {manifest['output_rows']:,} rows out: {output_csv}")
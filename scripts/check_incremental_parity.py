@@ -0,0 +1,80 @@
+import subprocess
+
+import sys
+sys.path.append("..")
+
+from scripts.utils import DuckdbUtils
+
+INCREMENTAL_SILVER_MODELS = [
+    'silver_parking_violations',
+    'silver_violation_tickets',
+    'silver_valid_violation_tickets',
+    'silver_violation_vehicles',
+    'silver_valid_violation_ticket_facts',
+]
+
+
+def get_table_checksum(duckdb_utils, table_name):
+    """
+    Returns an order-independent (row_count, checksum) pair for a table by
+    summing the hash of every row, so two tables with the same rows compare
+    equal however they were built.
+    """
+    # The checksum is cast to text because a HUGEINT loses precision when it is
+    # converted to a NumPy float
+    result = duckdb_utils.run_sql_query(
+        f'SELECT COUNT(*) AS row_count, CAST(COALESCE(SUM(hash(t)::HUGEINT), 0) AS VARCHAR) AS checksum FROM {table_name} AS t',
+        output_format='numpy'
+    )
+    return int(result['row_count'][0]), int(result['checksum'][0])
+
+
+def check_incremental_parity(
+        models=INCREMENTAL_SILVER_MODELS,
+        project_dir='../nyc_parking_violations',
+        database_path='../data/nyc_parking_violations.db',
+        dbt_args=()
+        ):
+    """
+    Checks that the incremental silver models hold exactly what a full refresh
+    would build.
+
+    Runs the models incrementally, checksums them, rebuilds them with
+    `dbt run --full-refresh` and checksums them again. The full refresh is
+    left in place, so the warehouse is correct whatever the outcome.
+
+    Parameters:
+        models (list, optional): Incremental models to compare.
+        project_dir (str, optional): Path to the dbt project.
+        database_path (str, optional): Path to the DuckDB database file.
+        dbt_args (tuple, optional): Extra arguments passed to `dbt run`.
+
+    Returns:
+        dict: Model name to a dict with the incremental and full-refresh
+            (row_count, checksum) pairs and whether they match.
+    """
+    duckdb_utils = DuckdbUtils(database_path=database_path)
+    select = ['--select', *models]
+
+    subprocess.run(['dbt', 'run', *select, *dbt_args], cwd=project_dir, check=True)
+    incremental = {model: get_table_checksum(duckdb_utils, model) for model in models}
+
+    subprocess.run(['dbt', 'run', '--full-refresh', *select, *dbt_args], cwd=project_dir, check=True)
+    full_refresh = {model: get_table_checksum(duckdb_utils, model) for model in models}
+
+    results = {}
+    for model in models:
+        matches = incremental[model] == full_refresh[model]
+        results[model] = {
+            'incremental': incremental[model],
+            'full_refresh': full_refresh[model],
+            'matches': matches,
+        }
+        status = 'OK' if matches else 'MISMATCH'
+        print(f'{status}: {model} incremental={incremental[model]} full_refresh={full_refresh[model]}')
+    return results
+
+
+if __name__ == "__main__":
+    parity = check_incremental_parity(dbt_args=sys.argv[1:])
+    sys.exit(0 if all(result['matches'] for result in parity.values()) else 1)
@@ -0,0 +1,552 @@
+import argparse
+import glob
+import json
+import math
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+import sys
+sys.path.append("..")
+
+from scripts.utils import DuckdbUtils
+
+PROFILE_DIR = '../data/profiles'
+
+# HyperLogLog with 2^10 registers, about 3% standard error
+HLL_BUCKET_BITS = 10
+HLL_BUCKETS = 2 ** HLL_BUCKET_BITS
+# Each register is tracked as a 64 bit slot in a bitstring_agg() bitmap, so
+# registers from separate profiles merge by taking their maximum
+HLL_SLOT_BITS = 64
+
+NUMERIC_TYPES = ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'UTINYINT',
+                 'USMALLINT', 'UINTEGER', 'UBIGINT', 'FLOAT', 'DOUBLE', 'DECIMAL')
+
+
+def _json_value(value):
+    # Profiles are stored as JSON, so values are kept in a JSON friendly form
+    # from the start and merged in that form
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _hll_slot_expression(column):
+    # Slot of the HyperLogLog register a value falls into: the low bits of its
+    # hash pick the register, the position of the first set bit in the rest is
+    # the value recorded in it
+    hashed = f'hash({column})'
+    remaining_bits = 64 - HLL_BUCKET_BITS
+    rank = (
+        f'CASE WHEN ({hashed} >> {HLL_BUCKET_BITS}) = 0 THEN {remaining_bits + 1} '
+        f'ELSE {remaining_bits} - CAST(floor(log2(CAST({hashed} >> {HLL_BUCKET_BITS} AS DOUBLE))) AS INTEGER) END'
+    )
+    return (
+        f'CAST(({hashed} & {HLL_BUCKETS - 1}) * {HLL_SLOT_BITS} + '
+        f'least({HLL_SLOT_BITS - 1}, {rank}) AS BIGINT)'
+    )
+
+
+def _hll_registers(bitmap):
+    if bitmap is None:
+        return [0] * HLL_BUCKETS
+    registers = []
+    for bucket in range(HLL_BUCKETS):
+        slot = bitmap[bucket * HLL_SLOT_BITS:(bucket + 1) * HLL_SLOT_BITS]
+        # Slot bit n is set when a value of rank n was seen; ranks start at 1
+        registers.append(max(slot.rfind('1'), 0))
+    return registers
+
+
+def _hll_estimate(registers):
+    buckets = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / buckets)
+    estimate = alpha * buckets ** 2 / sum(2.0 ** -register for register in registers)
+    empty_buckets = registers.count(0)
+    if estimate <= 2.5 * buckets and empty_buckets:
+        # Linear counting is more accurate for small cardinalities
+        estimate = buckets * math.log(buckets / empty_buckets)
+    return round(estimate)
+
+
+def _finalize_column(column_profile, row_count, top_k, max_values):
+    # Recomputes the derived statistics from the mergeable ones
+    value_counts = sorted(column_profile['value_counts'], key=lambda item: (-item[1], str(item[0])))
+    column_profile['other_count'] += sum(count for _, count in value_counts[max_values:])
+    column_profile['value_counts'] = value_counts[:max_values]
+    column_profile['null_rate'] = column_profile['null_count'] / row_count if row_count else 0.0
+    column_profile['approx_distinct'] = _hll_estimate(column_profile['hll_registers'])
+    column_profile['top_values'] = column_profile['value_counts'][:top_k]
+    return column_profile
+
+
+def _empty_profile(table_name, columns, settings):
+    profile = {
+        'table': table_name,
+        'profiled_at': datetime.now().isoformat(timespec='seconds'),
+        'row_count': 0,
+        'settings': settings,
+        'columns': {},
+    }
+    for column in columns:
+        profile['columns'][column['column_name']] = _finalize_column({
+            'type': column['column_type'],
+            'null_count': 0,
+            'min': None,
+            'max': None,
+            'hll_registers': [0] * HLL_BUCKETS,
+            'value_counts': [],
+            'other_count': 0,
+            'histogram': [],
+            'bin_range': None,
+        }, 0, settings['top_k'], settings['max_values'])
+    return profile
+
+
+def _profile_segments(duckdb_utils, table_name, columns, settings, where=None, segment='false', bin_ranges=None):
+    # Profiles the rows matching `where`, grouped by the boolean `segment`
+    # expression, in two grouped queries: the first collects counts, min/max
+    # and HyperLogLog registers, the second the distributions, whose bin edges
+    # and exact or approximate value counts depend on the first. The
+    # approx_top_k candidates of high-cardinality columns are a separate scan
+    # within the second query; folding them into the first would run
+    # approx_top_k on every column, which costs more than the extra scan of
+    # the few columns that need it. Numeric columns get
+    # `bins` equal-width bins over [min, max] of all segments (or over
+    # `bin_ranges`, so they line up with a stored profile), dates get monthly
+    # counts. Columns with at most `max_values` distinct values get exact value
+    # counts; for the others only the approximate top-k values are counted, so
+    # high-cardinality columns never build an exact value map.
+    filter_clause = f'WHERE {where}' if where else ''
+    bin_ranges = bin_ranges or {}
+
+    statistics = ['COUNT(*) AS row_count']
+    for index, column in enumerate(columns):
+        name = column['column_name']
+        statistics += [
+            f'COUNT(*) - COUNT({name}) AS null_count_{index}',
+            f'MIN({name}) AS min_{index}',
+            f'MAX({name}) AS max_{index}',
+            f'CAST(bitstring_agg({_hll_slot_expression(name)}, 0, {HLL_BUCKETS * HLL_SLOT_BITS - 1}) '
+            f'FILTER (WHERE {name} IS NOT NULL) AS VARCHAR) AS hll_{index}',
+        ]
+    statistic_columns = ',\n        '.join(statistics)
+    statistic_rows = duckdb_utils.run_sql_query(f"""
+    SELECT
+        {segment} AS segment,
+        {statistic_columns}
+    FROM
+        {table_name}
+    {filter_clause}
+    GROUP BY ALL
+    """, output_format='arrow', label=f'profile:{table_name}').to_pylist()
+
+    distributions = []
+    candidates = []
+    column_kinds = {}
+    for index, column in enumerate(columns):
+        name = column['column_name']
+        data_type = column['column_type']
+        not_null = f'FILTER (WHERE {name} IS NOT NULL)'
+        if data_type.startswith(NUMERIC_TYPES):
+            minima = [_json_value(row[f'min_{index}']) for row in statistic_rows if row[f'min_{index}'] is not None]
+            maxima = [_json_value(row[f'max_{index}']) for row in statistic_rows if row[f'max_{index}'] is not None]
+            bin_range = bin_ranges.get(name) or ([min(minima), max(maxima)] if minima else None)
+            if bin_range is not None:
+                lower, upper = bin_range
+                width = (upper - lower) / settings['bins'] or 1
+                column_kinds[name] = ('bins', lower, width, upper)
+                distributions.append(
+                    f'histogram(least({settings["bins"] - 1}, greatest(0, '
+                    f'CAST(floor(({name} - {lower!r}) / {width!r}) AS INTEGER)))) {not_null} AS histogram_{index}'
+                )
+        elif data_type == 'DATE':
+            column_kinds[name] = ('months',)
+            distributions.append(f"histogram(strftime({name}, '%Y-%m')) {not_null} AS histogram_{index}")
+
+        if name in settings['key_columns']:
+            continue
+        registers = [
+            max(bucket) for bucket in zip(*(_hll_registers(row[f'hll_{index}']) for row in statistic_rows))
+        ] or [0] * HLL_BUCKETS
+        if _hll_estimate(registers) <= settings['max_values']:
+            distributions.append(f'histogram({name}) {not_null} AS value_counts_{index}')
+        else:
+            candidates.append(f'approx_top_k({name}, {settings["top_k"]}) AS top_{index}')
+            distributions.append(
+                f'histogram({name}) FILTER (WHERE list_contains(candidates.top_{index}, {name})) AS value_counts_{index}'
+            )
+
+    distribution_rows = {}
+    if distributions:
+        distribution_columns = ',\n        '.join(distributions)
+        candidate_columns = ',\n            '.join(candidates)
+        distribution_rows = {row['segment']: row for row in duckdb_utils.run_sql_query(f"""
+        {f'WITH candidates AS (SELECT {candidate_columns} FROM {table_name} {filter_clause})' if candidates else ''}
+        SELECT
+            {segment} AS segment,
+            {distribution_columns}
+        FROM
+            {table_name}{', candidates' if candidates else ''}
+        {filter_clause}
+        GROUP BY ALL
+        """, output_format='arrow', label=f'profile_distributions:{table_name}').to_pylist()}
+
+    segments = {}
+    for row in statistic_rows:
+        distribution_row = distribution_rows.get(row['segment'], {})
+        profile = _empty_profile(table_name, columns, settings)
+        profile['row_count'] = row['row_count']
+        for index, column in enumerate(columns):
+            name = column['column_name']
+            null_count = row[f'null_count_{index}']
+            value_counts = [[_json_value(value), count] for value, count in distribution_row.get(f'value_counts_{index}') or []]
+            histogram = []
+            kind = column_kinds.get(name)
+            counts = dict(distribution_row.get(f'histogram_{index}') or [])
+            if kind and kind[0] == 'bins':
+                _, lower, width, _ = kind
+                histogram = [
+                    {'lower': lower + bin_index * width, 'upper': lower + (bin_index + 1) * width,
+                     'count': counts.get(bin_index, 0)}
+                    for bin_index in range(settings['bins'])
+                ]
+            elif kind:
+                histogram = [{'month': month, 'count': counts[month]} for month in sorted(counts)]
+            profile['columns'][name] = _finalize_column({
+                'type': column['column_type'],
+                'null_count': null_count,
+                'min': _json_value(row[f'min_{index}']),
+                'max': _json_value(row[f'max_{index}']),
+                'hll_registers': _hll_registers(row[f'hll_{index}']),
+                'value_counts': value_counts,
+                # Non-null values not in value_counts (the tail of a
+                # high-cardinality column)
+                'other_count': row['row_count'] - null_count - sum(count for _, count in value_counts),
+                'histogram': histogram,
+                'bin_range': [kind[1], kind[3]] if kind and kind[0] == 'bins' else None,
+            }, row['row_count'], settings['top_k'], settings['max_values'])
+        segments[row['segment']] = profile
+    return segments
+
+
+def _frozen_before(duckdb_utils, table_name, settings):
+    # Rows issued before this date are no longer rewritten by incremental
+    # silver runs (see the `lookback_window` strategy), so their profile is
+    # kept and only newer rows are profiled again
+    where = settings.get('where')
+    result = duckdb_utils.run_sql_query(f"""
+    SELECT
+        CAST(MAX({settings['incremental_column']}) - INTERVAL '{int(settings['lookback_days'])} days' AS DATE) AS frozen_before
+    FROM
+        {table_name}
+    {f'WHERE {where}' if where else ''}
+    """, output_format='arrow').to_pylist()[0]['frozen_before']
+    return _json_value(result)
+
+
+def _with_frozen_segment(frozen_profile, recent_profile, frozen_before):
+    profile = merge_profiles(frozen_profile, recent_profile)
+    profile['frozen'] = {
+        'before': frozen_before,
+        'row_count': frozen_profile['row_count'],
+        'columns': frozen_profile['columns'],
+    }
+    return profile
+
+
+def profile_table(
+        duckdb_utils,
+        table_name,
+        where=None,
+        key_columns=('summons_number',),
+        incremental_column='issue_date',
+        lookback_days=3,
+        top_k=10,
+        bins=20,
+        max_values=1000
+        ):
+    """
+    Profiles every column of a table.
+
+    For each column this computes the null count and rate, min and max, an
+    approximate distinct count (HyperLogLog), the top-k values and a
+    histogram: equal-width bins for numeric columns and monthly counts for
+    dates, both computed in SQL. Value counts are exact for columns with up to
+    `max_values` distinct values; above that only the approximate top-k values
+    are counted. Key columns get no value counts because every value is
+    unique.
+
+    All stored statistics are mergeable (see `merge_profiles`). When the table
+    has a DATE `incremental_column`, the profile of the rows issued more than
+    `lookback_days` before the newest one is stored separately, so
+    `update_profile` only has to profile the newer rows again.
+
+    Parameters:
+        duckdb_utils (DuckdbUtils): Where to run the query.
+        table_name (str): Table to profile, e.g. "silver_violation_tickets".
+        where (str, optional): SQL predicate limiting the profiled rows.
+        key_columns (tuple, optional): Unique columns without value counts.
+        incremental_column (str, optional): DATE column that splits settled
+            rows from recent ones. Defaults to "issue_date".
+        lookback_days (int, optional): Days before the newest
+            `incremental_column` value that can still be rewritten. Matches
+            the `silver_lookback_days` dbt var by default.
+        top_k (int, optional): Number of most frequent values reported.
+        bins (int, optional): Number of bins in numeric histograms.
+        max_values (int, optional): Distinct values tracked per column.
+
+    Returns:
+        dict: The profile.
+
+    Example:
+        >>> profile = profile_table(DuckdbUtils(), "silver_valid_violation_tickets")
+        >>> profile["columns"]["violation_county"]["top_values"]
+    """
+    columns = duckdb_utils.run_sql_query(
+        f'DESCRIBE {table_name}', output_format='arrow'
+    ).select(['column_name', 'column_type']).to_pylist()
+    settings = {
+        'key_columns': list(key_columns), 'where': where, 'incremental_column': incremental_column,
+        'lookback_days': lookback_days, 'top_k': top_k, 'bins': bins, 'max_values': max_values,
+    }
+    empty_profile = _empty_profile(table_name, columns, settings)
+
+    column_types = {column['column_name']: column['column_type'] for column in columns}
+    frozen_before = None
+    if column_types.get(incremental_column) == 'DATE':
+        frozen_before = _frozen_before(duckdb_utils, table_name, settings)
+    if frozen_before is None:
+        segments = _profile_segments(duckdb_utils, table_name, columns, settings, where=where)
+        return segments.get(False, empty_profile)
+
+    segments = _profile_segments(
+        duckdb_utils, table_name, columns, settings, where=where,
+        segment=f"COALESCE({incremental_column} < DATE '{frozen_before}', false)"
+    )
+    return _with_frozen_segment(
+        segments.get(True, empty_profile), segments.get(False, empty_profile), frozen_before
+    )
+
+
+def _merge_histograms(histogram, appended_histogram):
+    buckets = {}
+    for bucket in histogram + appended_histogram:
+        key = json.dumps({name: value for name, value in bucket.items() if name != 'count'})
+        buckets.setdefault(key, dict(bucket, count=0))['count'] += bucket['count']
+    return sorted(buckets.values(), key=lambda bucket: bucket.get('month', bucket.get('lower')))
+
+
+def merge_profiles(profile, appended_profile):
+    """
+    Combines the profiles of two disjoint sets of rows of a table, as if they
+    had been profiled together.
+
+    Counts, min/max, HyperLogLog registers, monthly counts and exact value
+    counts merge exactly, and numeric bins do when both profiles use the same
+    bin range. Value counts of high-cardinality columns (and so their top-k)
+    are approximate.
+
+    Returns:
+        dict: The merged profile.
+    """
+    settings = profile['settings']
+    row_count = profile['row_count'] + appended_profile['row_count']
+    merged = dict(profile, profiled_at=appended_profile['profiled_at'], row_count=row_count, columns={})
+    merged.pop('frozen', None)
+    for name, column_profile in profile['columns'].items():
+        appended = appended_profile['columns'].get(name)
+        if appended is None:
+            merged['columns'][name] = column_profile
+            continue
+        value_counts = dict((json.dumps(value), [value, count]) for value, count in column_profile['value_counts'])
+        for value, count in appended['value_counts']:
+            value_counts.setdefault(json.dumps(value), [value, 0])[1] += count
+        extremes = [value for value in (column_profile['min'], appended['min']) if value is not None]
+        maxima = [value for value in (column_profile['max'], appended['max']) if value is not None]
+        merged['columns'][name] = _finalize_column({
+            'type': column_profile['type'],
+            'null_count': column_profile['null_count'] + appended['null_count'],
+            'min': min(extremes) if extremes else None,
+            'max': max(maxima) if maxima else None,
+            'hll_registers': [
+                max(registers) for registers in zip(column_profile['hll_registers'], appended['hll_registers'])
+            ],
+            'value_counts': list(value_counts.values()),
+            'other_count': column_profile['other_count'] + appended['other_count'],
+            'histogram': _merge_histograms(column_profile['histogram'], appended['histogram']),
+            'bin_range': column_profile.get('bin_range') or appended.get('bin_range'),
+        }, row_count, settings['top_k'], settings['max_values'])
+    return merged
+
+
+def update_profile(duckdb_utils, profile):
+    """
+    Brings a stored profile up to date by profiling only the rows that are
+    not part of its settled segment, i.e. rows whose `incremental_column` is
+    within `lookback_days` of the newest value at the time of the profile,
+    newer rows and rows where it is NULL.
+
+    The settled segment mirrors the `lookback_window` incremental strategy of
+    the silver models, which only rewrites rows inside that window, so late
+    tickets with an older issue_date in the window are picked up too. Falls
+    back to a full `profile_table` when the table has no such column, when
+    the newest date moved backwards (rows were deleted) or when new values
+    fall outside the stored numeric bin ranges.
+
+    Returns:
+        dict: The updated profile.
+    """
+    settings = profile['settings']
+    full_profile_arguments = {
+        name: settings[name] for name in
+        ('where', 'incremental_column', 'lookback_days', 'top_k', 'bins', 'max_values')
+    }
+    full_profile_arguments['key_columns'] = tuple(settings['key_columns'])
+    frozen = profile.get('frozen')
+    if frozen is None:
+        return profile_table(duckdb_utils, profile['table'], **full_profile_arguments)
+
+    frozen_before = _frozen_before(duckdb_utils, profile['table'], settings)
+    if frozen_before is None or frozen_before < frozen['before']:
+        return profile_table(duckdb_utils, profile['table'], **full_profile_arguments)
+
+    columns = [{'column_name': name, 'column_type': column['type']} for name, column in profile['columns'].items()]
+    bin_ranges = {name: column['bin_range'] for name, column in profile['columns'].items() if column.get('bin_range')}
+    incremental_column = settings['incremental_column']
+    where = f"NOT COALESCE({incremental_column} < DATE '{frozen['before']}', false)"
+    if settings.get('where'):
+        where = f"({settings['where']}) AND {where}"
+    segments = _profile_segments(
+        duckdb_utils, profile['table'], columns, settings, where=where,
+        segment=f"COALESCE({incremental_column} < DATE '{frozen_before}', false)",
+        bin_ranges=bin_ranges
+    )
+    for segment in segments.values():
+        for name, column in segment['columns'].items():
+            if column['type'].startswith(NUMERIC_TYPES) and column['min'] is not None and (
+                    name not in bin_ranges
+                    or column['min'] < bin_ranges[name][0]
+                    or column['max'] > bin_ranges[name][1]):
+                return profile_table(duckdb_utils, profile['table'], **full_profile_arguments)
+
+    empty_profile = _empty_profile(profile['table'], columns, settings)
+    frozen_profile = merge_profiles(
+        dict(profile, row_count=frozen['row_count'], columns=frozen['columns']),
+        segments.get(True, empty_profile)
+    )
+    return _with_frozen_segment(frozen_profile, segments.get(False, empty_profile), frozen_before)
+
+
+def save_profile(profile, profile_dir=PROFILE_DIR):
+    """
+    Stores a profile as JSON under <profile_dir>/<table>/ and returns its path.
+    """
+    table_dir = os.path.join(profile_dir, profile['table'])
+    os.makedirs(table_dir, exist_ok=True)
+    path = os.path.join(table_dir, f"{datetime.now():%Y%m%dT%H%M%S%f}.json")
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+
+def list_profiles(table_name, profile_dir=PROFILE_DIR):
+    """
+    Returns the paths of the stored profiles of a table, oldest first.
+    """
+    return sorted(glob.glob(os.path.join(profile_dir, table_name, '*.json')))
+
+
+def load_profile(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def diff_profiles(old_profile, new_profile, share_threshold=0.01, distinct_threshold=0.1):
+    """
+    Compares two profiles of a table and returns what changed per column:
+    values that appeared or disappeared (e.g. a new spelling of a county, or
+    precinct 0 vanishing), value shares that moved by more than
+    `share_threshold`, null rate changes, new min/max values and distinct
+    counts that moved by more than `distinct_threshold` (relative).
+
+    Returns:
+        list: One dict per finding with column, change and details.
+    """
+    findings = []
+    for name, new_column in new_profile['columns'].items():
+        old_column = old_profile['columns'].get(name)
+        if old_column is None:
+            findings.append({'column': name, 'change': 'column_added'})
+            continue
+
+        old_counts = {json.dumps(value): count for value, count in old_column['value_counts']}
+        new_counts = {json.dumps(value): count for value, count in new_column['value_counts']}
+        old_total = old_profile['row_count'] or 1
+        new_total = new_profile['row_count'] or 1
+        # Values that fell out of the tracked top values are not reported as
+        # missing, only values that are tracked exactly in both profiles
+        old_complete = old_column['other_count'] == 0
+        new_complete = new_column['other_count'] == 0
+
+        for value in sorted(set(new_counts) - set(old_counts)):
+            if old_complete:
+                findings.append({'column': name, 'change': 'value_added', 'value': json.loads(value),
+                                 'count': new_counts[value]})
+        for value in sorted(set(old_counts) - set(new_counts)):
+            if new_complete:
+                findings.append({'column': name, 'change': 'value_removed', 'value': json.loads(value),
+                                 'count': old_counts[value]})
+        for value in sorted(set(old_counts) & set(new_counts)):
+            old_share = old_counts[value] / old_total
+            new_share = new_counts[value] / new_total
+            if abs(new_share - old_share) > share_threshold:
+                findings.append({'column': name, 'change': 'share_changed', 'value': json.loads(value),
+                                 'old_share': round(old_share, 4), 'new_share': round(new_share, 4)})
+
+        if abs(new_column['null_rate'] - old_column['null_rate']) > share_threshold:
+            findings.append({'column': name, 'change': 'null_rate_changed',
+                             'old': round(old_column['null_rate'], 4), 'new': round(new_column['null_rate'], 4)})
+        for statistic in ('min', 'max'):
+            if new_column[statistic] != old_column[statistic]:
+                findings.append({'column': name, 'change': f'{statistic}_changed',
+                                 'old': old_column[statistic], 'new': new_column[statistic]})
+        old_distinct = old_column['approx_distinct'] or 1
+        if abs(new_column['approx_distinct'] - old_column['approx_distinct']) / old_distinct > distinct_threshold:
+            findings.append({'column': name, 'change': 'distinct_changed',
+                             'old': old_column['approx_distinct'], 'new': new_column['approx_distinct']})
+
+    for name in old_profile['columns'].keys() - new_profile['columns'].keys():
+        findings.append({'column': name, 'change': 'column_removed'})
+    return findings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Profile a table, store the profile and print what changed since the last one.'
+    )
+    parser.add_argument('table_name')
+    parser.add_argument('--full', action='store_true',
+                        help='Profile the whole table instead of updating the latest profile.')
+    parser.add_argument('--lookback-days', type=int, default=3,
+                        help='Days before the newest issue_date that can still be rewritten (silver_lookback_days).')
+    parser.add_argument('--profile-dir', default=PROFILE_DIR)
+    parser.add_argument('--database-path', default='../data/nyc_parking_violations.db')
+    args = parser.parse_args()
+
+    duckdb_utils = DuckdbUtils(database_path=args.database_path)
+    previous_paths = list_profiles(args.table_name, args.profile_dir)
+    previous_profile = load_profile(previous_paths[-1]) if previous_paths else None
+
+    if previous_profile is None or args.full:
+        profile = profile_table(duckdb_utils, args.table_name, lookback_days=args.lookback_days)
+    else:
+        profile = update_profile(duckdb_utils, previous_profile)
+    print(save_profile(profile, args.profile_dir))
+
+    if previous_profile is not None:
+        for finding in diff_profiles(previous_profile, profile):
+            print(json.dumps(finding, default=str))
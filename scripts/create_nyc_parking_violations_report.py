@@ -1,13 +1,55 @@
-import matplotlib.colors as colors
-import matplotlib.pyplot as plt
-import numpy as np
-import seaborn as sns
+import argparse
+import importlib
+import inspect
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 
 import sys
 sys.path.append("..")
 
+from scripts.render_cache import FigureRenderCache
 from scripts.utils import DuckdbUtils
-duckdb_utils = DuckdbUtils()
+
+
+class _LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access, so that
+    importing this file does not pay for the plotting stack until a chart is
+    actually drawn.
+    """
+    def __init__(self, module_name):
+        self._module_name = module_name
+
+    def __getattr__(self, name):
+        return getattr(importlib.import_module(self._module_name), name)
+
+
+colors = _LazyModule('matplotlib.colors')
+plt = _LazyModule('matplotlib.pyplot')
+np = _LazyModule('numpy')
+sns = _LazyModule('seaborn')
+
+_duckdb_utils = None
+
+
+def get_duckdb_utils():
+    """
+    Returns the DuckdbUtils shared by the report, creating it on first use.
+    """
+    global _duckdb_utils
+    if _duckdb_utils is None:
+        _duckdb_utils = DuckdbUtils()
+    return _duckdb_utils
+
+
+def __getattr__(name):
+    # Keeps `from scripts.create_nyc_parking_violations_report import
+    # duckdb_utils` working without building it at import time
+    if name == 'duckdb_utils':
+        return get_duckdb_utils()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class NYC_Parking_Violations_Report:
@@ -30,12 +72,50 @@ class NYC_Parking_Violations_Report:
     
     Each metric is generated independently through dedicated methods and can be 
     combined into a comprehensive report using the create_report() method.
+    Passing concurrent=True to create_report() fetches the data for every metric
+    in parallel first and then renders the charts in their usual order.
+
+    Outside a notebook, export_report() renders every metric headless (Agg
+    backend) in a process pool and writes one image per metric plus a combined
+    PDF. The module can also be run as a script to do the same, e.g. from cron:
+        python -m scripts.create_nyc_parking_violations_report --output-dir reports
     
     The class uses matplotlib and seaborn for visualizations and depends on 
-    a utility function 'duckdb_utils.run_sql_query_and_return_df' to fetch data from the
-    database.
+    a utility function 'duckdb_utils.run_sql_query' to fetch data from the
+    database. The plotting libraries and the DuckdbUtils instance are only
+    loaded on first use, so importing the module stays cheap. Pass
+    `duckdb_utils` to query another warehouse without changing the instance
+    shared by the module.
     """
-    def __init__(self):
+    METRIC_NAMES = [f'metric_{letter}' for letter in 'abcdefghijklm']
+
+    # Cheapest result format each metric can render from (see
+    # DuckdbUtils.run_sql_query); metrics not listed use NumPy-backed pandas
+    # because their charts do arithmetic on the values or feed them to
+    # seaborn's heatmaps, which need plain numeric dtypes.
+    METRIC_OUTPUT_FORMATS = {
+        'metric_a': 'pandas_arrow',
+        'metric_b': 'pandas_arrow',
+        'metric_c': 'pandas_arrow',
+        'metric_d': 'pandas_arrow',
+        'metric_e': 'pandas_arrow',
+        'metric_f': 'numpy',
+        'metric_h': 'pandas_arrow',
+        'metric_i': 'pandas_arrow',
+    }
+
+    def __init__(self, headless=False, duckdb_utils=None):
+        # When headless, figures are left open for the caller to save instead
+        # of being shown, and Metric A is drawn as a table figure
+        self.headless = headless
+
+        # DuckdbUtils the metric queries run on; the module's shared one
+        # (get_duckdb_utils()) when not given
+        self.duckdb_utils = duckdb_utils
+
+        # Results fetched ahead of rendering by fetch_metric_data()
+        self.prefetched_metric_data = {}
+
         self.metric_a_title = 'Metric A: 10 Latest Tickets'
         self.metric_a = 'SELECT * FROM gold_latest_tickets_90_days LIMIT 10'
 
@@ -75,13 +155,62 @@ class NYC_Parking_Violations_Report:
         self.metric_m_title = 'Metric M: Violation Heatmap by Day of Week'
         self.metric_m = 'SELECT * FROM gold_2023_violations_day_of_week_heatmap'
 
+    def _get_duckdb_utils(self):
+        if self.duckdb_utils is None:
+            return get_duckdb_utils()
+        return self.duckdb_utils
+
+    def run_metric_query(self, metric_name):
+        # Use data fetched ahead of time by fetch_metric_data() when available
+        if metric_name in self.prefetched_metric_data:
+            return self.prefetched_metric_data.pop(metric_name)
+        return self._get_duckdb_utils().run_sql_query(
+            getattr(self, metric_name),
+            output_format=self.METRIC_OUTPUT_FORMATS.get(metric_name, 'pandas'),
+            label=metric_name
+        )
+
+    def fetch_metric_data(self, max_workers=None):
+        """
+        Runs the queries for all metrics concurrently and keeps the results so
+        the create_metric_* methods render from them instead of querying.
+        """
+        self.prefetched_metric_data = self._get_duckdb_utils().run_sql_queries_and_return_dfs(
+            {metric_name: getattr(self, metric_name) for metric_name in self.METRIC_NAMES},
+            max_workers=max_workers,
+            output_formats=self.METRIC_OUTPUT_FORMATS
+        )
+        return self.prefetched_metric_data
+
+    def show_figure(self):
+        if not self.headless:
+            plt.show()
+
     def create_metric_a(self):
-        df = duckdb_utils.run_sql_query_and_return_df(self.metric_a)
-        print('Metric A: Ten Latest Tickets')
-        display(df)
+        df = self.run_metric_query('metric_a')
+
+        if not self.headless:
+            print('Metric A: Ten Latest Tickets')
+            display(df)
+            return
+
+        # Without a notebook to display the DataFrame, draw it as a table
+        fig, ax = plt.subplots(figsize=(24, 3))
+        ax.axis('off')
+        table = ax.table(
+            cellText=df.astype(str).values,
+            colLabels=df.columns,
+            loc='center',
+            cellLoc='center'
+        )
+        table.auto_set_font_size(False)
+        table.set_fontsize(9)
+        table.auto_set_column_width(list(range(len(df.columns))))
+        ax.set_title(self.metric_a_title, fontsize=16)
+        plt.tight_layout()
 
     def create_metric_b(self):
-        county_data = duckdb_utils.run_sql_query_and_return_df(self.metric_b)
+        county_data = self.run_metric_query('metric_b')
         plt.figure(figsize=(12, 8))
 
         ax = sns.barplot(
@@ -104,10 +233,10 @@ class NYC_Parking_Violations_Report:
         plt.grid(axis='x', alpha=0.3)
         plt.tight_layout(rect=[0, 0, 1, 0.96])
 
-        plt.show()
+        self.show_figure()
 
     def create_metric_c(self):
-        violation_data = duckdb_utils.run_sql_query_and_return_df(self.metric_c)
+        violation_data = self.run_metric_query('metric_c')
 
         plt.figure(figsize=(14, 10))
         ax = sns.barplot(
@@ -136,11 +265,11 @@ class NYC_Parking_Violations_Report:
         plt.tight_layout(rect=[0, 0, 1, 0.96])
 
         # Show the plot
-        plt.show()
+        self.show_figure()
 
     def create_metric_d(self):
         # Run the SQL query to get the data
-        agency_data = duckdb_utils.run_sql_query_and_return_df(self.metric_d)
+        agency_data = self.run_metric_query('metric_d')
 
         # Set the figure size for better visualization
         plt.figure(figsize=(12, 8))
@@ -173,11 +302,11 @@ class NYC_Parking_Violations_Report:
         plt.tight_layout(rect=[0, 0, 1, 0.96])
 
         # Show the plot
-        plt.show()
+        self.show_figure()
 
     def create_metric_e(self):
         # Run the SQL query to get the data
-        vehicle_data = duckdb_utils.run_sql_query_and_return_df(self.metric_e)
+        vehicle_data = self.run_metric_query('metric_e')
 
         # Set the figure size for better visualization
         plt.figure(figsize=(14, 9))
@@ -216,14 +345,17 @@ class NYC_Parking_Violations_Report:
         plt.tight_layout(rect=[0, 0, 1, 0.96])
 
         # Show the plot
-        plt.show()
+        self.show_figure()
 
     def create_metric_f(self):
         # Run the SQL query to get the data
-        fees_data = duckdb_utils.run_sql_query_and_return_df(self.metric_f)
+        fees_data = self.run_metric_query('metric_f')
 
-        # Extract the total fee value
-        total_fees = fees_data['total_fees_90_days'].iloc[0]
+        # Extract the total fee value. The SUM is NULL when the window holds no
+        # tickets, which the "numpy" format returns as a masked value
+        total_fees = fees_data['total_fees_90_days'][0]
+        if np.ma.is_masked(total_fees):
+            total_fees = 0
 
         # Format the number with commas and dollar sign
         formatted_fees = f"${total_fees:,.2f}"
@@ -263,11 +395,11 @@ class NYC_Parking_Violations_Report:
         fig.patch.set_facecolor('white')
 
         plt.tight_layout()
-        plt.show()
+        self.show_figure()
 
     def create_metric_g(self):
         # Run the SQL query to get the data for Metric G
-        precinct_fees_data = duckdb_utils.run_sql_query_and_return_df(self.metric_g)
+        precinct_fees_data = self.run_metric_query('metric_g')
 
         # Find the appropriate columns
         fee_column = None
@@ -342,11 +474,11 @@ class NYC_Parking_Violations_Report:
         plt.tight_layout(rect=[0, 0, 1, 0.96])
 
         # Show the plot
-        plt.show()
+        self.show_figure()
 
     def create_metric_h(self):
         # Run the SQL query to get the data
-        monthly_data = duckdb_utils.run_sql_query_and_return_df(self.metric_h)
+        monthly_data = self.run_metric_query('metric_h')
 
         # Sort the data chronologically
         monthly_data = monthly_data.sort_values('year_month')
@@ -401,11 +533,11 @@ class NYC_Parking_Violations_Report:
         plt.tight_layout()
 
         # Show the plot
-        plt.show()
+        self.show_figure()
 
     def create_metric_i(self):
         # Run the SQL query to get the data - making sure to filter out 2023-W52
-        weekly_data = duckdb_utils.run_sql_query_and_return_df(self.metric_i)
+        weekly_data = self.run_metric_query('metric_i')
 
         # Sort the data chronologically by year_week
         weekly_data = weekly_data.sort_values('year_week')
@@ -492,11 +624,11 @@ class NYC_Parking_Violations_Report:
         plt.subplots_adjust(top=0.95)
 
         # Show the plot
-        plt.show()
+        self.show_figure()
 
     def create_metric_j(self):
         # Run the filtered SQL query to get the data
-        agency_fee_data = duckdb_utils.run_sql_query_and_return_df(self.metric_j)
+        agency_fee_data = self.run_metric_query('metric_j')
 
         # Sort the data by total fees (descending)
         agency_fee_data = agency_fee_data.sort_values('total_ticket_fees_usd', ascending=False)
@@ -542,11 +674,11 @@ class NYC_Parking_Violations_Report:
         plt.subplots_adjust(right=0.75)
 
         # Show the plot
-        plt.show()
+        self.show_figure()
 
     def create_metric_k(self):
         # Run the SQL query to get the data
-        weekly_violation_data = duckdb_utils.run_sql_query_and_return_df(self.metric_k)
+        weekly_violation_data = self.run_metric_query('metric_k')
 
         # Extract the day columns
         day_columns = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
@@ -587,11 +719,11 @@ class NYC_Parking_Violations_Report:
         plt.tight_layout()
 
         # Show the plot
-        plt.show()
+        self.show_figure()
 
     def create_metric_l(self):
         # Run the SQL query to get the data
-        county_violation_data = duckdb_utils.run_sql_query_and_return_df(self.metric_l)
+        county_violation_data = self.run_metric_query('metric_l')
 
         # Extract the day columns
         day_columns = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
@@ -644,11 +776,11 @@ class NYC_Parking_Violations_Report:
 
         # Show the plot
         plt.tight_layout()
-        plt.show()
+        self.show_figure()
 
     def create_metric_m(self):
         # Run the SQL query to get the data
-        violation_day_data = duckdb_utils.run_sql_query_and_return_df(self.metric_m)
+        violation_day_data = self.run_metric_query('metric_m')
 
         # Extract the day columns
         day_columns = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
@@ -713,9 +845,12 @@ class NYC_Parking_Violations_Report:
 
         # Show the plot
         plt.tight_layout()
-        plt.show()
+        self.show_figure()
+
+    def create_report(self, concurrent=False):
+        if concurrent:
+            self.fetch_metric_data()
 
-    def create_report(self):
         self.create_metric_a()
         self.create_metric_b()
         self.create_metric_c()
@@ -730,6 +865,190 @@ class NYC_Parking_Violations_Report:
         self.create_metric_l()
         self.create_metric_m()
 
+    def export_report(self, output_dir, formats=('png',), pdf=True, max_workers=None, dpi=150,
+                      render_cache=None):
+        """
+        Renders every metric without a notebook and writes one file per metric
+        and format (e.g. metric_k.png) plus a combined PDF.
+
+        The metric data is fetched concurrently first, then the figures are
+        rendered in a process pool on the Agg backend so the heavy heatmaps
+        (Metrics K, L and M) render on separate cores. The combined PDF is
+        assembled from the PNG renders, one page per metric in report order.
+
+        With a FigureRenderCache, metrics whose data and drawing code are
+        unchanged since an earlier export are copied from the cache instead of
+        being redrawn, so only the charts whose inputs changed cost a render.
+
+        Parameters:
+            output_dir (str): Directory to write the files to.
+            formats (tuple, optional): Image formats to write per metric, e.g.
+                ('png', 'svg'). PNG is always written when pdf is True.
+            pdf (bool, optional): Whether to write the combined PDF.
+            max_workers (int, optional): Number of rendering processes.
+                Defaults to the number of CPUs.
+            dpi (int, optional): Resolution of raster outputs.
+            render_cache (FigureRenderCache, optional): Cache of earlier renders.
+
+        Returns:
+            list: Paths of the files written.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        formats = tuple(formats)
+        if pdf and 'png' not in formats:
+            formats = ('png',) + formats
+
+        metric_data = self.fetch_metric_data()
+        self.prefetched_metric_data = {}
+
+        written_files = []
+        cache_keys = {}
+        metrics_to_render = []
+        for metric_name in self.METRIC_NAMES:
+            if render_cache is None:
+                metrics_to_render.append(metric_name)
+                continue
+            cache_keys[metric_name] = self.get_render_cache_key(
+                render_cache, metric_name, metric_data[metric_name], formats, dpi
+            )
+            cached_paths = [
+                render_cache.get(cache_keys[metric_name], file_format) for file_format in formats
+            ]
+            if None in cached_paths:
+                metrics_to_render.append(metric_name)
+                continue
+            for file_format, cached_path in zip(formats, cached_paths):
+                path = os.path.join(output_dir, f'{metric_name}.{file_format}')
+                shutil.copyfile(cached_path, path)
+                written_files.append(path)
+
+        if metrics_to_render:
+            # Spawned rather than forked: by now this process runs the fetch
+            # threads and holds DuckDB connections, and forking a
+            # multi-threaded process can deadlock the children
+            with ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                    ) as executor:
+                futures = {
+                    metric_name: executor.submit(
+                        render_metric_to_files,
+                        metric_name,
+                        metric_data[metric_name],
+                        output_dir,
+                        formats,
+                        dpi
+                    )
+                    for metric_name in metrics_to_render
+                }
+                for metric_name, future in futures.items():
+                    paths = future.result()
+                    written_files.extend(paths)
+                    if render_cache is not None:
+                        for file_format, path in zip(formats, paths):
+                            render_cache.put(cache_keys[metric_name], file_format, path)
+
+        if pdf:
+            from matplotlib.backends.backend_pdf import PdfPages
+            pdf_path = os.path.join(output_dir, 'NYC_Parking_Violations_Report.pdf')
+            with PdfPages(pdf_path) as pdf_pages:
+                for metric_name in self.METRIC_NAMES:
+                    image = plt.imread(os.path.join(output_dir, f'{metric_name}.png'))
+                    height, width = image.shape[:2]
+                    fig = plt.figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+                    fig.figimage(image, resize=False)
+                    pdf_pages.savefig(fig, dpi=dpi)
+                    plt.close(fig)
+            written_files.append(pdf_path)
+
+        return written_files
+
+    def get_render_cache_key(self, render_cache, metric_name, data, formats, dpi):
+        """
+        Returns the render cache key of a metric: its result data plus its
+        title and the source of the method that draws it, so editing a chart
+        also invalidates its cached images.
+        """
+        create_method = getattr(self, f'create_{metric_name}')
+        return render_cache.fingerprint(data, {
+            'metric_name': metric_name,
+            'title': getattr(self, f'{metric_name}_title'),
+            'source': inspect.getsource(create_method),
+            'formats': formats,
+            'dpi': dpi,
+        })
+
+
+def render_metric_to_files(metric_name, data, output_dir, formats, dpi):
+    """
+    Renders a single metric headless from already fetched data and saves it in
+    each format. Runs in the export_report() worker processes.
+    """
+    plt.switch_backend('Agg')
+    report = NYC_Parking_Violations_Report(headless=True)
+    report.prefetched_metric_data = {metric_name: data}
+    getattr(report, f'create_{metric_name}')()
+
+    fig = plt.gcf()
+    paths = []
+    for file_format in formats:
+        path = os.path.join(output_dir, f'{metric_name}.{file_format}')
+        fig.savefig(path, format=file_format, dpi=dpi, bbox_inches='tight')
+        paths.append(path)
+    plt.close('all')
+    return paths
+
 
 if __name__ == "__main__":
-    None
+    parser = argparse.ArgumentParser(
+        description='Render the NYC Parking Violations Report to image files and a PDF.'
+    )
+    parser.add_argument('--output-dir', required=True)
+    parser.add_argument('--database-path', default='data/nyc_parking_violations.db')
+    parser.add_argument('--formats', nargs='+', default=['png'])
+    parser.add_argument('--no-pdf', action='store_true')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--snapshot-dir', default=None,
+                        help='Read the current published snapshot instead of the database file.')
+    parser.add_argument('--render-cache-dir', default=None)
+    parser.add_argument('--render-cache-max-mb', type=int, default=512)
+    parser.add_argument('--query-log', default=None,
+                        help='Write per-query timings to this JSON file.')
+    parser.add_argument('--query-metrics', default=None,
+                        help='Write a Prometheus text snapshot of query metrics to this file.')
+    parser.add_argument('--explain-analyze-threshold', type=float, default=None,
+                        help='Capture EXPLAIN ANALYZE for queries slower than this many seconds.')
+    args = parser.parse_args()
+
+    plt.switch_backend('Agg')
+    # Built here with the command line options, before get_duckdb_utils()
+    # would create a default one
+    _duckdb_utils = duckdb_utils = DuckdbUtils(
+        database_path=args.database_path,
+        snapshot_dir=args.snapshot_dir,
+        query_log_max_entries=10_000 if args.query_log or args.query_metrics else 0,
+        explain_analyze_threshold_seconds=args.explain_analyze_threshold
+    )
+    render_cache = None
+    if args.render_cache_dir:
+        render_cache = FigureRenderCache(
+            args.render_cache_dir, max_bytes=args.render_cache_max_mb * 1024 * 1024
+        )
+    written_files = NYC_Parking_Violations_Report(headless=True).export_report(
+        args.output_dir,
+        formats=args.formats,
+        pdf=not args.no_pdf,
+        max_workers=args.workers,
+        dpi=args.dpi,
+        render_cache=render_cache
+    )
+    for path in written_files:
+        print(path)
+    if render_cache is not None:
+        print(render_cache.stats())
+    if args.query_log:
+        duckdb_utils.query_log.write_json(args.query_log)
+    if args.query_metrics:
+        with open(args.query_metrics, 'w') as f:
+            f.write(duckdb_utils.query_log.prometheus_text())
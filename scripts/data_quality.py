@@ -0,0 +1,146 @@
+import json
+import os
+import subprocess
+
+import sys
+sys.path.append("..")
+
+from scripts.utils import DuckdbUtils
+
+DBT_PROJECT_DIR = '../nyc_parking_violations'
+SCHEMA_PATH = os.path.join(DBT_PROJECT_DIR, 'models', 'docs', 'schema.yml')
+
+RULE_TYPES = ('accepted_values', 'rejected_values', 'must_exist', 'range', 'null_rate')
+
+
+def load_rules_from_schema(schema_path=SCHEMA_PATH):
+    """
+    Reads the data quality rules declared in the dbt schema.yml, so the dbt
+    test and the standalone checks share one definition.
+
+    Rules are declared as a `data_quality_rules` test on a model, e.g.
+
+        tests:
+          - data_quality_rules:
+              rules:
+                - name: valid_issuing_agency_values
+                  type: rejected_values
+                  column: issuing_agency
+                  values: ['XYZ']
+
+    Parameters:
+        schema_path (str, optional): Path to the dbt schema.yml.
+
+    Returns:
+        dict: Model name to a dict with its `rules`, `sample_size` and
+            `severity`.
+    """
+    import yaml
+
+    with open(schema_path) as f:
+        schema = yaml.safe_load(f)
+
+    checks = {}
+    for model in schema.get('models', []):
+        for test in model.get('tests', []) or model.get('data_tests', []):
+            if not isinstance(test, dict) or 'data_quality_rules' not in test:
+                continue
+            test_arguments = test['data_quality_rules']
+            checks[model['name']] = {
+                'rules': test_arguments['rules'],
+                'sample_size': test_arguments.get('sample_size', 100),
+                'severity': test_arguments.get('config', {}).get('severity', 'error'),
+            }
+    return checks
+
+
+def build_data_quality_query(table_name, rules, sample_size=100, project_dir=DBT_PROJECT_DIR, dbt_args=()):
+    """
+    Builds one query that evaluates every rule against `table_name` in a single
+    scan and returns one row per rule.
+
+    The SQL is rendered by the `data_quality_scan` dbt macro through
+    `dbt compile --inline`, so the standalone checks and the dbt test always
+    run the same query.
+
+    Parameters:
+        table_name (str): Table or view to check.
+        rules (list): Rule dicts with `name`, `type` and `column`, plus
+            `values` (accepted_values, rejected_values), `value` (must_exist),
+            `min`/`max` (range) or `max_null_rate` (null_rate).
+        sample_size (int, optional): Failing rows kept per rule.
+        project_dir (str, optional): Path to the dbt project.
+        dbt_args (tuple, optional): Extra arguments passed to `dbt compile`,
+            e.g. `('--target', 'prod')`.
+
+    Returns:
+        str: The SQL query.
+    """
+    for rule in rules:
+        if rule.get('type') not in RULE_TYPES:
+            raise ValueError(f"Unknown rule type '{rule.get('type')}', expected one of {RULE_TYPES}")
+
+    inline_sql = f"{{{{ data_quality_scan({json.dumps(table_name)}, var('data_quality_rules'), {int(sample_size)}) }}}}"
+    command = [
+        'dbt', 'compile', '--quiet', '--output', 'json',
+        '--inline', inline_sql,
+        '--vars', json.dumps({'data_quality_rules': rules}),
+        *dbt_args
+    ]
+    completed = subprocess.run(command, cwd=project_dir, capture_output=True, text=True)
+    if completed.returncode != 0:
+        print(f"Error compiling data quality rules for {table_name}: {completed.stdout}{completed.stderr}")
+        raise RuntimeError(f"dbt compile failed for the data quality rules of {table_name}")
+    return json.loads(completed.stdout)['compiled']
+
+
+def run_data_quality_checks(duckdb_utils, table_name, rules, sample_size=100):
+    """
+    Evaluates the rules against a table in one scan and returns per-rule
+    results, with failing row samples parsed from JSON.
+
+    Parameters:
+        duckdb_utils (DuckdbUtils): Where to run the query.
+        table_name (str): Table or view to check.
+        rules (list): See `build_data_quality_query`.
+        sample_size (int, optional): Failing rows kept per rule.
+
+    Returns:
+        list: One dict per rule with rule_name, rule_type, column_name,
+            status, failing_rows, row_count and sample_failing_rows.
+
+    Example:
+        >>> checks = load_rules_from_schema()
+        >>> results = run_data_quality_checks(
+        ...     DuckdbUtils(),
+        ...     "silver_valid_violation_tickets",
+        ...     checks["silver_valid_violation_tickets"]["rules"]
+        ... )
+    """
+    result = duckdb_utils.run_sql_query(
+        build_data_quality_query(table_name, rules, sample_size),
+        output_format='numpy',
+        label=f'data_quality:{table_name}'
+    )
+    results = []
+    for index in range(len(result['rule_name'])):
+        row = {name: column[index] for name, column in result.items()}
+        row['failing_rows'] = int(row['failing_rows'])
+        row['row_count'] = int(row['row_count'])
+        row['sample_failing_rows'] = json.loads(row['sample_failing_rows'])
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    duckdb_utils = DuckdbUtils()
+    has_errors = False
+    for table_name, check in load_rules_from_schema().items():
+        for result in run_data_quality_checks(duckdb_utils, table_name, check['rules'], check['sample_size']):
+            print(
+                f"{result['status'].upper()}: {table_name}.{result['rule_name']} "
+                f"({result['failing_rows']} of {result['row_count']} rows)"
+            )
+            if result['status'] == 'fail' and check['severity'] == 'error':
+                has_errors = True
+    sys.exit(1 if has_errors else 0)
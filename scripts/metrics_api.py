@@ -0,0 +1,496 @@
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import sys
+sys.path.append("..")
+
+from scripts.utils import DuckdbUtils, QueryResultCache
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'csv': 'text/csv; charset=utf-8',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+# Filter operators accepted as `<column>__<operator>=<value>`; a bare
+# `<column>=<value>` is an equality filter
+FILTER_OPERATORS = {
+    'eq': '=',
+    'ne': '!=',
+    'gt': '>',
+    'gte': '>=',
+    'lt': '<',
+    'lte': '<=',
+    'in': 'IN',
+}
+
+STATUS_REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+    504: 'Gateway Timeout',
+}
+
+
+class HttpError(Exception):
+    """
+    Raised by request handlers to answer with an error status and a JSON
+    body of the form {"error": message}.
+    """
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _quote_literal(value: str) -> str:
+    # Compared with a column, a string literal is cast to the column's type
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def encode_table(table, output_format: str, model: str) -> bytes:
+    """
+    Encodes an Arrow table as a response body.
+
+    Parameters:
+        table (pyarrow.Table): The query result.
+        output_format (str): "json", "csv" or "arrow" (Arrow IPC stream).
+        model (str): Name of the gold model, included in JSON bodies.
+
+    Returns:
+        bytes: The encoded body.
+    """
+    if output_format == 'arrow':
+        import pyarrow as pa
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if output_format == 'csv':
+        import pyarrow.csv as pa_csv
+        buffer = io.BytesIO()
+        pa_csv.write_csv(table, buffer)
+        return buffer.getvalue()
+    return json.dumps(
+        {'model': model, 'row_count': table.num_rows, 'data': table.to_pylist()},
+        default=_json_default
+    ).encode()
+
+
+class MetricsApi:
+    """
+    Serves the gold tables over HTTP as JSON, CSV and Arrow IPC, using only
+    asyncio and the standard library for the server itself.
+
+    Endpoints:
+        GET /metrics                 Lists the gold models and their columns.
+        GET /metrics/<model>[.<fmt>] Rows of a model, fmt being json (default),
+                                     csv or arrow. The format can also be
+                                     given with `?format=` or the Accept header.
+        GET /health                  Warehouse version, cache and load stats.
+
+    Query parameters on a model are compiled into its SQL, so only the rows
+    asked for leave DuckDB:
+        columns=a,b                  Columns to return.
+        <column>=<value>             Equality filter; several are ANDed.
+        <column>__<op>=<value>       op is one of FILTER_OPERATORS, e.g.
+                                     ticket_count__gte=100 or
+                                     violation_county__in=K,Q.
+        order_by=-ticket_count,a     Sort columns, "-" for descending.
+        limit=10                     Top-N, capped at `max_rows`.
+
+    Every response carries an ETag derived from the warehouse version (see
+    `DuckdbUtils.get_warehouse_version`) and the compiled SQL, so a request
+    with a matching If-None-Match is answered with 304 without running a
+    query. Encoded bodies are kept in an in-process `QueryResultCache`.
+    Queries run through `DuckdbUtils.run_sql_query_async` over read-only
+    connections (pooled connections to the database file, or the current
+    snapshot when `snapshot_dir` is set); at most `max_concurrency` run at
+    once, requests that wait longer than `queue_timeout` get a 503, and
+    queries running longer than `query_timeout` are interrupted and answered
+    with a 504.
+
+    Parameters:
+        database_path (str, optional): Path to the DuckDB database file.
+        snapshot_dir (str, optional): Serve the published snapshots in this
+            directory instead of the database file, so `dbt run` can write
+            while the API is up.
+        max_concurrency (int, optional): Queries running at once, which is
+            also the number of threads and pooled connections.
+        cache_max_bytes (int, optional): Memory budget of the response cache.
+            0 disables it.
+        max_rows (int, optional): Upper bound on `limit`, and the limit used
+            when none is given.
+        queue_timeout (float, optional): Seconds a request may wait for a
+            free query slot.
+        query_timeout (float, optional): Seconds a query may run.
+        table_prefix (str, optional): Prefix of the tables served.
+
+    Example:
+        >>> api = MetricsApi(snapshot_dir="../data/snapshots")
+        >>> asyncio.run(api.serve(port=8000))
+        $ curl "localhost:8000/metrics/gold_tickets_by_county_90_days.csv?order_by=-ticket_count&limit=3"
+    """
+    def __init__(
+            self,
+            database_path: str = '../data/nyc_parking_violations.db',
+            snapshot_dir: str = None,
+            max_concurrency: int = 4,
+            cache_max_bytes: int = 256 * 1024 * 1024,
+            max_rows: int = 100_000,
+            queue_timeout: float = 10.0,
+            query_timeout: float = 30.0,
+            table_prefix: str = 'gold_'
+            ):
+        self.duckdb_utils = DuckdbUtils(
+            database_path=database_path,
+            pool_size=max_concurrency,
+            snapshot_dir=snapshot_dir,
+            async_max_workers=max_concurrency
+        )
+        self.max_concurrency = max_concurrency
+        self.max_rows = max_rows
+        self.queue_timeout = queue_timeout
+        self.query_timeout = query_timeout
+        self.table_prefix = table_prefix
+        self.response_cache = QueryResultCache(cache_max_bytes) if cache_max_bytes > 0 else None
+        # Encodes response bodies; the queries run on the DuckdbUtils workers
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='metrics-api')
+        self._semaphore = None
+        self._catalog = (None, {})
+        self.requests_served = 0
+        self.queries_run = 0
+        self.not_modified = 0
+        self.rejected = 0
+
+    async def _load_catalog(self, warehouse_version: tuple) -> dict:
+        # {model: {column: data_type}}, reloaded when the warehouse changes.
+        # Only the default schema counts: attached databases (snapshots, diff
+        # targets) can hold tables with the same names
+        if self._catalog[0] == warehouse_version:
+            return self._catalog[1]
+        columns = (await self._run_query(
+            f"""
+            SELECT table_name, column_name, data_type
+            FROM duckdb_columns()
+            WHERE database_name = current_database()
+                AND schema_name = current_schema()
+                AND starts_with(table_name, {_quote_literal(self.table_prefix)})
+            ORDER BY table_name, column_index
+            """,
+            label='metrics_api_catalog'
+        )).to_pylist()
+        catalog = {}
+        for column in columns:
+            catalog.setdefault(column['table_name'], {})[column['column_name']] = column['data_type']
+        self._catalog = (warehouse_version, catalog)
+        return catalog
+
+    def build_query(self, model: str, columns: dict, parameters: list) -> str:
+        """
+        Compiles the query parameters of a model request into SQL. Column
+        names are checked against the model's columns and values are quoted,
+        so nothing from the request reaches the SQL unescaped.
+
+        Parameters:
+            model (str): The gold model.
+            columns (dict): The model's columns and their types.
+            parameters (list): (name, value) pairs from the query string.
+
+        Returns:
+            str: The SQL query.
+        """
+        def check_column(name):
+            if name not in columns:
+                raise HttpError(400, f"Unknown column '{name}' in {model}, expected one of {list(columns)}")
+            return _quote_identifier(name)
+
+        selected = '*'
+        filters = []
+        order_by = []
+        limit = self.max_rows
+        for name, value in parameters:
+            if name == 'format':
+                continue
+            if name == 'columns':
+                requested = [column for column in value.split(',') if column]
+                if not requested:
+                    raise HttpError(400, f"columns must name at least one column of {model}")
+                selected = ', '.join(check_column(column) for column in requested)
+            elif name == 'order_by':
+                for column in value.split(','):
+                    descending = column.startswith('-')
+                    order_by.append(check_column(column.lstrip('-')) + (' DESC' if descending else ' ASC'))
+            elif name == 'limit':
+                if not value.isdigit():
+                    raise HttpError(400, f"limit must be a non-negative integer, got '{value}'")
+                limit = min(int(value), self.max_rows)
+            else:
+                column, _, operator = name.partition('__')
+                operator = operator or 'eq'
+                if operator not in FILTER_OPERATORS:
+                    raise HttpError(400, f"Unknown filter operator '{operator}', expected one of {list(FILTER_OPERATORS)}")
+                if operator == 'in':
+                    values = ', '.join(_quote_literal(item) for item in value.split(','))
+                    filters.append(f"{check_column(column)} IN ({values})")
+                else:
+                    filters.append(f"{check_column(column)} {FILTER_OPERATORS[operator]} {_quote_literal(value)}")
+
+        query = f"SELECT {selected} FROM {_quote_identifier(model)}"
+        if filters:
+            query += " WHERE " + " AND ".join(filters)
+        if order_by:
+            query += " ORDER BY " + ", ".join(order_by)
+        return query + f" LIMIT {limit}"
+
+    async def _run_query(self, query: str, label: str):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HttpError(503, f"All {self.max_concurrency} query slots are busy, try again later")
+        try:
+            table = await self.duckdb_utils.run_sql_query_async(
+                query, output_format='arrow', label=label, timeout=self.query_timeout
+            )
+        except TimeoutError:
+            raise HttpError(504, f"The query ran longer than {self.query_timeout} s and was cancelled")
+        except FileNotFoundError as e:
+            # e.g. no snapshot has been published yet
+            raise HttpError(503, str(e))
+        except Exception as e:
+            if 'Conversion Error' in str(e) or 'Could not convert' in str(e):
+                raise HttpError(400, str(e))
+            raise
+        finally:
+            self._semaphore.release()
+        self.queries_run += 1
+        return table
+
+    async def _query_and_encode(self, query: str, output_format: str, model: str) -> bytes:
+        table = await self._run_query(query, model)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, encode_table, table, output_format, model
+        )
+
+    @staticmethod
+    def _negotiate_format(path_format: str, parameters: list, accept: str) -> str:
+        requested = path_format or dict(parameters).get('format')
+        if requested is None:
+            for output_format, content_type in CONTENT_TYPES.items():
+                if content_type.split(';')[0] in accept:
+                    requested = output_format
+                    break
+        requested = requested or 'json'
+        if requested not in CONTENT_TYPES:
+            raise HttpError(400, f"Unknown format '{requested}', expected one of {list(CONTENT_TYPES)}")
+        return requested
+
+    async def handle(self, method: str, target: str, headers: dict) -> tuple:
+        """
+        Answers one request.
+
+        Parameters:
+            method (str): The HTTP method.
+            target (str): The request target, path and query string.
+            headers (dict): Request headers with lower-case names.
+
+        Returns:
+            tuple: (status, response headers, body).
+        """
+        if method not in ('GET', 'HEAD'):
+            raise HttpError(405, f"Method {method} is not allowed")
+
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip('/') or '/'
+        parameters = parse_qsl(url.query, keep_blank_values=True)
+        warehouse_version = self.duckdb_utils.get_warehouse_version()
+
+        if path == '/health':
+            return self._json_response(200, {
+                'status': 'ok',
+                'warehouse_version': repr(warehouse_version),
+                'requests_served': self.requests_served,
+                'queries_run': self.queries_run,
+                'not_modified': self.not_modified,
+                'rejected': self.rejected,
+                'cache': self.response_cache.stats() if self.response_cache is not None else {},
+            })
+
+        catalog = await self._load_catalog(warehouse_version)
+        if path in ('/', '/metrics'):
+            return self._json_response(200, {
+                'models': [
+                    {
+                        'model': model,
+                        'columns': [{'name': name, 'type': data_type} for name, data_type in columns.items()],
+                        'endpoints': [f'/metrics/{model}.{output_format}' for output_format in CONTENT_TYPES],
+                    }
+                    for model, columns in catalog.items()
+                ]
+            })
+
+        if not path.startswith('/metrics/'):
+            raise HttpError(404, f"Unknown path '{path}'")
+        model, _, path_format = path[len('/metrics/'):].partition('.')
+        if model not in catalog:
+            raise HttpError(404, f"Unknown model '{model}', expected one of {list(catalog)}")
+        output_format = self._negotiate_format(path_format, parameters, headers.get('accept', ''))
+        query = self.build_query(model, catalog[model], parameters)
+
+        etag = '"' + hashlib.sha1(
+            repr((warehouse_version, QueryResultCache.normalize_sql(query), output_format)).encode()
+        ).hexdigest() + '"'
+        response_headers = {
+            'Content-Type': CONTENT_TYPES[output_format],
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+        }
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            self.not_modified += 1
+            return 304, response_headers, b''
+
+        cache_key = None
+        body = None
+        if self.response_cache is not None:
+            cache_key = self.response_cache.make_key(query, warehouse_version, output_format)
+            body = self.response_cache.get(cache_key)
+        if body is None:
+            body = await self._query_and_encode(query, output_format, model)
+            if cache_key is not None:
+                self.response_cache.put(cache_key, body)
+        return 200, response_headers, body
+
+    @staticmethod
+    def _json_response(status: int, payload: dict) -> tuple:
+        return status, {'Content-Type': CONTENT_TYPES['json']}, json.dumps(payload, default=_json_default).encode()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # HTTP/1.1 with keep-alive; request bodies are not supported
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._write_response(writer, 'GET', *self._json_response(400, {'error': 'Malformed request line'}), False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (
+                    headers.get('connection', '').lower() != 'close'
+                    if version == 'HTTP/1.1'
+                    else headers.get('connection', '').lower() == 'keep-alive'
+                )
+
+                start = time.perf_counter()
+                try:
+                    status, response_headers, body = await self.handle(method, target, headers)
+                except HttpError as e:
+                    status, response_headers, body = self._json_response(e.status, {'error': e.message})
+                    if e.status == 503:
+                        response_headers['Retry-After'] = '1'
+                except Exception as e:
+                    print(f"Error serving {method} {target}: {str(e)}")
+                    status, response_headers, body = self._json_response(500, {'error': str(e)})
+                response_headers['Server-Timing'] = f'total;dur={(time.perf_counter() - start) * 1000:.2f}'
+                self.requests_served += 1
+                await self._write_response(writer, method, status, response_headers, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _write_response(writer, method, status, headers, body, keep_alive) -> None:
+        head = [f'HTTP/1.1 {status} {STATUS_REASONS.get(status, "")}']
+        headers['Content-Length'] = str(len(body))
+        headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+        head.extend(f'{name}: {value}' for name, value in headers.items())
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+        if method != 'HEAD':
+            writer.write(body)
+        await writer.drain()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8000, ready: asyncio.Event = None) -> None:
+        """
+        Serves requests until cancelled.
+
+        Parameters:
+            host (str, optional): Interface to listen on. Defaults to localhost.
+            port (int, optional): Port to listen on. Defaults to 8000.
+            ready (asyncio.Event, optional): Set once the server is listening.
+        """
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        print(f"Serving the gold models on http://{host}:{port}/metrics")
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.duckdb_utils.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve the gold models over HTTP as JSON, CSV and Arrow IPC.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--database-path', default='../data/nyc_parking_violations.db')
+    parser.add_argument('--snapshot-dir', default=None,
+                        help='Serve the published snapshots in this directory instead of the database file.')
+    parser.add_argument('--max-concurrency', type=int, default=4)
+    parser.add_argument('--cache-max-mb', type=int, default=256, help='0 disables the response cache.')
+    parser.add_argument('--max-rows', type=int, default=100_000)
+    parser.add_argument('--queue-timeout', type=float, default=10.0)
+    parser.add_argument('--query-timeout', type=float, default=30.0)
+    args = parser.parse_args()
+
+    api = MetricsApi(
+        database_path=args.database_path,
+        snapshot_dir=args.snapshot_dir,
+        max_concurrency=args.max_concurrency,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        max_rows=args.max_rows,
+        queue_timeout=args.queue_timeout,
+        query_timeout=args.query_timeout
+    )
+    try:
+        asyncio.run(api.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
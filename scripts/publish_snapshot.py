@@ -0,0 +1,71 @@
+import argparse
+import subprocess
+
+import sys
+sys.path.append("..")
+
+from scripts.utils import DuckdbUtils, WarehouseSnapshots
+
+SNAPSHOT_DIR = '../data/snapshots'
+
+
+def run_pipeline_and_publish(
+        project_dir='../nyc_parking_violations',
+        database_path='../data/nyc_parking_violations.db',
+        snapshot_dir=SNAPSHOT_DIR,
+        run_dbt=True,
+        dbt_args=(),
+        keep=3,
+        grace_seconds=300.0
+        ):
+    """
+    Runs `dbt seed`, `dbt run` and `dbt test` and, only if they succeed,
+    publishes the gold layer as a new read snapshot. Reports reading snapshots
+    (e.g. `DuckdbUtils(snapshot_dir=...)`) switch to it on their next query.
+
+    Parameters:
+        project_dir (str, optional): Path to the dbt project.
+        database_path (str, optional): Path to the DuckDB database file.
+        snapshot_dir (str, optional): Directory holding the snapshots.
+        run_dbt (bool, optional): Whether to run dbt first; False publishes
+            the warehouse as it is.
+        dbt_args (tuple, optional): Extra arguments passed to dbt.
+        keep (int, optional): Snapshots kept after publishing.
+        grace_seconds (float, optional): How long a superseded snapshot stays
+            readable before it may be removed.
+
+    Returns:
+        str: The id of the new snapshot.
+    """
+    if run_dbt:
+        for command in ('seed', 'run', 'test'):
+            subprocess.run(['dbt', command, *dbt_args], cwd=project_dir, check=True)
+    return DuckdbUtils(database_path=database_path).publish_snapshot(
+        snapshot_dir, keep=keep, grace_seconds=grace_seconds
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Run the pipeline and publish the gold layer as a read snapshot.'
+    )
+    parser.add_argument('--database-path', default='../data/nyc_parking_violations.db')
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR)
+    parser.add_argument('--skip-dbt', action='store_true', help='Publish without running dbt first.')
+    parser.add_argument('--keep', type=int, default=3)
+    parser.add_argument('--grace-seconds', type=float, default=300.0)
+    parser.add_argument('--gc-only', action='store_true', help='Only remove old snapshots.')
+    args = parser.parse_args()
+
+    if args.gc_only:
+        removed = WarehouseSnapshots(args.snapshot_dir).collect_garbage(args.keep, args.grace_seconds)
+        print(f"Removed {len(removed)} snapshots: {removed}")
+    else:
+        snapshot_id = run_pipeline_and_publish(
+            database_path=args.database_path,
+            snapshot_dir=args.snapshot_dir,
+            run_dbt=not args.skip_dbt,
+            keep=args.keep,
+            grace_seconds=args.grace_seconds
+        )
+        print(f"Published snapshot {snapshot_id}")
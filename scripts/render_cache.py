@@ -0,0 +1,125 @@
+import hashlib
+import os
+import shutil
+import threading
+
+
+class FigureRenderCache:
+    """
+    A size-bounded on-disk cache of rendered report figures.
+
+    Figures are keyed on a fingerprint of the metric's result data plus the
+    chart parameters (title, output format, resolution and the source code of
+    the method that draws it), so a chart is only redrawn when its inputs or
+    its drawing code actually changed. When the cache grows beyond
+    `max_bytes`, the least recently used images are deleted.
+
+    Parameters:
+        cache_dir (str): Directory the cached images are stored in.
+        max_bytes (int, optional): Size budget for the cache directory.
+            Defaults to 512 MB.
+
+    Example:
+        >>> render_cache = FigureRenderCache("../data/render_cache")
+        >>> NYC_Parking_Violations_Report(headless=True).export_report(
+        ...     "reports", render_cache=render_cache
+        ... )
+        >>> render_cache.stats()
+    """
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(data, chart_params: dict) -> str:
+        """
+        Returns a content hash of a metric's result data and chart parameters.
+
+        Parameters:
+            data (pd.DataFrame | dict | pyarrow.Table): The metric's results.
+            chart_params (dict): Anything else that changes the rendered image.
+        """
+        digest = hashlib.sha256()
+        for name, value in sorted(chart_params.items()):
+            digest.update(f"{name}={value!r};".encode())
+
+        if isinstance(data, dict):
+            for name, column in sorted(data.items()):
+                digest.update(f"{name}:{column.dtype};".encode())
+                digest.update(column.tobytes())
+            return digest.hexdigest()
+
+        import pandas as pd
+        if not isinstance(data, pd.DataFrame):
+            data = data.to_pandas()
+        digest.update(repr(list(zip(data.columns, map(str, data.dtypes)))).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key: str, file_format: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{file_format}")
+
+    def get(self, key: str, file_format: str) -> str:
+        """
+        Returns the path of the cached image, or None on a miss. Hits refresh
+        the file's modification time, which drives LRU eviction.
+        """
+        path = self._path(key, file_format)
+        with self._lock:
+            if not os.path.exists(path):
+                self.misses += 1
+                return None
+            os.utime(path)
+            self.hits += 1
+        return path
+
+    def put(self, key: str, file_format: str, source_path: str) -> str:
+        """
+        Copies a freshly rendered image into the cache and evicts the least
+        recently used images if the cache is over budget.
+        """
+        path = self._path(key, file_format)
+        # Copy under a temporary name first so readers never see a partial file
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(source_path, temporary_path)
+        os.replace(temporary_path, path)
+        self._evict()
+        return path
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for file_name in os.listdir(self.cache_dir):
+                if file_name.endswith(".tmp"):
+                    continue
+                stat = os.stat(os.path.join(self.cache_dir, file_name))
+                entries.append((stat.st_mtime, stat.st_size, file_name))
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, file_name in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                os.remove(os.path.join(self.cache_dir, file_name))
+                total_bytes -= size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the current size of the cache.
+        """
+        with self._lock:
+            total_bytes = sum(
+                os.path.getsize(os.path.join(self.cache_dir, file_name))
+                for file_name in os.listdir(self.cache_dir)
+            )
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "current_bytes": total_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,452 @@
+import argparse
+import json
+import os
+import re
+import time
+
+import duckdb
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DBT_PROJECT_DIR = os.path.join(REPO_ROOT, 'nyc_parking_violations')
+PROFILES_PATH = os.path.join(DBT_PROJECT_DIR, 'profiles.yml')
+SCHEMA_PATH = os.path.join(DBT_PROJECT_DIR, 'models', 'docs', 'schema.yml')
+
+LEFT_DATABASE = 'left_db'
+RIGHT_DATABASE = 'right_db'
+
+
+def resolve_database_path(database):
+    """
+    Returns the database file for a dbt target in profiles.yml (e.g. "dev" or
+    "prod"), or `database` itself when it is not a target name.
+
+    Target paths are relative to where dbt runs: dev from the dbt project
+    directory and prod from the repository root (see profiles.yml), so both
+    are tried.
+    """
+    import yaml
+
+    with open(PROFILES_PATH) as f:
+        outputs = yaml.safe_load(f)['nyc_parking_violations']['outputs']
+    if database not in outputs:
+        return database
+
+    # Renders {{ env_var('NAME', 'default') }} the way dbt would
+    path = re.sub(
+        r"\{\{\s*env_var\('([^']+)',\s*'([^']*)'\)\s*\}\}",
+        lambda match: os.environ.get(match.group(1), match.group(2)),
+        outputs[database]['path']
+    )
+    if os.path.isabs(path):
+        return path
+    candidates = [os.path.normpath(os.path.join(directory, path)) for directory in (DBT_PROJECT_DIR, REPO_ROOT)]
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return candidates[0]
+
+
+def attach_databases(con, left_database_path, right_database_path):
+    """
+    Attaches both database files read-only to `con` as left_db and right_db.
+    When both sides are the same file it is attached once, so tables within
+    one warehouse can be compared too.
+
+    Returns:
+        tuple: The left and right database names.
+    """
+    con.execute(f"ATTACH '{left_database_path}' AS {LEFT_DATABASE} (READ_ONLY)")
+    if os.path.realpath(left_database_path) == os.path.realpath(right_database_path):
+        return LEFT_DATABASE, LEFT_DATABASE
+    con.execute(f"ATTACH '{right_database_path}' AS {RIGHT_DATABASE} (READ_ONLY)")
+    return LEFT_DATABASE, RIGHT_DATABASE
+
+
+def _table_columns(con, database, table_name):
+    columns = con.execute("""
+        SELECT column_name, data_type
+        FROM duckdb_columns()
+        WHERE database_name = ? AND schema_name = 'main' AND table_name = ?
+        ORDER BY column_index
+    """, [database, table_name]).fetchall()
+    if not columns:
+        raise ValueError(f"Table '{table_name}' not found in {database}")
+    return dict(columns)
+
+
+def declared_grains(schema_path=SCHEMA_PATH):
+    """
+    Returns the grain of every dbt model and seed that declares one in
+    schema.yml under `meta: grain:`, i.e. the columns identifying a row.
+    """
+    import yaml
+
+    with open(schema_path) as f:
+        schema = yaml.safe_load(f)
+    return {
+        node['name']: node['meta']['grain']
+        for node in schema.get('models', []) + schema.get('seeds', [])
+        if 'grain' in (node.get('meta') or {})
+    }
+
+
+def _default_key_columns(table_name, columns, grains):
+    # Tickets are keyed by their summons number; aggregates by their declared
+    # grain, which includes numeric dimensions such as violation_code
+    if 'summons_number' in columns:
+        return ['summons_number']
+    return grains.get(table_name)
+
+
+def _key_match(keys, left_alias, right_alias):
+    # NULL keys are normal (LEFT JOINed dimensions, GROUPING SETS rows), so
+    # they have to match each other
+    return ' AND '.join(f'{left_alias}.{key} IS NOT DISTINCT FROM {right_alias}.{key}' for key in keys)
+
+
+def _hash_expression(columns, alias=None):
+    prefix = f'{alias}.' if alias else ''
+    return f"hash({', '.join(prefix + column for column in columns)})"
+
+
+def _keyed_row_hashes(table, keys, columns, buckets, bucket_filter=None):
+    # Key columns, bucket and row hash of every row in the table. Columns are
+    # wrapped in a subquery so a type cast on one side keeps the column name.
+    return f"""
+        SELECT
+            {', '.join(keys)},
+            {_hash_expression(keys)} % {buckets} AS bucket,
+            {_hash_expression(columns)} AS row_hash
+        FROM (
+            SELECT {', '.join(columns.values())}
+            FROM {table}
+        )
+        {f'WHERE {_hash_expression(keys)} % {buckets} IN ({bucket_filter})' if bucket_filter else ''}
+    """
+
+
+def diff_attached_tables(
+        con,
+        left_database,
+        right_database,
+        table_name,
+        right_table_name=None,
+        key_columns=None,
+        buckets=1024,
+        sample_size=10
+        ):
+    """
+    Compares a table in two attached databases (see `attach_databases`)
+    without copying either table into Python.
+
+    The diff narrows down in three steps, each only looking at what the
+    previous one found different:
+        1. Both tables are scanned once into per-bucket checksums (row count,
+           sum and XOR of row hashes), with rows assigned to buckets by the
+           hash of their key. Identical tables stop here.
+        2. For the buckets whose checksums differ, keys are matched on their
+           row hashes to find added, removed and changed rows.
+        3. Changed rows are joined back to both tables to count changes per
+           column and sample the changed values.
+
+    Columns whose types differ between the sides are compared as text. A key
+    present more than once on a side is matched as a group, and a group whose
+    rows changed is reported as a changed row without per-column details.
+
+    Parameters:
+        con (duckdb.DuckDBPyConnection): Connection with both databases
+            attached.
+        left_database (str): Name of the attached left database.
+        right_database (str): Name of the attached right database.
+        table_name (str): Table in the left database.
+        right_table_name (str, optional): Table in the right database.
+            Defaults to `table_name`.
+        key_columns (list, optional): Columns identifying a row. Defaults to
+            summons_number when present, otherwise the grain declared for
+            the model in schema.yml (see `declared_grains`). Required for
+            other tables.
+        buckets (int, optional): Number of checksum buckets.
+        sample_size (int, optional): Keys and values sampled per change.
+
+    Returns:
+        dict: Row counts, schema changes, the number of differing buckets,
+            added, removed and changed row counts, changed row counts per
+            column and samples of each.
+    """
+    start = time.perf_counter()
+    right_table_name = right_table_name or table_name
+    left_columns = _table_columns(con, left_database, table_name)
+    right_columns = _table_columns(con, right_database, right_table_name)
+    common_columns = [name for name in left_columns if name in right_columns]
+    key_columns = key_columns or _default_key_columns(table_name, common_columns, declared_grains())
+    if not key_columns:
+        raise ValueError(
+            f"No key columns known for '{table_name}'; pass key_columns (--key) "
+            f"or declare a meta grain for it in schema.yml"
+        )
+    key_columns = list(key_columns)
+    missing_keys = [name for name in key_columns if name not in common_columns]
+    if not key_columns or missing_keys:
+        raise ValueError(f"Key columns {missing_keys or key_columns} must exist in both tables")
+
+    # Columns whose type changed are compared as text so both sides hash alike
+    select_columns = {
+        name: name if left_columns[name] == right_columns[name] else f'CAST({name} AS VARCHAR) AS {name}'
+        for name in common_columns
+    }
+    left_table = f'{left_database}.main.{table_name}'
+    right_table = f'{right_database}.main.{right_table_name}'
+    key_join = _key_match(key_columns, 'l', 'r')
+
+    left_rows, right_rows = con.execute(
+        f'SELECT (SELECT COUNT(*) FROM {left_table}), (SELECT COUNT(*) FROM {right_table})'
+    ).fetchone()
+
+    # Step 1: one scan of each table into bucket checksums
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE diff_buckets AS
+        WITH
+            l AS (
+                SELECT bucket, COUNT(*) AS row_count, SUM(row_hash) AS hash_sum, bit_xor(row_hash) AS hash_xor
+                FROM ({_keyed_row_hashes(left_table, key_columns, select_columns, buckets)})
+                GROUP BY bucket
+            ),
+            r AS (
+                SELECT bucket, COUNT(*) AS row_count, SUM(row_hash) AS hash_sum, bit_xor(row_hash) AS hash_xor
+                FROM ({_keyed_row_hashes(right_table, key_columns, select_columns, buckets)})
+                GROUP BY bucket
+            )
+        SELECT bucket
+        FROM l FULL OUTER JOIN r USING (bucket)
+        WHERE l.row_count IS DISTINCT FROM r.row_count
+            OR l.hash_sum IS DISTINCT FROM r.hash_sum
+            OR l.hash_xor IS DISTINCT FROM r.hash_xor
+    """)
+    differing_buckets = con.execute('SELECT COUNT(*) FROM diff_buckets').fetchone()[0]
+
+    result = {
+        'left': {'table': table_name, 'rows': left_rows},
+        'right': {'table': right_table_name, 'rows': right_rows},
+        'key_columns': key_columns,
+        'columns': {
+            'only_left': [name for name in left_columns if name not in right_columns],
+            'only_right': [name for name in right_columns if name not in left_columns],
+            'type_changed': {
+                name: [left_columns[name], right_columns[name]]
+                for name in common_columns if left_columns[name] != right_columns[name]
+            },
+        },
+        'buckets': buckets,
+        'differing_buckets': differing_buckets,
+        'added_rows': 0,
+        'removed_rows': 0,
+        'changed_rows': 0,
+        'changed_columns': {},
+        'samples': {'added': [], 'removed': [], 'changed': {}},
+    }
+    if differing_buckets == 0:
+        result['seconds'] = round(time.perf_counter() - start, 4)
+        return result
+
+    # Step 2: match keys within the differing buckets only
+    key_groups = f"""
+        SELECT {', '.join(key_columns)}, COUNT(*) AS row_count, SUM(row_hash) AS hash_sum
+        FROM ({{row_hashes}})
+        GROUP BY ALL
+    """
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE diff_keys AS
+        WITH
+            l AS ({key_groups.format(row_hashes=_keyed_row_hashes(
+                left_table, key_columns, select_columns, buckets, 'SELECT bucket FROM diff_buckets'))}),
+            r AS ({key_groups.format(row_hashes=_keyed_row_hashes(
+                right_table, key_columns, select_columns, buckets, 'SELECT bucket FROM diff_buckets'))})
+        SELECT
+            {', '.join(f'COALESCE(l.{key}, r.{key}) AS {key}' for key in key_columns)},
+            CASE
+                WHEN l.row_count IS NULL THEN 'added'
+                WHEN r.row_count IS NULL THEN 'removed'
+                ELSE 'changed'
+            END AS change,
+            l.row_count AS left_rows,
+            r.row_count AS right_rows
+        FROM l FULL OUTER JOIN r ON {key_join}
+        WHERE l.row_count IS NULL
+            OR r.row_count IS NULL
+            OR l.row_count <> r.row_count
+            OR l.hash_sum <> r.hash_sum
+    """)
+    result['added_rows'], result['removed_rows'], result['changed_rows'] = con.execute("""
+        SELECT
+            COALESCE(SUM(right_rows) FILTER (WHERE change = 'added'), 0),
+            COALESCE(SUM(left_rows) FILTER (WHERE change = 'removed'), 0),
+            COUNT(*) FILTER (WHERE change = 'changed')
+        FROM diff_keys
+    """).fetchone()
+    key_list = ', '.join(key_columns)
+    for change in ('added', 'removed'):
+        result['samples'][change] = [
+            dict(zip(key_columns, row)) for row in con.execute(
+                f'SELECT {key_list} FROM diff_keys WHERE change = ? ORDER BY {key_list} LIMIT {int(sample_size)}',
+                [change]
+            ).fetchall()
+        ]
+
+    # Step 3: per-column changes of the rows matched one to one
+    value_columns = [name for name in common_columns if name not in key_columns]
+    if result['changed_rows'] == 0 or not value_columns:
+        result['seconds'] = round(time.perf_counter() - start, 4)
+        return result
+    key_struct = ', '.join(f'{key} := d.{key}' for key in key_columns)
+    aggregates = []
+    for index, name in enumerate(value_columns):
+        changed = f'l.{name} IS DISTINCT FROM r.{name}'
+        aggregates += [
+            f'COUNT(*) FILTER (WHERE {changed}) AS changed_{index}',
+            f'min_by(struct_pack({key_struct}, left_value := l.{name}, right_value := r.{name}), '
+            f'{_hash_expression(key_columns, "d")}, {int(sample_size)}) FILTER (WHERE {changed}) AS samples_{index}',
+        ]
+    column_changes = con.execute(f"""
+        SELECT
+            {', '.join(aggregates)}
+        FROM
+            diff_keys AS d
+            JOIN (SELECT {', '.join(select_columns.values())} FROM {left_table}) AS l
+                ON {_key_match(key_columns, 'l', 'd')}
+            JOIN (SELECT {', '.join(select_columns.values())} FROM {right_table}) AS r
+                ON {key_join}
+        WHERE
+            d.change = 'changed' AND d.left_rows = 1 AND d.right_rows = 1
+    """).fetchone()
+    for index, name in enumerate(value_columns):
+        if column_changes[2 * index]:
+            result['changed_columns'][name] = column_changes[2 * index]
+            result['samples']['changed'][name] = column_changes[2 * index + 1]
+
+    result['seconds'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def diff_databases(
+        left_database_path,
+        right_database_path,
+        tables=None,
+        key_columns=None,
+        buckets=1024,
+        sample_size=10
+        ):
+    """
+    Compares tables of two DuckDB files, e.g. the warehouse built from
+    data/clean_data against the one built from data/dirty_data, or dev
+    against prod.
+
+    Both files are attached read-only to an in-memory connection, so the diff
+    runs while reports read the warehouses, and only counts and samples come
+    back to Python.
+
+    Parameters:
+        left_database_path (str): Database file or dbt target of the left side.
+        right_database_path (str): Database file or dbt target of the right
+            side.
+        tables (list, optional): Tables to compare. Defaults to every table
+            in both databases with a known key; the others are listed under
+            `no_key`.
+        key_columns (list, optional): Key columns used for every table.
+            Defaults to each table's own (see `diff_attached_tables`).
+        buckets (int, optional): Number of checksum buckets.
+        sample_size (int, optional): Keys and values sampled per change.
+
+    Returns:
+        dict: Tables found on one side only, tables skipped for lack of a
+            key and a diff per compared table.
+
+    Example:
+        >>> diff = diff_databases("dev", "prod", ["silver_valid_violation_tickets"])
+        >>> diff["tables"]["silver_valid_violation_tickets"]["changed_columns"]
+    """
+    left_database_path = resolve_database_path(left_database_path)
+    right_database_path = resolve_database_path(right_database_path)
+    con = duckdb.connect()
+    try:
+        left_database, right_database = attach_databases(con, left_database_path, right_database_path)
+        table_names = {}
+        for database in {left_database, right_database}:
+            table_names[database] = {
+                row[0] for row in con.execute(
+                    "SELECT table_name FROM duckdb_tables() WHERE database_name = ? AND schema_name = 'main'",
+                    [database]
+                ).fetchall()
+            }
+        left_tables, right_tables = table_names[left_database], table_names[right_database]
+
+        result = {
+            'left_database': left_database_path,
+            'right_database': right_database_path,
+            'only_left': sorted(left_tables - right_tables),
+            'only_right': sorted(right_tables - left_tables),
+            'no_key': [],
+            'tables': {},
+        }
+        grains = declared_grains()
+        for table_name in tables or sorted(left_tables & right_tables):
+            if not tables and not key_columns and not _default_key_columns(
+                    table_name, _table_columns(con, left_database, table_name), grains):
+                # Tables without a known grain are only compared when named
+                result['no_key'].append(table_name)
+                continue
+            try:
+                result['tables'][table_name] = diff_attached_tables(
+                    con, left_database, right_database, table_name,
+                    key_columns=key_columns, buckets=buckets, sample_size=sample_size
+                )
+            except Exception as e:
+                print(f"Error comparing {table_name}: {str(e)}")
+                raise
+        return result
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare tables of two DuckDB warehouses.')
+    parser.add_argument('left', help='Database file or dbt target, e.g. dev.')
+    parser.add_argument('right', help='Database file or dbt target, e.g. prod.')
+    parser.add_argument('--table', action='append', dest='tables', help='Table to compare; repeatable.')
+    parser.add_argument('--key', action='append', dest='key_columns', help='Key column; repeatable.')
+    parser.add_argument('--buckets', type=int, default=1024)
+    parser.add_argument('--sample-size', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='Print the full diff as JSON.')
+    args = parser.parse_args()
+
+    diff = diff_databases(
+        args.left, args.right, args.tables, args.key_columns, args.buckets, args.sample_size
+    )
+    if args.json:
+        print(json.dumps(diff, indent=2, default=str))
+    else:
+        for table_name in diff['only_left']:
+            print(f"{table_name}: only in {diff['left_database']}")
+        for table_name in diff['only_right']:
+            print(f"{table_name}: only in {diff['right_database']}")
+        for table_name in diff['no_key']:
+            print(f"{table_name}: skipped, no key columns (pass --table and --key)")
+        for table_name, table_diff in diff['tables'].items():
+            columns = table_diff['columns']
+            changes = [
+                f"{table_diff['added_rows']:,} added",
+                f"{table_diff['removed_rows']:,} removed",
+                f"{table_diff['changed_rows']:,} changed",
+            ]
+            print(
+                f"{table_name}: {table_diff['left']['rows']:,} -> {table_diff['right']['rows']:,} rows, "
+                f"{', '.join(changes)} ({table_diff['differing_buckets']} of {table_diff['buckets']} "
+                f"buckets differ, {table_diff['seconds']} s)"
+            )
+            for name in columns['only_left']:
+                print(f"    column {name} removed")
+            for name in columns['only_right']:
+                print(f"    column {name} added")
+            for name, (left_type, right_type) in columns['type_changed'].items():
+                print(f"    column {name} changed type {left_type} -> {right_type}")
+            for name, count in table_diff['changed_columns'].items():
+                print(f"    {name}: {count:,} rows changed, e.g. {table_diff['samples']['changed'][name][:3]}")
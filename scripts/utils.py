@@ -1,16 +1,855 @@
+import glob
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING
+
 import duckdb
-import pandas as pd
+
+# pandas is only imported when a query result is converted to a DataFrame, so
+# data-only jobs (loads, exports) do not pay for importing it at startup
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class DuckdbConnectionPool:
+    """
+    A bounded pool of read-only DuckDB connections that are reused across
+    queries instead of being opened and closed for every call.
+
+    DuckDB allows many read-only connections to a database file, but a writer
+    (e.g. `load_csv_file_to_db` or `dbt run`) needs the file to itself. The
+    pool therefore supports a handoff through `exclusive_writer()`, which waits
+    for checked out connections to come back, closes every pooled connection
+    and blocks new checkouts until the writer is done.
+
+    Parameters:
+        database_path (str): Path to the DuckDB database file.
+        max_connections (int, optional): Upper bound on open connections.
+            Defaults to 4.
+        acquire_timeout (float, optional): Seconds to wait for a free
+            connection before raising a TimeoutError. Defaults to 30.
+
+    Example:
+        >>> pool = DuckdbConnectionPool("data/nyc_parking_violations.db")
+        >>> with pool.connection() as con:
+        ...     df = con.sql("SELECT 1 AS one").df()
+        >>> with pool.exclusive_writer():
+        ...     ...  # run `dbt run` or load new CSV files here
+    """
+    def __init__(
+            self,
+            database_path: str,
+            max_connections: int = 4,
+            acquire_timeout: float = 30.0
+            ):
+        if max_connections < 1:
+            raise ValueError("max_connections must be at least 1")
+        self.database_path = database_path
+        self.max_connections = max_connections
+        self.acquire_timeout = acquire_timeout
+        self._condition = threading.Condition()
+        self._idle_connections = []
+        self._open_connections = 0
+        self._writer_active = False
+
+    def _open_connection(self) -> duckdb.DuckDBPyConnection:
+        return duckdb.connect(database=self.database_path, read_only=True)
+
+    @staticmethod
+    def _is_healthy(con: duckdb.DuckDBPyConnection) -> bool:
+        try:
+            con.execute("SELECT 1").fetchone()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self) -> duckdb.DuckDBPyConnection:
+        """
+        Checks out a healthy read-only connection, opening a new one if the
+        pool has not reached `max_connections` yet.
+
+        Returns:
+            duckdb.DuckDBPyConnection: A connection that must be handed back
+                with `release()`.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            with self._condition:
+                while True:
+                    if not self._writer_active:
+                        if self._idle_connections:
+                            con = self._idle_connections.pop()
+                            break
+                        if self._open_connections < self.max_connections:
+                            self._open_connections += 1
+                            con = None
+                            break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            "Timed out waiting for a DuckDB connection from the pool"
+                        )
+                    self._condition.wait(remaining)
+
+            if con is None:
+                try:
+                    return self._open_connection()
+                except Exception:
+                    self._discard()
+                    raise
+
+            # Idle connections can go stale (e.g. the file was replaced), so
+            # health check them before handing them out.
+            if self._is_healthy(con):
+                return con
+            self._close_quietly(con)
+            self._discard()
+
+    def release(self, con: duckdb.DuckDBPyConnection, healthy: bool = True) -> None:
+        """
+        Returns a connection to the pool. Connections flagged as unhealthy, or
+        returned while a writer is waiting, are closed instead of reused.
+        """
+        with self._condition:
+            if healthy and not self._writer_active:
+                self._idle_connections.append(con)
+                self._condition.notify()
+                return
+        self._close_quietly(con)
+        self._discard()
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager that checks out a connection and always returns it.
+        Connections that raised an error are health checked before reuse.
+        """
+        con = self.acquire()
+        healthy = True
+        try:
+            yield con
+        except Exception:
+            healthy = self._is_healthy(con)
+            raise
+        finally:
+            self.release(con, healthy=healthy)
+
+    @contextmanager
+    def exclusive_writer(self):
+        """
+        Hands the database file over to a writer. Waits for checked out
+        connections to be returned, closes all pooled connections so the file
+        lock is released, and blocks new checkouts until the block exits.
+        """
+        with self._condition:
+            while self._writer_active:
+                self._condition.wait()
+            self._writer_active = True
+            idle_connections, self._idle_connections = self._idle_connections, []
+            self._open_connections -= len(idle_connections)
+        for con in idle_connections:
+            self._close_quietly(con)
+        try:
+            with self._condition:
+                while self._open_connections > 0:
+                    self._condition.wait()
+            yield
+        finally:
+            with self._condition:
+                self._writer_active = False
+                self._condition.notify_all()
+
+    def close(self) -> None:
+        """
+        Closes every idle connection. Checked out connections are closed when
+        they are released.
+        """
+        with self._condition:
+            idle_connections, self._idle_connections = self._idle_connections, []
+            self._open_connections -= len(idle_connections)
+            self._condition.notify_all()
+        for con in idle_connections:
+            self._close_quietly(con)
+
+    def _discard(self) -> None:
+        with self._condition:
+            self._open_connections -= 1
+            self._condition.notify_all()
+
+    @staticmethod
+    def _close_quietly(con: duckdb.DuckDBPyConnection) -> None:
+        try:
+            con.close()
+        except Exception:
+            pass
+
+
+class QueryResultCache:
+    """
+    An in-memory LRU cache of query results bounded by a memory budget.
+
+    Entries are keyed on the normalized SQL text plus a warehouse version
+    stamp, so a rebuilt warehouse (new stamp) never serves results computed
+    against the previous one. Stale entries are simply never hit again and age
+    out through LRU eviction.
+
+    Parameters:
+        max_bytes (int): Memory budget for cached results, measured with
+            `DataFrame.memory_usage(deep=True)` for DataFrames, `nbytes` for
+            Arrow tables and NumPy arrays and the length of encoded `bytes`
+            results. Results larger than the budget are not cached.
+
+    Example:
+        >>> cache = QueryResultCache(max_bytes=256 * 1024 * 1024)
+        >>> key = cache.make_key("SELECT 1", warehouse_version)
+        >>> cache.get(key) is None
+        True
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_sql(query: str) -> str:
+        """
+        Collapses whitespace and drops trailing semicolons so that formatting
+        differences do not produce separate cache entries.
+        """
+        return re.sub(r"\s+", " ", query).strip().rstrip(";").strip()
+
+    def make_key(self, query: str, warehouse_version: tuple, *variant) -> tuple:
+        return (self.normalize_sql(query), warehouse_version) + tuple(variant)
+
+    @staticmethod
+    def _result_size(result) -> int:
+        if isinstance(result, bytes):
+            return len(result)
+        if isinstance(result, dict):
+            return sum(column.nbytes for column in result.values())
+        if hasattr(result, "memory_usage"):
+            return int(result.memory_usage(index=True, deep=True).sum())
+        return result.nbytes
+
+    @staticmethod
+    def _result_rows(result) -> int:
+        if isinstance(result, dict):
+            return len(next(iter(result.values()), ()))
+        if hasattr(result, "num_rows"):
+            return result.num_rows
+        return len(result)
+
+    @staticmethod
+    def _copy_result(result):
+        if isinstance(result, dict):
+            return {name: column.copy() for name, column in result.items()}
+        if hasattr(result, "memory_usage"):
+            return result.copy()
+        # Arrow tables are immutable, so they can be shared safely
+        return result
+
+    def get(self, key: tuple):
+        """
+        Returns a copy of the cached result, or None on a miss. Copies are
+        handed out because callers (e.g. the report) mutate their DataFrames.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = entry[0]
+        return self._copy_result(result)
+
+    def put(self, key: tuple, result) -> None:
+        size = self._result_size(result)
+        if size > self.max_bytes:
+            return
+        result = self._copy_result(result)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (result, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the current memory footprint.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "current_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class QueryLog:
+    """
+    Records per-call timings of `DuckdbUtils` queries so slow queries and hot
+    paths can be found.
+
+    Each call produces one entry with its label (e.g. the report metric name),
+    wall time split into connect, execute and conversion, rows and bytes
+    returned, retry count, errors and whether it was served from the result
+    cache. The latest `max_entries` entries are kept for the JSON log, while
+    per-label counters accumulate for the Prometheus text snapshot.
+
+    Parameters:
+        max_entries (int, optional): Number of recent entries kept. Defaults
+            to 10,000.
+
+    Example:
+        >>> duckdb_utils = DuckdbUtils(query_log_max_entries=10_000)
+        >>> duckdb_utils.run_sql_query("SELECT 1", label="ping")
+        >>> duckdb_utils.query_log.write_json("query_log.json")
+        >>> print(duckdb_utils.query_log.prometheus_text())
+    """
+    PHASES = ("connect", "execute", "convert")
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries = deque(maxlen=max_entries)
+        self._totals = defaultdict(lambda: defaultdict(float))
+        self._lock = threading.Lock()
+
+    def record(self, entry: dict) -> None:
+        label = entry["label"] or "unlabeled"
+        with self._lock:
+            self._entries.append(entry)
+            totals = self._totals[label]
+            totals["calls"] += 1
+            totals["errors"] += entry["status"] == "error"
+            totals["cache_hits"] += entry["cache_hit"]
+            totals["retries"] += entry["retries"]
+            totals["rows"] += entry["rows"]
+            totals["bytes"] += entry["bytes"]
+            totals["seconds"] += entry["total_seconds"]
+            for phase in self.PHASES:
+                totals[f"{phase}_seconds"] += entry[f"{phase}_seconds"]
+
+    def entries(self) -> list:
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._totals.clear()
+
+    def to_json(self) -> str:
+        """
+        Returns the recent entries as a JSON array, oldest first.
+        """
+        return json.dumps(self.entries(), indent=2)
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.to_json())
+
+    def prometheus_text(self) -> str:
+        """
+        Returns the per-label counters in the Prometheus text exposition
+        format, e.g. for a node_exporter textfile collector.
+        """
+        with self._lock:
+            totals = {
+                label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"): dict(values)
+                for label, values in self._totals.items()
+            }
+
+        counters = [
+            ("duckdb_query_calls_total", "calls", "Queries run, including cache hits."),
+            ("duckdb_query_errors_total", "errors", "Queries that failed after retrying."),
+            ("duckdb_query_cache_hits_total", "cache_hits", "Queries served from the result cache."),
+            ("duckdb_query_retries_total", "retries", "Query retries after a failed attempt."),
+            ("duckdb_query_rows_total", "rows", "Rows returned."),
+            ("duckdb_query_bytes_total", "bytes", "Bytes returned, as held in memory."),
+            ("duckdb_query_seconds_total", "seconds", "Wall time of queries."),
+        ]
+        lines = []
+        for metric, key, description in counters:
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} counter")
+            for label, values in sorted(totals.items()):
+                lines.append(f'{metric}{{label="{label}"}} {values.get(key, 0):.17g}')
+
+        metric = "duckdb_query_phase_seconds_total"
+        lines.append(f"# HELP {metric} Wall time of queries by phase.")
+        lines.append(f"# TYPE {metric} counter")
+        for label, values in sorted(totals.items()):
+            for phase in self.PHASES:
+                lines.append(
+                    f'{metric}{{label="{label}",phase="{phase}"}} {values.get(f"{phase}_seconds", 0):.17g}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+class WarehouseSnapshots:
+    """
+    Immutable, read-only snapshots of the gold layer exported as Parquet, so
+    reports never open the database file that `dbt run` writes to.
+
+    After a successful pipeline run `publish()` exports the tables to a new
+    directory <snapshot_dir>/<snapshot_id>/ and then switches the CURRENT
+    pointer file to it with an atomic rename. Readers resolve CURRENT once per
+    query and read that snapshot's files, so they neither block a writer nor
+    wait for one, and a query never sees a half-published snapshot.
+
+    Superseded snapshots are kept for a grace period, so queries already
+    running against them can finish, and are then removed by
+    `collect_garbage()`.
+
+    Parameters:
+        snapshot_dir (str, optional): Directory holding the snapshots.
+            Defaults to "../data/snapshots".
+
+    Example:
+        >>> snapshots = WarehouseSnapshots("../data/snapshots")
+        >>> with duckdb.connect("../data/nyc_parking_violations.db", read_only=True) as con:
+        ...     snapshot_id = snapshots.publish(con)
+        >>> con = snapshots.connect()  # in-memory views over the current snapshot
+    """
+    POINTER_FILE = "CURRENT"
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, snapshot_dir: str = "../data/snapshots"):
+        self.snapshot_dir = snapshot_dir
+
+    def snapshot_path(self, snapshot_id: str) -> str:
+        return os.path.join(self.snapshot_dir, snapshot_id)
+
+    def current(self) -> str:
+        """
+        Returns the id of the current snapshot, or None before the first
+        publish.
+        """
+        try:
+            with open(os.path.join(self.snapshot_dir, self.POINTER_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def list_snapshots(self) -> list:
+        """
+        Returns the ids of the published snapshots, oldest first.
+        """
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.snapshot_dir)
+            if os.path.isfile(os.path.join(self.snapshot_dir, name, self.MANIFEST_FILE))
+        )
+
+    def read_manifest(self, snapshot_id: str) -> dict:
+        with open(os.path.join(self.snapshot_path(snapshot_id), self.MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def publish(
+            self,
+            con: duckdb.DuckDBPyConnection,
+            tables: list = None,
+            table_prefix: str = "gold_",
+            keep: int = 3,
+            grace_seconds: float = 300.0
+            ) -> str:
+        """
+        Exports tables from the warehouse into a new snapshot, makes it the
+        current one and collects old snapshots.
+
+        The snapshot is written to a temporary directory first and renamed
+        into place once complete; only then is CURRENT replaced, so a failed
+        export leaves the previous snapshot current.
+
+        Parameters:
+            con (duckdb.DuckDBPyConnection): Connection to the warehouse.
+            tables (list, optional): Tables to export. Defaults to every table
+                whose name starts with `table_prefix`.
+            table_prefix (str, optional): Prefix of the default tables.
+                Defaults to "gold_".
+            keep (int, optional): Snapshots kept by `collect_garbage()`.
+            grace_seconds (float, optional): See `collect_garbage()`.
+
+        Returns:
+            str: The id of the new snapshot.
+        """
+        if tables is None:
+            tables = [
+                row[0] for row in con.execute(
+                    "SELECT table_name FROM duckdb_tables() "
+                    "WHERE database_name = current_database() AND starts_with(table_name, ?) "
+                    "ORDER BY table_name",
+                    [table_prefix]
+                ).fetchall()
+            ]
+        if not tables:
+            raise ValueError(f"No tables to snapshot in {self.snapshot_dir}")
+
+        snapshot_id = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        snapshot_path = self.snapshot_path(snapshot_id)
+        staging_path = f"{snapshot_path}.tmp"
+        os.makedirs(staging_path)
+        try:
+            manifest = {"snapshot_id": snapshot_id, "tables": {}}
+            for table in tables:
+                file_name = f"{table}.parquet"
+                escaped_path = os.path.join(staging_path, file_name).replace("'", "''")
+                con.execute(f"COPY {table} TO '{escaped_path}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+                row_count = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                manifest["tables"][table] = {"file": file_name, "rows": row_count}
+            manifest["created_at"] = datetime.now().isoformat(timespec="seconds")
+            with open(os.path.join(staging_path, self.MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.rename(staging_path, snapshot_path)
+        except Exception as e:
+            print(f"Error publishing snapshot {snapshot_id}: {str(e)}")
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+
+        pointer_path = os.path.join(self.snapshot_dir, self.POINTER_FILE)
+        with open(f"{pointer_path}.tmp", "w") as f:
+            f.write(snapshot_id)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{pointer_path}.tmp", pointer_path)
+
+        self.collect_garbage(keep=keep, grace_seconds=grace_seconds)
+        return snapshot_id
+
+    def collect_garbage(self, keep: int = 3, grace_seconds: float = 300.0) -> list:
+        """
+        Removes snapshots older than the `keep` most recent ones, once the
+        snapshot that replaced them has been current for `grace_seconds`, and
+        staging directories left behind by failed publishes. The current
+        snapshot is never removed.
+
+        Returns:
+            list: The ids of the removed snapshots.
+        """
+        now = time.time()
+        current = self.current()
+        snapshot_ids = self.list_snapshots()
+        removed = []
+        for index, snapshot_id in enumerate(snapshot_ids[:max(len(snapshot_ids) - keep, 0)]):
+            successor_path = self.snapshot_path(snapshot_ids[index + 1])
+            if snapshot_id == current or now - os.path.getmtime(successor_path) < grace_seconds:
+                continue
+            shutil.rmtree(self.snapshot_path(snapshot_id), ignore_errors=True)
+            removed.append(snapshot_id)
+
+        for staging_path in glob.glob(os.path.join(self.snapshot_dir, "*.tmp")):
+            if os.path.isdir(staging_path) and now - os.path.getmtime(staging_path) >= grace_seconds:
+                shutil.rmtree(staging_path, ignore_errors=True)
+        return removed
+
+    def connect(self, snapshot_id: str = None) -> duckdb.DuckDBPyConnection:
+        """
+        Opens an in-memory connection with a view per table of a snapshot,
+        named like the warehouse table, so queries run unchanged.
+
+        Parameters:
+            snapshot_id (str, optional): Defaults to the current snapshot.
+
+        Returns:
+            duckdb.DuckDBPyConnection: The connection.
+        """
+        snapshot_id = snapshot_id or self.current()
+        if snapshot_id is None:
+            raise FileNotFoundError(f"No snapshot has been published in {self.snapshot_dir}")
+        snapshot_path = self.snapshot_path(snapshot_id)
+        con = duckdb.connect()
+        for table, entry in self.read_manifest(snapshot_id)["tables"].items():
+            escaped_path = os.path.join(snapshot_path, entry["file"]).replace("'", "''")
+            con.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{escaped_path}')")
+        return con
+
+
+class _InterruptibleQuery:
+    """
+    The connection a query started by an async method runs on, so the event
+    loop can interrupt it on timeout or cancellation while a worker thread
+    executes it.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._con = None
+        self.cancelled = False
+
+    def attach(self, con: duckdb.DuckDBPyConnection) -> bool:
+        # False when the query was cancelled before it started
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._con = con
+            return True
+
+    def detach(self) -> None:
+        with self._lock:
+            self._con = None
+
+    def interrupt(self) -> bool:
+        # True when a query was running and has been interrupted; one that
+        # has not started yet will not start
+        with self._lock:
+            self.cancelled = True
+            if self._con is None:
+                return False
+            self._con.interrupt()
+            return True
 
 
 class DuckdbUtils:
-    def __init__(self, database_path: str = "../data/nyc_parking_violations.db"):
+    OUTPUT_FORMATS = ("pandas", "arrow", "pandas_arrow", "numpy")
+
+    def __init__(
+            self,
+            database_path: str = "../data/nyc_parking_violations.db",
+            pool_size: int = 0,
+            cache_max_bytes: int = 0,
+            dbt_target_path: str = "../nyc_parking_violations/target",
+            query_log_max_entries: int = 0,
+            explain_analyze_threshold_seconds: float = None,
+            snapshot_dir: str = None,
+            async_max_workers: int = None
+            ):
+        """
+        Parameters:
+            database_path (str, optional): Path to the DuckDB database file.
+                Defaults to "../data/nyc_parking_violations.db".
+            pool_size (int, optional): When greater than zero, queries reuse a
+                bounded pool of read-only connections (see
+                `DuckdbConnectionPool`) instead of opening and closing a
+                connection per query. Defaults to 0 (one connection per query).
+            cache_max_bytes (int, optional): When greater than zero, query
+                results are cached in memory up to this many bytes (see
+                `QueryResultCache`). Defaults to 0 (no caching).
+            dbt_target_path (str, optional): dbt target directory whose
+                `run_results.json` is part of the warehouse version stamp.
+                Defaults to "../nyc_parking_violations/target".
+            query_log_max_entries (int, optional): When greater than zero,
+                every query call is recorded in `self.query_log` (see
+                `QueryLog`), keeping this many recent entries. Defaults to 0
+                (no instrumentation).
+            explain_analyze_threshold_seconds (float, optional): With the query
+                log enabled, queries slower than this are run again under
+                `EXPLAIN ANALYZE` and the profile is stored with their entry.
+                Defaults to None (never).
+            snapshot_dir (str, optional): When set, queries read the current
+                published snapshot in this directory (see
+                `WarehouseSnapshots`) instead of the database file, so they
+                never wait on or block a pipeline run. Pooling is not used in
+                this mode. Defaults to None (read the database file).
+            async_max_workers (int, optional): Threads running the queries of
+                the async methods (e.g. `run_sql_query_async`), which bounds
+                how many of them run at once. Defaults to `pool_size` when
+                pooling is enabled, otherwise 4.
+        """
         self.database_path = database_path
-        
+        self.dbt_target_path = dbt_target_path
+        self.snapshots = None
+        self._snapshot_connection = None
+        self._snapshot_lock = threading.Lock()
+        if snapshot_dir is not None:
+            self.snapshots = WarehouseSnapshots(snapshot_dir)
+        self.connection_pool = None
+        if pool_size > 0 and self.snapshots is None:
+            self.connection_pool = DuckdbConnectionPool(
+                database_path,
+                max_connections=pool_size
+            )
+        self.query_cache = None
+        if cache_max_bytes > 0:
+            self.query_cache = QueryResultCache(max_bytes=cache_max_bytes)
+        self.query_log = None
+        if query_log_max_entries > 0:
+            self.query_log = QueryLog(max_entries=query_log_max_entries)
+        self.explain_analyze_threshold_seconds = explain_analyze_threshold_seconds
+        self.async_max_workers = async_max_workers or pool_size or 4
+        self._async_executor = None
+        self._async_gate = None
+        self._async_readers = 0
+        self._async_writer_active = False
+
+    def get_warehouse_version(self) -> tuple:
+        """
+        Returns a stamp that changes whenever the warehouse is rebuilt: the
+        modification time and size of the database file and its write-ahead
+        log, plus the modification time of dbt's `run_results.json` (rewritten
+        with a new `generated_at` on every `dbt run`). Stat calls are used
+        rather than parsing files so the stamp is cheap to take per query.
+
+        When reading snapshots, the stamp is the current snapshot id instead.
+        """
+        if self.snapshots is not None:
+            return ("snapshot", self.snapshots.current())
+        version = []
+        for path in (
+                self.database_path,
+                f"{self.database_path}.wal",
+                os.path.join(self.dbt_target_path, "run_results.json")
+                ):
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                version.append(None)
+        return tuple(version)
+
+    def cache_stats(self) -> dict:
+        """
+        Returns the result cache counters, or an empty dict when caching is
+        disabled.
+        """
+        if self.query_cache is None:
+            return {}
+        return self.query_cache.stats()
+
+    @contextmanager
+    def exclusive_write_access(self):
+        """
+        Releases any pooled read-only connections for the duration of the
+        block so a writer can take the database file lock. Use it around
+        `dbt run` when pooling is enabled; in the default one-shot mode it is a
+        no-op.
+
+        Example:
+            >>> duckdb_utils = DuckdbUtils(pool_size=4)
+            >>> with duckdb_utils.exclusive_write_access():
+            ...     subprocess.run(["dbt", "run"], cwd="../nyc_parking_violations")
+        """
+        if self.connection_pool is None:
+            yield
+            return
+        with self.connection_pool.exclusive_writer():
+            yield
+
+    def close(self) -> None:
+        """
+        Closes pooled connections, if pooling is enabled, the connection to
+        the current snapshot, if reading snapshots, and the threads of the
+        async methods.
+        """
+        if self.connection_pool is not None:
+            self.connection_pool.close()
+        if self._async_executor is not None:
+            self._async_executor.shutdown(wait=False, cancel_futures=True)
+            self._async_executor = None
+        with self._snapshot_lock:
+            if self._snapshot_connection is not None:
+                self._snapshot_connection[1].close()
+                self._snapshot_connection = None
+
+    def publish_snapshot(
+            self,
+            snapshot_dir: str = "../data/snapshots",
+            tables: list = None,
+            keep: int = 3,
+            grace_seconds: float = 300.0
+            ) -> str:
+        """
+        Publishes the gold tables of the database file as a new snapshot and
+        makes it the one readers see (see `WarehouseSnapshots.publish`). Call
+        it after a successful pipeline run.
+
+        Parameters:
+            snapshot_dir (str, optional): Directory holding the snapshots.
+                Defaults to "../data/snapshots".
+            tables (list, optional): Tables to export. Defaults to the gold
+                tables.
+            keep (int, optional): Snapshots kept after publishing.
+            grace_seconds (float, optional): How long a superseded snapshot
+                stays readable before it may be removed.
+
+        Returns:
+            str: The id of the new snapshot.
+
+        Example:
+            >>> subprocess.run(["dbt", "run"], cwd="../nyc_parking_violations", check=True)
+            >>> DuckdbUtils().publish_snapshot()
+        """
+        if self.snapshots is not None:
+            raise ValueError("Snapshots are published from the database file, not from a snapshot reader")
+        with self._connection() as con:
+            return WarehouseSnapshots(snapshot_dir).publish(
+                con, tables=tables, keep=keep, grace_seconds=grace_seconds
+            )
+
+    @staticmethod
+    def partitioned_table(table_name: str, partition_root: str = "../data") -> str:
+        """
+        Returns a `read_parquet` expression over the month-partitioned copy of
+        a silver table written by dbt (e.g. silver_valid_violation_tickets
+        is written to <partition_root>/silver_valid_violation_tickets_partitioned/).
+        Reading the files does not take the lock on the database file, and
+        filters on `issue_year` and `issue_month` with constant values skip
+        the other months' files.
+
+        Parameters:
+            table_name (str): The silver table, e.g. "silver_valid_violation_tickets".
+            partition_root (str, optional): The dbt `partition_root` directory.
+                Defaults to "../data".
+
+        Returns:
+            str: The expression to use in a FROM clause.
+
+        Example:
+            >>> tickets = DuckdbUtils.partitioned_table("silver_valid_violation_tickets")
+            >>> DuckdbUtils(database_path=":memory:").run_sql_query_and_return_df(
+            ...     f"SELECT COUNT(*) FROM {tickets} "
+            ...     "WHERE issue_year = 2023 AND issue_month BETWEEN 4 AND 6"
+            ... )
+        """
+        path = os.path.join(partition_root, f"{table_name}_partitioned", "*", "*", "*.parquet")
+        escaped_path = path.replace("'", "''")
+        return f"read_parquet('{escaped_path}', hive_partitioning = true)"
+
+    def _open_connection(self, read_only: bool = False) -> duckdb.DuckDBPyConnection:
+        # A new connection to the database file, or, when reading snapshots, a
+        # cursor on a shared in-memory connection with views over the current
+        # snapshot. That connection is rebuilt when CURRENT moves, so queries
+        # started before a publish finish on the snapshot they started on.
+        if self.snapshots is None:
+            return duckdb.connect(database=self.database_path, read_only=read_only)
+        snapshot_id = self.snapshots.current()
+        with self._snapshot_lock:
+            if self._snapshot_connection is None or self._snapshot_connection[0] != snapshot_id:
+                self._snapshot_connection = (snapshot_id, self.snapshots.connect(snapshot_id))
+            return self._snapshot_connection[1].cursor()
+
     def run_sql_query_and_return_df(
             self,
             query: str,
-            database_path: str = "data/nyc_parking_violations.db"
-            ) -> pd.DataFrame:
+            database_path: str = "data/nyc_parking_violations.db",
+            label: str = None
+            ) -> "pd.DataFrame":
         """
         Executes a provided SQL query against a DuckDB database and returns the
         results as a Pandas DataFrame.
@@ -20,10 +859,22 @@ class DuckdbUtils:
         connection for each query execution and closes it immediately afterward,
         enabling sequential access by multiple applications or processes.
 
+        When the class was created with `pool_size` > 0, the query instead runs
+        on a pooled read-only connection that stays open between calls. When it
+        was created with `cache_max_bytes` > 0, results are served from the
+        result cache until the warehouse version stamp changes. When it was
+        created with `snapshot_dir`, the query reads the current published
+        snapshot instead of the database file, so a `dbt run` holding the
+        write lock neither fails nor stalls it. When it was created with
+        `query_log_max_entries` > 0, the call is recorded in the query log
+        under `label`.
+
         Parameters:
             query (str): The SQL query to execute.
             database_path (str, optional): Path to the DuckDB database file.
                 Defaults to "data/nyc_parking_violations.db".
+            label (str, optional): Name the call is recorded under in the
+                query log, e.g. "metric_a".
 
         Returns:
             pd.DataFrame: DataFrame containing the query results.
@@ -34,23 +885,674 @@ class DuckdbUtils:
             ... )
             >>> print(df.head())
         """
+        return self.run_sql_query(query, output_format="pandas", label=label)
+
+    def run_sql_query(
+            self,
+            query: str,
+            output_format: str = "pandas",
+            label: str = None
+            ):
+        """
+        Executes a provided SQL query and returns the results in the requested
+        format. Connection handling, caching and instrumentation work the same
+        way as in `run_sql_query_and_return_df`.
+
+        Formats other than "pandas" skip the conversion to NumPy-backed object
+        columns, which dominates the cost of fetching string-heavy tables:
+            - "pandas": pd.DataFrame with NumPy-backed dtypes.
+            - "arrow": pyarrow.Table, handed over from DuckDB without copying.
+            - "pandas_arrow": pd.DataFrame with Arrow-backed dtypes
+              (pd.ArrowDtype), built from the Arrow result without copying.
+            - "numpy": dict mapping column names to NumPy arrays; cheapest for
+              small numeric-only results such as single-value metrics.
+
+        The "arrow" and "pandas_arrow" formats require pyarrow.
+
+        Parameters:
+            query (str): The SQL query to execute.
+            output_format (str, optional): One of OUTPUT_FORMATS. Defaults to
+                "pandas".
+            label (str, optional): Name the call is recorded under in the
+                query log.
+
+        Returns:
+            pd.DataFrame | pyarrow.Table | dict: The query results.
+
+        Example:
+            >>> table = duckdb_utils.run_sql_query(
+            ...     "SELECT * FROM gold_latest_tickets_90_days",
+            ...     output_format="arrow"
+            ... )
+            >>> table.num_rows
+        """
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unknown output_format '{output_format}', "
+                f"expected one of {self.OUTPUT_FORMATS}"
+            )
+
+        if self.query_cache is None:
+            return self._execute_sql_query(query, output_format, label)
+
+        cache_key = self.query_cache.make_key(
+            query,
+            self.get_warehouse_version(),
+            output_format
+        )
+        result = self.query_cache.get(cache_key)
+        if result is None:
+            result = self._execute_sql_query(query, output_format, label)
+            self.query_cache.put(cache_key, result)
+        else:
+            self._record_cache_hit(query, output_format, label, result)
+        return result
+
+    @staticmethod
+    def _fetch_result(con: duckdb.DuckDBPyConnection, output_format: str):
+        # Converts the result of the query last executed on `con`
+        if output_format == "pandas":
+            return con.fetchdf()
+        if output_format == "numpy":
+            return con.fetchnumpy()
+        table = con.fetch_arrow_table()
+        if output_format == "arrow":
+            return table
+        import pandas as pd
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    @staticmethod
+    def _new_query_stats(query: str, output_format: str, label: str) -> dict:
+        return {
+            "label": label,
+            "query": QueryResultCache.normalize_sql(query),
+            "output_format": output_format,
+            "started_at": datetime.now().isoformat(timespec="milliseconds"),
+            "status": "ok",
+            "cache_hit": False,
+            "connect_seconds": 0.0,
+            "execute_seconds": 0.0,
+            "convert_seconds": 0.0,
+            "total_seconds": 0.0,
+            "rows": 0,
+            "bytes": 0,
+            "retries": 0,
+            "errors": [],
+            "explain_analyze": None,
+        }
+
+    def _fetch_and_time(self, con, query: str, output_format: str, stats: dict):
+        start = time.perf_counter()
+        con.execute(query)
+        executed = time.perf_counter()
+        result = self._fetch_result(con, output_format)
+        converted = time.perf_counter()
+        stats["execute_seconds"] += executed - start
+        stats["convert_seconds"] += converted - executed
+
+        threshold = self.explain_analyze_threshold_seconds
+        if (self.query_log is not None and threshold is not None
+                and converted - start >= threshold):
+            # Profiles a second run of the query; its cost is not counted in
+            # the timings above
+            try:
+                stats["explain_analyze"] = con.execute(f"EXPLAIN ANALYZE {query}").fetchall()[0][1]
+            except Exception as e:
+                stats["explain_analyze"] = f"EXPLAIN ANALYZE failed: {str(e)}"
+        return result
+
+    def _record_query(self, stats: dict, result, start: float) -> None:
+        if self.query_log is None:
+            return
+        stats["total_seconds"] = time.perf_counter() - start
+        if result is not None:
+            stats["rows"] = QueryResultCache._result_rows(result)
+            stats["bytes"] = QueryResultCache._result_size(result)
+        self.query_log.record(stats)
+
+    def _record_cache_hit(self, query: str, output_format: str, label: str, result) -> None:
+        if self.query_log is None:
+            return
+        stats = self._new_query_stats(query, output_format, label)
+        stats["cache_hit"] = True
+        self._record_query(stats, result, time.perf_counter())
+
+    def _run_one_shot_sql_query(self, query: str, output_format: str, stats: dict):
+        start = time.perf_counter()
+        con = self._open_connection()
+        stats["connect_seconds"] += time.perf_counter() - start
+        try:
+            return self._fetch_and_time(con, query, output_format, stats)
+        finally:
+            con.close()
+
+    def _run_pooled_sql_query_once(self, query: str, output_format: str, stats: dict):
+        start = time.perf_counter()
+        with self.connection_pool.connection() as con:
+            stats["connect_seconds"] += time.perf_counter() - start
+            return self._fetch_and_time(con, query, output_format, stats)
+
+    def _execute_sql_query(self, query: str, output_format: str = "pandas", label: str = None):
+        # Runs the query once and retries once on failure: on a fresh
+        # connection in one-shot mode, or on a pooled connection (the pool
+        # health checks the failed one, so the retry runs on a known good one)
+        if self.connection_pool is not None:
+            run_once = self._run_pooled_sql_query_once
+        else:
+            run_once = self._run_one_shot_sql_query
+
+        stats = self._new_query_stats(query, output_format, label)
+        start = time.perf_counter()
+        result = None
         try:
-            con = duckdb.connect(database=self.database_path)
-            result = con.sql(query).df()
-        except Exception as e:
             try:
+                result = run_once(query, output_format, stats)
+            except Exception as e:
+                stats["errors"].append(str(e))
+                stats["retries"] += 1
+                try:
+                    result = run_once(query, output_format, stats)
+                except Exception as e2:
+                    stats["errors"].append(str(e2))
+                    stats["status"] = "error"
+                    print(f"Error executing SQL query: {str(e)}")
+                    print(f"Retry failed: {str(e2)}")
+                    raise
+        finally:
+            self._record_query(stats, result, start)
+        return result
+
+    def run_sql_queries_and_return_dfs(
+            self,
+            queries: dict,
+            max_workers: int = None,
+            output_formats: dict = None
+            ) -> dict:
+        """
+        Executes several SQL queries concurrently and returns their results
+        keyed the same way as `queries`.
+
+        With pooling enabled every query runs on its own pooled read-only
+        connection, so at most `pool_size` queries run at once. Otherwise a
+        single read-only connection is opened for the whole batch and each
+        query runs on its own cursor, which DuckDB executes in parallel; as in
+        `run_sql_query`, a failed query is retried once. Cached results are
+        returned without touching the database. With the query log enabled,
+        each query is recorded under its name.
+
+        Parameters:
+            queries (dict): Mapping of a name (e.g. "metric_a") to SQL text.
+            max_workers (int, optional): Number of worker threads. Defaults to
+                one per query.
+            output_formats (dict, optional): Mapping of a name to one of
+                OUTPUT_FORMATS (see `run_sql_query`). Names that are not listed
+                are returned as "pandas" DataFrames.
+
+        Returns:
+            dict: Mapping of each name to its results.
+
+        Example:
+            >>> dfs = duckdb_utils.run_sql_queries_and_return_dfs({
+            ...     "counties": "SELECT * FROM gold_tickets_by_county_90_days",
+            ...     "agencies": "SELECT * FROM gold_tickets_by_agency_90_days",
+            ... })
+            >>> dfs["counties"].head()
+        """
+        output_formats = {
+            name: (output_formats or {}).get(name, "pandas") for name in queries
+        }
+        for output_format in output_formats.values():
+            if output_format not in self.OUTPUT_FORMATS:
+                raise ValueError(
+                    f"Unknown output_format '{output_format}', "
+                    f"expected one of {self.OUTPUT_FORMATS}"
+                )
+
+        results = {}
+        pending = {}
+        cache_keys = {}
+        if self.query_cache is not None:
+            warehouse_version = self.get_warehouse_version()
+            for name, query in queries.items():
+                cache_keys[name] = self.query_cache.make_key(
+                    query,
+                    warehouse_version,
+                    output_formats[name]
+                )
+                cached = self.query_cache.get(cache_keys[name])
+                if cached is None:
+                    pending[name] = query
+                else:
+                    self._record_cache_hit(query, output_formats[name], name, cached)
+                    results[name] = cached
+        else:
+            pending = dict(queries)
+
+        if not pending:
+            return results
+
+        max_workers = max_workers or len(pending)
+        if self.connection_pool is not None:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    name: executor.submit(
+                        self._execute_sql_query,
+                        query,
+                        output_formats[name],
+                        name
+                    )
+                    for name, query in pending.items()
+                }
+                fetched = {name: future.result() for name, future in futures.items()}
+        else:
+            # Read-only, so the batch does not take the writer lock on the
+            # database file (e.g. while `dbt run` is waiting for it). Opening
+            # is retried once, like a query in `_execute_sql_query`.
+            try:
+                con = self._open_connection(read_only=True)
+            except Exception as e:
+                print(f"Error opening a connection for the batch, retrying: {str(e)}")
+                con = self._open_connection(read_only=True)
+            try:
+                def run_once_on_cursor(query, output_format, stats):
+                    # The shared connection is opened once for the batch, so
+                    # the connect phase here is just the cursor creation
+                    start = time.perf_counter()
+                    cursor = con.cursor()
+                    stats["connect_seconds"] += time.perf_counter() - start
+                    try:
+                        return self._fetch_and_time(cursor, query, output_format, stats)
+                    finally:
+                        cursor.close()
+
+                def run_on_cursor(name, query, output_format):
+                    # Same retry policy as `_execute_sql_query`: one retry, on
+                    # a fresh cursor
+                    stats = self._new_query_stats(query, output_format, name)
+                    start = time.perf_counter()
+                    result = None
+                    try:
+                        try:
+                            result = run_once_on_cursor(query, output_format, stats)
+                        except Exception as e:
+                            stats["errors"].append(str(e))
+                            stats["retries"] += 1
+                            try:
+                                result = run_once_on_cursor(query, output_format, stats)
+                            except Exception as e2:
+                                stats["errors"].append(str(e2))
+                                stats["status"] = "error"
+                                print(f"Error executing SQL query: {str(e)}")
+                                print(f"Retry failed: {str(e2)}")
+                                raise
+                        return result
+                    finally:
+                        self._record_query(stats, result, start)
+
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {
+                        name: executor.submit(run_on_cursor, name, query, output_formats[name])
+                        for name, query in pending.items()
+                    }
+                    fetched = {}
+                    for name, future in futures.items():
+                        try:
+                            fetched[name] = future.result()
+                        except Exception as e:
+                            print(f"Error executing SQL query for {name}: {str(e)}")
+                            raise
+            finally:
                 con.close()
-                con = duckdb.connect(database=self.database_path)
-                result = con.sql(query).df()
-            except Exception as e2:
-                print(f"Error executing SQL query: {str(e)}")
-                raise
+
+        for name, result in fetched.items():
+            if self.query_cache is not None:
+                self.query_cache.put(cache_keys[name], result)
+            results[name] = result
+        return {name: results[name] for name in queries}
+
+    def _get_async_executor(self) -> ThreadPoolExecutor:
+        if self._async_executor is None:
+            self._async_executor = ThreadPoolExecutor(
+                max_workers=self.async_max_workers,
+                thread_name_prefix="duckdb-async"
+            )
+        return self._async_executor
+
+    def _get_async_gate(self):
+        # The condition guarding async readers and writers. asyncio primitives
+        # belong to one event loop, so a new one is made when the class is
+        # used from another loop (e.g. a second asyncio.run()).
+        import asyncio
+        loop = asyncio.get_running_loop()
+        if self._async_gate is None or self._async_gate[0] is not loop:
+            self._async_gate = (loop, asyncio.Condition())
+            self._async_readers = 0
+            self._async_writer_active = False
+        return self._async_gate[1]
+
+    @asynccontextmanager
+    async def _async_read_access(self):
+        # Async queries wait while an async writer holds the database file
+        gate = self._get_async_gate()
+        async with gate:
+            await gate.wait_for(lambda: not self._async_writer_active)
+            self._async_readers += 1
+        try:
+            yield
         finally:
-            # This block always executes, whether an exception occurred or not
-            con.close()
-        
+            async with gate:
+                self._async_readers -= 1
+                gate.notify_all()
+
+    @asynccontextmanager
+    async def exclusive_write_access_async(self):
+        """
+        Async counterpart of `exclusive_write_access`: waits for running async
+        queries to finish, holds back new ones and, with pooling enabled,
+        releases the pooled read-only connections, so a writer such as
+        `dbt run` can take the database file lock. The waiting happens
+        without blocking the event loop.
+
+        Example:
+            >>> async with duckdb_utils.exclusive_write_access_async():
+            ...     process = await asyncio.create_subprocess_exec(
+            ...         "dbt", "run", cwd="../nyc_parking_violations"
+            ...     )
+            ...     await process.wait()
+        """
+        import asyncio
+        gate = self._get_async_gate()
+        async with gate:
+            await gate.wait_for(lambda: not self._async_writer_active)
+            self._async_writer_active = True
+        try:
+            async with gate:
+                await gate.wait_for(lambda: self._async_readers == 0)
+            if self.connection_pool is None:
+                yield
+            else:
+                # The handoff blocks while checked out connections come back,
+                # so it runs on the default executor, not on the async
+                # workers, which may themselves be waiting for a connection
+                writer = self.connection_pool.exclusive_writer()
+                await asyncio.to_thread(writer.__enter__)
+                try:
+                    yield
+                finally:
+                    await asyncio.to_thread(writer.__exit__, None, None, None)
+        finally:
+            async with gate:
+                self._async_writer_active = False
+                gate.notify_all()
+
+    def _run_interruptible_sql_query(self, query: str, output_format: str, label: str, handle):
+        # Runs on an async worker thread. The connection is registered with
+        # `handle` so the event loop can interrupt the query.
+        stats = self._new_query_stats(query, output_format, label)
+        start = time.perf_counter()
+        result = None
+        if handle.cancelled:
+            return None
+        try:
+            with self._connection() as con:
+                stats["connect_seconds"] = time.perf_counter() - start
+                if not handle.attach(con):
+                    stats["status"] = "cancelled"
+                    return None
+                try:
+                    result = self._fetch_and_time(con, query, output_format, stats)
+                finally:
+                    handle.detach()
+            return result
+        except duckdb.InterruptException as e:
+            stats["errors"].append(str(e))
+            stats["status"] = "cancelled"
+            raise
+        except Exception as e:
+            stats["errors"].append(str(e))
+            stats["status"] = "error"
+            print(f"Error executing SQL query: {str(e)}")
+            raise
+        finally:
+            self._record_query(stats, result, start)
+
+    async def run_sql_query_async(
+            self,
+            query: str,
+            output_format: str = "pandas",
+            label: str = None,
+            timeout: float = None
+            ):
+        """
+        Async counterpart of `run_sql_query`: the query runs on a bounded pool
+        of `async_max_workers` threads, so the event loop (e.g. an async web
+        handler or a Jupyter notebook) keeps serving other work meanwhile.
+        Caching, pooling, snapshots and the query log work as in the blocking
+        methods; unlike them, a failed query is not retried.
+
+        If the query takes longer than `timeout` seconds, or the awaiting
+        task is cancelled, the query is interrupted in DuckDB (not left
+        running in the background) and its connection is returned before
+        the error propagates. Queries wait while
+        `exclusive_write_access_async` hands the database file to a writer.
+
+        Parameters:
+            query (str): The SQL query to execute.
+            output_format (str, optional): One of OUTPUT_FORMATS. Defaults to
+                "pandas".
+            label (str, optional): Name the call is recorded under in the
+                query log.
+            timeout (float, optional): Seconds before the query is
+                interrupted. Defaults to None (no limit).
+
+        Returns:
+            pd.DataFrame | pyarrow.Table | dict: The query results.
+
+        Raises:
+            TimeoutError: The query ran longer than `timeout`.
+
+        Example:
+            >>> df = await duckdb_utils.run_sql_query_async(
+            ...     "SELECT * FROM gold_tickets_by_county_90_days",
+            ...     timeout=5
+            ... )
+        """
+        import asyncio
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unknown output_format '{output_format}', "
+                f"expected one of {self.OUTPUT_FORMATS}"
+            )
+
+        cache_key = None
+        if self.query_cache is not None:
+            cache_key = self.query_cache.make_key(
+                query,
+                self.get_warehouse_version(),
+                output_format
+            )
+            result = self.query_cache.get(cache_key)
+            if result is not None:
+                self._record_cache_hit(query, output_format, label, result)
+                return result
+
+        handle = _InterruptibleQuery()
+        async with self._async_read_access():
+            future = asyncio.get_running_loop().run_in_executor(
+                self._get_async_executor(),
+                self._run_interruptible_sql_query,
+                query,
+                output_format,
+                label,
+                handle
+            )
+            try:
+                # shield() keeps wait_for from cancelling the executor future,
+                # which could not stop a query that has already started
+                result = await asyncio.wait_for(asyncio.shield(future), timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if handle.interrupt():
+                    # Wait for the interrupted query to give its connection back
+                    try:
+                        await future
+                    except Exception:
+                        pass
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                print(f"SQL query timed out after {timeout} s and was interrupted")
+                raise TimeoutError(f"SQL query timed out after {timeout} s") from None
+
+        if cache_key is not None:
+            self.query_cache.put(cache_key, result)
         return result
 
+    async def run_sql_queries_async(
+            self,
+            queries: dict,
+            output_formats: dict = None,
+            timeout: float = None
+            ) -> dict:
+        """
+        Async counterpart of `run_sql_queries_and_return_dfs`: runs several
+        SQL queries concurrently (at most `async_max_workers` at once) and
+        returns their results keyed the same way as `queries`. If one query
+        fails, the others are cancelled and interrupted, and the error is
+        raised.
+
+        Parameters:
+            queries (dict): Mapping of a name (e.g. "metric_a") to SQL text.
+            output_formats (dict, optional): Mapping of a name to one of
+                OUTPUT_FORMATS. Names that are not listed are returned as
+                "pandas" DataFrames.
+            timeout (float, optional): Seconds before each query is
+                interrupted. Defaults to None (no limit).
+
+        Returns:
+            dict: Mapping of each name to its results.
+
+        Example:
+            >>> dfs = await duckdb_utils.run_sql_queries_async({
+            ...     "counties": "SELECT * FROM gold_tickets_by_county_90_days",
+            ...     "agencies": "SELECT * FROM gold_tickets_by_agency_90_days",
+            ... }, timeout=30)
+        """
+        import asyncio
+        tasks = {
+            name: asyncio.ensure_future(self.run_sql_query_async(
+                query,
+                output_format=(output_formats or {}).get(name, "pandas"),
+                label=name,
+                timeout=timeout
+            ))
+            for name, query in queries.items()
+        }
+        try:
+            await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            pending = [task for task in tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        for name, task in tasks.items():
+            if not task.cancelled() and task.exception() is not None:
+                print(f"Error executing SQL query for {name}: {str(task.exception())}")
+                raise task.exception()
+        return {name: task.result() for name, task in tasks.items()}
+
+    @contextmanager
+    def _connection(self):
+        # A connection held for the duration of the block: pooled when pooling
+        # is enabled, otherwise opened for the block (on the current snapshot
+        # when reading snapshots) and closed afterwards.
+        if self.connection_pool is not None:
+            with self.connection_pool.connection() as con:
+                yield con
+            return
+        con = self._open_connection()
+        try:
+            yield con
+        finally:
+            con.close()
+
+    def iter_sql_query_batches(
+            self,
+            query: str,
+            batch_size: int = 100_000,
+            output_format: str = "arrow"
+            ):
+        """
+        Executes a SQL query and yields its results in batches of up to
+        `batch_size` rows instead of materializing everything in memory.
+
+        The connection is only held while the caller iterates: it is opened on
+        the first batch and closed (or returned to the pool) once the results
+        are exhausted or the generator is closed early.
+
+        Parameters:
+            query (str): The SQL query to execute.
+            batch_size (int, optional): Maximum rows per batch. Defaults to
+                100,000.
+            output_format (str, optional): "arrow" yields pyarrow.RecordBatch
+                objects, "pandas" yields DataFrame chunks. Defaults to "arrow".
+
+        Yields:
+            pyarrow.RecordBatch | pd.DataFrame: The next batch of results.
+
+        Example:
+            >>> for chunk in duckdb_utils.iter_sql_query_batches(
+            ...     "SELECT * FROM gold_latest_tickets_90_days",
+            ...     output_format="pandas"
+            ... ):
+            ...     process(chunk)
+        """
+        if output_format not in ("arrow", "pandas"):
+            raise ValueError("output_format must be 'arrow' or 'pandas'")
+
+        with self._connection() as con:
+            reader = con.execute(query).fetch_record_batch(batch_size)
+            for batch in reader:
+                if output_format == "pandas":
+                    yield batch.to_pandas()
+                else:
+                    yield batch
+
+    def export_sql_query(
+            self,
+            query: str,
+            output_path: str,
+            file_format: str = "parquet"
+            ) -> None:
+        """
+        Streams the results of a SQL query straight into a Parquet or CSV file
+        using DuckDB's COPY, so results larger than memory never pass through
+        Python.
+
+        Parameters:
+            query (str): The SQL query to execute.
+            output_path (str): Path of the file to write.
+            file_format (str, optional): "parquet" (zstd compressed) or "csv"
+                (with a header row). Defaults to "parquet".
+
+        Example:
+            >>> duckdb_utils.export_sql_query(
+            ...     "SELECT * FROM gold_latest_tickets_90_days",
+            ...     "latest_tickets_90_days.parquet"
+            ... )
+        """
+        copy_options = {
+            "parquet": "FORMAT PARQUET, COMPRESSION ZSTD",
+            "csv": "FORMAT CSV, HEADER",
+        }
+        if file_format not in copy_options:
+            raise ValueError("file_format must be 'parquet' or 'csv'")
+
+        query = query.strip().rstrip(";")
+        escaped_path = output_path.replace("'", "''")
+        with self._connection() as con:
+            con.execute(
+                f"COPY ({query}) TO '{escaped_path}' ({copy_options[file_format]})"
+            )
+
     def load_csv_file_to_db(
             self,
             csv_path: str,
@@ -62,6 +1564,14 @@ class DuckdbUtils:
         This function creates a new table in the DuckDB database with the name
         specified in the csv_path parameter. It then reads the CSV file and
         inserts the data into the table.
+
+        The violations file is loaded through `load_violation_files_to_db`, so
+        its schema is sniffed once and pinned for later loads.
+
+        This replaces the raw tables completely, while a plain `dbt run` only
+        reprocesses the last `silver_lookback_days` of the incremental silver
+        models. Follow it with `dbt run --full-refresh`; the lookback path is
+        meant for `load_violation_files_incrementally`.
         """
         sql_query_import_1 = f"""
         CREATE OR REPLACE TABLE parking_violation_codes AS
@@ -73,31 +1583,361 @@ class DuckdbUtils:
         )
         """
 
-        sql_query_import_2 = f"""
-        CREATE OR REPLACE TABLE parking_violations_2023 AS
-        SELECT *
-        FROM read_csv_auto(
-        '{csv_path}/parking_violations_issued_fiscal_year_2023_sample.csv',
-        normalize_names=True
+        with self.exclusive_write_access():
+            try:
+                con = duckdb.connect(database=self.database_path)
+                con.sql(sql_query_import_1)
+            except Exception as e:
+                try:
+                    con.close()
+                    con = duckdb.connect(database=self.database_path)
+                    con.sql(sql_query_import_1)
+                except Exception as e2:
+                    print(f"Error executing SQL query: {str(e)}")
+                    raise
+            finally:
+                con.close()
+
+        self.load_violation_files_to_db(
+            f"{csv_path}/parking_violations_issued_fiscal_year_2023_sample.csv"
         )
+
+        return None
+
+    @staticmethod
+    def _resolve_violation_files(source: str, file_pattern: str) -> list:
+        if os.path.isdir(source):
+            source = os.path.join(source, file_pattern)
+        files = sorted(glob.glob(source))
+        if not files:
+            raise FileNotFoundError(f"No violation files found for '{source}'")
+        return files
+
+    @staticmethod
+    def _sql_string(value: str) -> str:
+        return "'" + value.replace("'", "''") + "'"
+
+    def get_pinned_csv_schema(self, csv_file: str, schema_path: str) -> dict:
         """
+        Returns the pinned schema for a set of violation CSV files, sniffing it
+        from `csv_file` and caching it as JSON at `schema_path` on first use.
+
+        The cached schema holds the normalized column names and types plus the
+        delimiter and date/timestamp formats, so later loads can skip DuckDB's
+        CSV sniffing entirely. Edit or delete the JSON file to change it.
+        """
+        if os.path.exists(schema_path):
+            with open(schema_path) as schema_file:
+                return json.load(schema_file)
+
+        con = duckdb.connect()
         try:
+            sniffed = con.execute(
+                "SELECT Delimiter, DateFormat, TimestampFormat FROM sniff_csv(?)",
+                [csv_file]
+            ).fetchone()
+            described = con.execute(
+                f"DESCRIBE SELECT * FROM read_csv_auto({self._sql_string(csv_file)}, normalize_names=True)"
+            ).fetchall()
+        finally:
+            con.close()
+
+        schema = {
+            "columns": {name: column_type for name, column_type, *_ in described},
+            "delimiter": sniffed[0],
+            "dateformat": sniffed[1],
+            "timestampformat": sniffed[2],
+        }
+        with open(schema_path, "w") as schema_file:
+            json.dump(schema, schema_file, indent=2)
+        return schema
+
+    def _read_csv_with_schema(self, csv_file: str, schema: dict) -> str:
+        columns = ", ".join(
+            f"{self._sql_string(name)}: {self._sql_string(column_type)}"
+            for name, column_type in schema["columns"].items()
+        )
+        options = [
+            f"columns={{{columns}}}",
+            "header=true",
+            "auto_detect=false",
+            f"delim={self._sql_string(schema['delimiter'])}",
+        ]
+        for option in ("dateformat", "timestampformat"):
+            if schema.get(option):
+                options.append(f"{option}={self._sql_string(schema[option])}")
+        return f"read_csv({self._sql_string(csv_file)}, {', '.join(options)})"
+
+    def _stage_csv_as_parquet(
+            self,
+            con: duckdb.DuckDBPyConnection,
+            csv_file: str,
+            schema: dict,
+            staging_path: str,
+            schema_path: str
+            ) -> str:
+        # Re-stage only when the CSV or the pinned schema is newer than the
+        # staged Parquet file, so repeat loads skip CSV parsing entirely.
+        parquet_file = os.path.join(
+            staging_path,
+            os.path.splitext(os.path.basename(csv_file))[0] + ".parquet"
+        )
+        if (not os.path.exists(parquet_file)
+                or os.path.getmtime(parquet_file) < os.path.getmtime(csv_file)
+                or os.path.getmtime(parquet_file) < os.path.getmtime(schema_path)):
+            con.execute(
+                f"COPY (SELECT * FROM {self._read_csv_with_schema(csv_file, schema)}) "
+                f"TO {self._sql_string(parquet_file)} (FORMAT PARQUET, COMPRESSION ZSTD)"
+            )
+        return parquet_file
+
+    def load_violation_files_to_db(
+            self,
+            source: str,
+            table_name: str = "parking_violations_2023",
+            file_pattern: str = "parking_violations*.csv",
+            schema_path: str = None,
+            stage_parquet: bool = False,
+            staging_path: str = None,
+            max_workers: int = None
+            ) -> list:
+        """
+        Bulk loads one or many parking violation CSV files into a DuckDB table
+        using a pinned schema and parallel ingestion.
+
+        Instead of sniffing every file with `read_csv_auto`, the schema is
+        learned once (see `get_pinned_csv_schema`) and cached next to the data.
+        Files are then inserted in parallel, each on its own cursor, into a
+        staging table that replaces `table_name` only once every file loaded,
+        so a failed load never leaves a partial table behind.
+
+        Parameters:
+            source (str): A directory, a glob pattern or a single CSV file.
+            table_name (str, optional): Table to (re)create. Defaults to
+                "parking_violations_2023".
+            file_pattern (str, optional): Glob used when `source` is a
+                directory. Defaults to "parking_violations*.csv".
+            schema_path (str, optional): Where the pinned schema is cached.
+                Defaults to "parking_violations_schema.json" next to the data.
+            stage_parquet (bool, optional): Convert each CSV to a zstd Parquet
+                file once and load from Parquet afterwards. Defaults to False.
+            staging_path (str, optional): Directory for staged Parquet files.
+                Defaults to "parquet_staging" next to the data.
+            max_workers (int, optional): Number of files loaded in parallel.
+                Defaults to the number of CPUs.
+
+        Returns:
+            list: One dict per file with its rows, seconds and rows_per_second.
+
+        Example:
+            >>> duckdb_utils.load_violation_files_to_db(
+            ...     "../data/clean_data",
+            ...     stage_parquet=True
+            ... )
+        """
+        files = self._resolve_violation_files(source, file_pattern)
+        data_dir = os.path.dirname(os.path.abspath(files[0]))
+        schema_path = schema_path or os.path.join(data_dir, "parking_violations_schema.json")
+        schema = self.get_pinned_csv_schema(files[0], schema_path)
+        if stage_parquet:
+            staging_path = staging_path or os.path.join(data_dir, "parquet_staging")
+            os.makedirs(staging_path, exist_ok=True)
+
+        loading_table = f"{table_name}__loading"
+        column_definitions = ", ".join(
+            f'"{name}" {column_type}' for name, column_type in schema["columns"].items()
+        )
+
+        def load_file(con, csv_file):
+            cursor = con.cursor()
+            try:
+                started = time.perf_counter()
+                if stage_parquet:
+                    parquet_file = self._stage_csv_as_parquet(
+                        cursor, csv_file, schema, staging_path, schema_path
+                    )
+                    relation = f"read_parquet({self._sql_string(parquet_file)})"
+                else:
+                    relation = self._read_csv_with_schema(csv_file, schema)
+                rows = cursor.execute(
+                    f"INSERT INTO {loading_table} SELECT * FROM {relation}"
+                ).fetchone()[0]
+                seconds = time.perf_counter() - started
+            finally:
+                cursor.close()
+            return {
+                "file": csv_file,
+                "rows": rows,
+                "seconds": seconds,
+                "rows_per_second": rows / seconds if seconds else float("inf"),
+            }
+
+        with self.exclusive_write_access():
             con = duckdb.connect(database=self.database_path)
-            con.sql(sql_query_import_1)
-            con.sql(sql_query_import_2)
-        except Exception as e:
             try:
+                con.execute(f"CREATE OR REPLACE TABLE {loading_table} ({column_definitions})")
+                try:
+                    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+                        load_stats = list(executor.map(lambda csv_file: load_file(con, csv_file), files))
+                except Exception as e:
+                    print(f"Error loading violation files: {str(e)}")
+                    con.execute(f"DROP TABLE IF EXISTS {loading_table}")
+                    raise
+                con.execute("BEGIN TRANSACTION")
+                con.execute(f"DROP TABLE IF EXISTS {table_name}")
+                con.execute(f"ALTER TABLE {loading_table} RENAME TO {table_name}")
+                con.execute("COMMIT")
+            finally:
                 con.close()
-                con = duckdb.connect(database=self.database_path)
-                con.sql(sql_query_import_1)
-                con.sql(sql_query_import_2)
-            except Exception as e2:
-                print(f"Error executing SQL query: {str(e)}")
-                raise
-        finally:
-            con.close()
 
-        return None
+        for stats in load_stats:
+            print(
+                f"Loaded {stats['rows']:,} rows from {stats['file']} in "
+                f"{stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/sec)"
+            )
+        return load_stats
+
+    def load_violation_files_incrementally(
+            self,
+            source: str,
+            table_name: str = "parking_violations_2023",
+            file_pattern: str = "parking_violations*.csv",
+            schema_path: str = None,
+            use_issue_date_watermark: bool = False,
+            manifest_table: str = "parking_violations_load_manifest"
+            ) -> list:
+        """
+        Appends only new violation files to the raw table instead of rebuilding
+        it, so a refresh costs time in proportion to the new data.
+
+        A file counts as new when its path, size and modification time are not
+        yet recorded in the load manifest table. Each new file is merged in its
+        own transaction: rows are deduplicated on `summons_number`, existing
+        rows with the same `summons_number` are replaced (upsert), and the file
+        is recorded in the manifest with its row counts.
+
+        Parameters:
+            source (str): A directory, a glob pattern or a single CSV file.
+            table_name (str, optional): Raw table to merge into; created from
+                the pinned schema if missing. Defaults to
+                "parking_violations_2023".
+            file_pattern (str, optional): Glob used when `source` is a
+                directory. Defaults to "parking_violations*.csv".
+            schema_path (str, optional): Where the pinned schema is cached
+                (see `get_pinned_csv_schema`). Defaults to
+                "parking_violations_schema.json" next to the data.
+            use_issue_date_watermark (bool, optional): Also skip rows whose
+                `issue_date` is not after the latest `issue_date` already
+                loaded. Useful when files overlap (e.g. rolling exports), but
+                late-arriving tickets are ignored. Defaults to False.
+            manifest_table (str, optional): Table recording loaded files.
+                Defaults to "parking_violations_load_manifest".
+
+        Returns:
+            list: One manifest entry (dict) per newly loaded file.
+
+        Example:
+            >>> duckdb_utils.load_violation_files_incrementally("../data/daily_drops")
+        """
+        files = self._resolve_violation_files(source, file_pattern)
+        data_dir = os.path.dirname(os.path.abspath(files[0]))
+        schema_path = schema_path or os.path.join(data_dir, "parking_violations_schema.json")
+        schema = self.get_pinned_csv_schema(files[0], schema_path)
+        column_definitions = ", ".join(
+            f'"{name}" {column_type}' for name, column_type in schema["columns"].items()
+        )
+
+        load_entries = []
+        with self.exclusive_write_access():
+            con = duckdb.connect(database=self.database_path)
+            try:
+                con.execute(f"""
+                CREATE TABLE IF NOT EXISTS {manifest_table} (
+                    file_path VARCHAR,
+                    file_size BIGINT,
+                    file_modified_at TIMESTAMP,
+                    loaded_at TIMESTAMP,
+                    row_count BIGINT,
+                    inserted_rows BIGINT,
+                    replaced_rows BIGINT
+                )
+                """)
+                con.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({column_definitions})")
+                loaded_files = set(con.execute(
+                    f"SELECT file_path, file_size, file_modified_at FROM {manifest_table}"
+                ).fetchall())
+
+                for csv_file in files:
+                    file_path = os.path.abspath(csv_file)
+                    file_stat = os.stat(file_path)
+                    file_modified_at = datetime.fromtimestamp(file_stat.st_mtime).replace(microsecond=0)
+                    if (file_path, file_stat.st_size, file_modified_at) in loaded_files:
+                        continue
+
+                    watermark_filter = ""
+                    if use_issue_date_watermark:
+                        watermark_filter = f"""
+                        WHERE issue_date > (
+                            SELECT COALESCE(MAX(issue_date), DATE '0001-01-01') FROM {table_name}
+                        )
+                        """
+
+                    started = time.perf_counter()
+                    try:
+                        con.execute("BEGIN TRANSACTION")
+                        row_count = con.execute(f"""
+                        CREATE OR REPLACE TEMP TABLE staged_violations AS
+                        SELECT * FROM {self._read_csv_with_schema(file_path, schema)}
+                        """).fetchone()[0]
+                        con.execute(f"""
+                        CREATE OR REPLACE TEMP TABLE new_violations AS
+                        SELECT * FROM staged_violations
+                        {watermark_filter}
+                        QUALIFY ROW_NUMBER() OVER (
+                            PARTITION BY summons_number ORDER BY issue_date DESC
+                        ) = 1
+                        """)
+                        replaced_rows = con.execute(f"""
+                        DELETE FROM {table_name}
+                        WHERE summons_number IN (SELECT summons_number FROM new_violations)
+                        """).fetchone()[0]
+                        inserted_rows = con.execute(
+                            f"INSERT INTO {table_name} SELECT * FROM new_violations"
+                        ).fetchone()[0]
+                        entry = {
+                            "file_path": file_path,
+                            "file_size": file_stat.st_size,
+                            "file_modified_at": file_modified_at,
+                            "loaded_at": datetime.now().replace(microsecond=0),
+                            "row_count": row_count,
+                            "inserted_rows": inserted_rows,
+                            "replaced_rows": replaced_rows,
+                        }
+                        con.execute(
+                            f"INSERT INTO {manifest_table} VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            list(entry.values())
+                        )
+                        con.execute("COMMIT")
+                    except Exception as e:
+                        con.execute("ROLLBACK")
+                        print(f"Error loading {file_path}: {str(e)}")
+                        raise
+                    finally:
+                        con.execute("DROP TABLE IF EXISTS staged_violations")
+                        con.execute("DROP TABLE IF EXISTS new_violations")
+
+                    seconds = time.perf_counter() - started
+                    print(
+                        f"Merged {inserted_rows:,} rows ({replaced_rows:,} replaced) "
+                        f"from {file_path} in {seconds:.2f}s"
+                    )
+                    load_entries.append(entry)
+            finally:
+                con.close()
+
+        if not load_entries:
+            print("No new violation files to load.")
+        return load_entries
 
 
 if __name__ == "__main__":